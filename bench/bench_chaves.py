@@ -0,0 +1,93 @@
+# bench/bench_chaves.py
+"""
+Benchmark das chaves (código, loja) do ModeloRuptura: texto
+"código-loja" (como o Cadeamento) contra a chave int64 compactada de
+ChavesLojaProduto, e o processar completo. O tempo do processar é medido
+sem o tracemalloc (que deixa tudo mais lento); o pico de memória vem de
+uma segunda execução com o tracemalloc ligado.
+
+Uso:
+    python bench/bench_chaves.py              # 1 milhão de linhas por DataFrame
+    python bench/bench_chaves.py 200000
+    python bench/bench_chaves.py --sem-processar
+
+Para medir o processar da versão anterior, rode o mesmo script com o
+código antigo; sem src/utils/chaves.py a parte int64 é pulada.
+"""
+import argparse
+import time
+import tracemalloc
+
+from dados_sinteticos import frames_ruptura
+
+from src.models.modelo_ruptura import ModeloRuptura
+from src.utils.codigos import normalizar_codigos
+
+try:
+    from src.utils.chaves import ChavesLojaProduto
+except ImportError:
+    ChavesLojaProduto = None
+
+LINHAS = 1_000_000
+
+
+def _colunas(df_estoque, df_curva, df_media):
+    """(códigos, lojas) de cada DataFrame do cruzamento"""
+    return [
+        (df_estoque['Codigo'], df_estoque['Loja']),
+        (df_curva['Código'], df_curva['Loja_Nome']),
+        (df_media['Código'], df_media['Loja']),
+    ]
+
+
+def chaves_texto(colunas):
+    """Chaves como texto "código-loja" e seu tamanho em MB"""
+    chaves = [normalizar_codigos(codigos).astype(str) + "-" + lojas.astype(str)
+              for codigos, lojas in colunas]
+    return chaves, sum(c.memory_usage(deep=True) for c in chaves) / 1e6
+
+
+def chaves_int64(colunas):
+    """Chaves int64 compactadas e seu tamanho em MB"""
+    gerador = ChavesLojaProduto(*(lojas for _, lojas in colunas))
+    chaves = [gerador.chave(normalizar_codigos(codigos), lojas) for codigos, lojas in colunas]
+    return chaves, sum(c.nbytes for c in chaves) / 1e6
+
+
+def cronometrar(funcao, *args):
+    """(resultado, segundos) de uma chamada"""
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das chaves (código, loja) da ruptura")
+    parser.add_argument('linhas', nargs='?', type=int, default=LINHAS,
+                        help="Linhas de cada DataFrame")
+    parser.add_argument('--sem-processar', action='store_true',
+                        help="Mede só a camada de chaves")
+    args = parser.parse_args()
+
+    df_estoque, df_curva, df_media = frames_ruptura(args.linhas)
+    colunas = _colunas(df_estoque, df_curva, df_media)
+    print(f"📊 estoque {len(df_estoque):,} | curva {len(df_curva):,} | média {len(df_media):,} linhas")
+
+    (_, mb), segundos = cronometrar(chaves_texto, colunas)
+    print(f"🔑 chaves texto: {segundos:.2f}s {mb:.0f} MB")
+    if ChavesLojaProduto is not None:
+        (_, mb), segundos = cronometrar(chaves_int64, colunas)
+        print(f"🔑 chaves int64: {segundos:.2f}s {mb:.0f} MB")
+
+    if not args.sem_processar:
+        _, segundos = cronometrar(ModeloRuptura().processar, df_estoque, df_curva, df_media)
+
+        tracemalloc.start()
+        ModeloRuptura().processar(df_estoque, df_curva, df_media)
+        pico = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+        print(f"⏱️ processar: {segundos:.2f}s, pico {pico:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+# bench/bench_inicializacao.py
+"""
+Benchmark do tempo até a primeira janela.
+
+Com interface gráfica (customtkinter instalado e um display disponível),
+abre o main.py várias vezes, lê a linha "⏱️ Janela pronta em N ms" que o
+programa imprime e fecha o processo. Sem interface, mede em um
+interpretador novo as importações que o main.py faz antes da janela e
+quais bibliotecas pesadas (pandas, numpy, openpyxl) já foram carregadas
+nesse ponto.
+
+Uso:
+    python bench/bench_inicializacao.py                 # 5 execuções
+    python bench/bench_inicializacao.py --repeticoes 10
+    python bench/bench_inicializacao.py --importacoes   # só as importações
+"""
+import argparse
+import importlib
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos do projeto que o main.py importa antes de criar a janela
+MODULOS_INICIAIS = [
+    'src.utils.config',
+    'src.utils.helpers',
+    'src.ui.menu',
+    'src.utils.config_manager',
+]
+BIBLIOTECAS_PESADAS = ['pandas', 'numpy', 'openpyxl']
+
+LINHA_JANELA = re.compile(r"Janela pronta em (\d+) ms")
+TEMPO_LIMITE = 60
+
+
+def _ambiente():
+    """Ambiente do processo filho com saída sem buffer e em UTF-8 (emojis no Windows)"""
+    ambiente = dict(os.environ)
+    ambiente['PYTHONUNBUFFERED'] = '1'
+    ambiente['PYTHONIOENCODING'] = 'utf-8'
+    return ambiente
+
+
+def tem_interface():
+    """True se dá para abrir a janela (customtkinter instalado e display disponível)"""
+    try:
+        importlib.import_module('customtkinter')
+    except ImportError:
+        return False
+    return sys.platform == 'win32' or sys.platform == 'darwin' or bool(os.environ.get('DISPLAY'))
+
+
+def medir_janela():
+    """
+    Abre o main.py e espera a linha de janela pronta.
+
+    Returns:
+        tuple: (ms informado pelo programa, ms medidos de fora desde o Popen)
+    """
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(
+        [sys.executable, os.path.join(RAIZ, 'main.py')],
+        cwd=RAIZ, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        env=_ambiente(), text=True, encoding='utf-8', errors='replace'
+    )
+    # Se a janela não aparecer, mata o processo e a leitura abaixo termina
+    limite = threading.Timer(TEMPO_LIMITE, processo.kill)
+    limite.start()
+    try:
+        for linha in processo.stdout:
+            encontrado = LINHA_JANELA.search(linha)
+            if encontrado:
+                return int(encontrado.group(1)), (time.perf_counter() - inicio) * 1000
+        raise RuntimeError("main.py terminou sem imprimir 'Janela pronta'")
+    finally:
+        limite.cancel()
+        processo.kill()
+        processo.wait()
+
+
+def _filho_importacoes():
+    """Executado no interpretador novo: importa os módulos iniciais e imprime o resultado"""
+    sys.path.insert(0, RAIZ)
+    inicio = time.perf_counter()
+    falhas = {}
+    for modulo in MODULOS_INICIAIS:
+        try:
+            importlib.import_module(modulo)
+        except Exception as e:
+            # Sem display, src.utils.config não consegue medir a tela
+            falhas[modulo] = f"{type(e).__name__}: {e}"
+    print(json.dumps({
+        'ms': (time.perf_counter() - inicio) * 1000,
+        'carregadas': [nome for nome in BIBLIOTECAS_PESADAS if nome in sys.modules],
+        'falhas': falhas,
+    }))
+
+
+def medir_importacoes():
+    """Importações iniciais em um interpretador novo (dict com ms, carregadas e falhas)"""
+    saida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--filho-importacoes'],
+        cwd=RAIZ, capture_output=True, env=_ambiente(), text=True, encoding='utf-8',
+        timeout=TEMPO_LIMITE, check=True
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do tempo até a primeira janela")
+    parser.add_argument('--repeticoes', type=int, default=5, help="Execuções (vale a mediana)")
+    parser.add_argument('--importacoes', action='store_true',
+                        help="Mede só as importações iniciais, sem abrir a janela")
+    parser.add_argument('--filho-importacoes', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho_importacoes:
+        _filho_importacoes()
+        return
+
+    if not args.importacoes and tem_interface():
+        internos, externos = [], []
+        for i in range(args.repeticoes):
+            interno, externo = medir_janela()
+            internos.append(interno)
+            externos.append(externo)
+            print(f"   {i + 1}: janela pronta em {interno} ms ({externo:.0f} ms desde o início do processo)")
+        print(f"⏱️ Mediana: {statistics.median(internos):.0f} ms "
+              f"({statistics.median(externos):.0f} ms desde o início do processo)")
+        return
+
+    if not args.importacoes:
+        print("⚠️ Sem interface gráfica (customtkinter ou display): medindo só as importações iniciais")
+
+    resultados = [medir_importacoes() for _ in range(args.repeticoes)]
+    for i, resultado in enumerate(resultados):
+        print(f"   {i + 1}: {resultado['ms']:.0f} ms")
+    print(f"⏱️ Importações antes da janela (mediana): "
+          f"{statistics.median(r['ms'] for r in resultados):.0f} ms")
+    carregadas = resultados[-1]['carregadas']
+    print(f"📦 Bibliotecas pesadas já carregadas: {', '.join(carregadas) if carregadas else 'nenhuma'}")
+    for modulo, erro in resultados[-1]['falhas'].items():
+        print(f"⚠️ {modulo} não importado: {erro}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# bench/bench_ruptura.py
+"""
+Benchmark do relatório de ruptura (RelatorioRuptura.gerar) em dados
+sintéticos de 3 mil, 100 mil e 1 milhão de linhas da Curva ABC.
+
+Uso:
+    python bench/bench_ruptura.py                 # 3000 100000 1000000
+    python bench/bench_ruptura.py 3000 100000     # tamanhos escolhidos
+    python bench/bench_ruptura.py --repeticoes 3  # melhor de 3 execuções
+
+Para comparar com uma versão anterior, rode o mesmo script com o
+código antigo (ex: git stash / git checkout <commit> -- src).
+"""
+import argparse
+import time
+
+from dados_sinteticos import combinado_ruptura, usar_media
+
+from src.relatorios.relatorios_disponiveis import RelatorioRuptura
+
+TAMANHOS = [3_000, 100_000, 1_000_000]
+
+
+def medir(linhas, repeticoes):
+    """Melhor tempo de gerar() em segundos e quantidade de linhas do resultado"""
+    df_combinado, df_media = combinado_ruptura(linhas)
+    usar_media(df_media)
+
+    melhor = None
+    for _ in range(repeticoes):
+        relatorio = RelatorioRuptura()
+        inicio = time.perf_counter()
+        relatorio.gerar(df_combinado)
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor, len(relatorio.df_resultado)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do relatório de ruptura")
+    parser.add_argument('tamanhos', nargs='*', type=int, default=TAMANHOS,
+                        help="Linhas da Curva ABC a testar")
+    parser.add_argument('--repeticoes', type=int, default=1,
+                        help="Execuções por tamanho (vale a melhor)")
+    args = parser.parse_args()
+
+    print(f"{'linhas curva':>14} | {'resultado':>10} | {'tempo':>9}")
+    for linhas in args.tamanhos:
+        segundos, resultado = medir(linhas, args.repeticoes)
+        print(f"{linhas:>14,} | {resultado:>10,} | {segundos:>8.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# bench/dados_sinteticos.py
+"""
+Dados sintéticos para os benchmarks (mesmo formato que os modelos entregam
+depois de processar as planilhas do SGE). Gerados com semente fixa para
+que as medições sejam comparáveis entre versões.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+LOJAS = ['COMCARNE MATRIZ SAO LUIS', 'LOJA 1', 'LOJA 2', 'LOJA 3']
+
+
+def combinado_ruptura(linhas, codigos=None, semente=0):
+    """
+    Monta o DataFrame combinado (Curva ABC + Estoque) usado pelo relatório
+    de ruptura e a média de vendas correspondente.
+
+    Args:
+        linhas: Linhas da Curva ABC (o estoque tem metade disso)
+        codigos: Quantidade de códigos distintos (padrão: linhas / 5)
+        semente: Semente do gerador aleatório
+
+    Returns:
+        tuple: (df_combinado, df_media)
+    """
+    codigos = codigos or max(linhas // 5, 10)
+    rng = np.random.default_rng(semente)
+
+    curva = pd.DataFrame({
+        'Código': rng.integers(1, codigos, linhas).astype(float),
+        'Produto': [f'P{i}' for i in rng.integers(0, codigos, linhas)],
+        'Qtd': rng.random(linhas) * 10,
+        'Total R$': rng.random(linhas) * 100,
+        'Loja_Codigo': 1.0,
+        'Loja_Nome': rng.choice(LOJAS + ['LOJA 9'], linhas),
+    })
+
+    metade = linhas // 2
+    estoque = pd.DataFrame({
+        'Codigo': rng.integers(1, codigos, metade),
+        'Descricao': 'x',
+        'Estoque_Loja': rng.integers(0, 5, metade).astype(float),
+        'Estoque_Geral': 1.0,
+        'Categoria': rng.choice(['A', 'B', None], metade),
+        'Grupo': rng.choice(['G1', 'G2'], metade),
+        'Loja': rng.choice(LOJAS, metade),
+    })
+
+    media = pd.DataFrame({
+        'Código': rng.integers(1, codigos, linhas).astype(float),
+        'Loja': rng.choice(LOJAS, linhas),
+        'Qtd': rng.random(linhas),
+    })
+
+    return pd.concat([curva, estoque], ignore_index=True), media
+
+
+def usar_media(df_media):
+    """Troca os dados da média de vendas em memória (sem ler a planilha)"""
+    from src.config.media_vendas import get_media_vendas
+
+    media_vendas = get_media_vendas()
+    media_vendas._df = df_media
+    media_vendas._construir_indices()
+    return media_vendas
+
+
+def frames_ruptura(linhas, codigos=None, semente=0):
+    """
+    Monta os três DataFrames de entrada do ModeloRuptura, já sem duplicatas
+    de (código, loja) no estoque e na Curva ABC.
+
+    Args:
+        linhas: Linhas de cada DataFrame antes de remover duplicatas
+        codigos: Quantidade de códigos distintos (padrão: linhas / 3)
+        semente: Semente do gerador aleatório
+
+    Returns:
+        tuple: (df_estoque, df_curva, df_media)
+    """
+    codigos = codigos or max(linhas // 3, 10)
+    rng = np.random.default_rng(semente)
+
+    estoque = pd.DataFrame({
+        'Codigo': rng.integers(1, codigos, linhas),
+        'Descricao': 'x',
+        'Estoque_Loja': rng.integers(0, 5, linhas).astype(float),
+        'Estoque_Geral': 1.0,
+        'Categoria': rng.choice(['A', 'B'], linhas),
+        'Grupo': rng.choice(['AÇOUGUE', 'G2', ''], linhas),
+        'Loja': rng.choice(LOJAS, linhas),
+    })
+    estoque = estoque.drop_duplicates(['Codigo', 'Loja']).reset_index(drop=True)
+
+    curva = pd.DataFrame({
+        'Código': rng.integers(1, codigos, linhas).astype(float),
+        'Produto': 'p',
+        'Qtd': rng.random(linhas) * 10,
+        'Total R$': 1.0,
+        'Loja_Codigo': 1.0,
+        'Loja_Nome': rng.choice(LOJAS, linhas),
+    })
+    curva = curva.drop_duplicates(['Código', 'Loja_Nome'])
+
+    media = pd.DataFrame({
+        'Código': rng.integers(1, codigos, linhas),
+        'Loja': rng.choice(LOJAS, linhas),
+        'Qtd': rng.random(linhas),
+    })
+
+    return estoque, curva, media
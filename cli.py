@@ -0,0 +1,207 @@
+# cli.py
+"""
+Modo linha de comando (sem interface gráfica) do K'PY AUTOMATE.
+Processa vários arquivos de uma vez, exporta o resultado e mostra o tempo
+gasto em cada etapa. Não importa Tk: pode rodar agendado num servidor.
+
+Exemplos:
+    python cli.py "relatorios/*.xlsx" --formato parquet --saida saida/
+    python cli.py curva.xlsx estoque.xlsx --tipo ruptura --formato csv
+    python cli.py "entradas_*.xlsx" --tipo entradas
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from datetime import datetime
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import pandas as pd
+from src.core.identificador import IdentificadorModelos
+from src.utils.exportador import exportar, formatos_disponiveis
+from src.utils.leitor_excel import ler_excel
+
+# Tipo de relatório -> nome do modelo (IdentificadorModelos)
+TIPOS = {
+    'curva_abc': "Curva ABC por Loja",
+    'entradas': "Entradas por Grupo",
+    'estoque': "Estoque",
+}
+
+ETAPAS = ['cache', 'identificacao', 'carga', 'processamento', 'ruptura', 'exportacao']
+
+
+def expandir_entradas(padroes):
+    """
+    Expande caminhos e globs, sem repetir arquivos e mantendo a ordem.
+
+    Args:
+        padroes: Caminhos ou padrões (ex: "relatorios/*.xlsx")
+
+    Returns:
+        list: Caminhos dos arquivos encontrados
+    """
+    arquivos = []
+    for padrao in padroes:
+        encontrados = sorted(glob.glob(padrao, recursive=True)) if glob.has_magic(padrao) else [padrao]
+        for caminho in encontrados:
+            if os.path.isfile(caminho) and caminho not in arquivos:
+                arquivos.append(caminho)
+    return arquivos
+
+
+def _nome_saida(nome, formato, pasta):
+    """Monta o caminho do arquivo exportado"""
+    return os.path.join(pasta, f"{nome}.{formato}")
+
+
+def _exportar(df, caminho, nome_aba, tempos):
+    """Exporta medindo o tempo"""
+    inicio = time.perf_counter()
+    exportar(df, caminho, nome_aba=nome_aba)
+    tempos['exportacao'] += time.perf_counter() - inicio
+    print(f"💾 {caminho} ({len(df)} linhas)")
+
+
+def _resumo_tempos(tempos, total):
+    """Imprime o resumo de tempo por etapa"""
+    print("\n" + "=" * 50)
+    print("⏱️ TEMPO POR ETAPA")
+    print("=" * 50)
+    for etapa in ETAPAS:
+        if tempos[etapa] > 0:
+            print(f"  {etapa:<15} {tempos[etapa]:>8.2f} s")
+    print(f"  {'total':<15} {total:>8.2f} s")
+
+
+def criar_parser():
+    """Argumentos da linha de comando"""
+    parser = argparse.ArgumentParser(
+        description="K'PY AUTOMATE - processamento de relatórios sem interface gráfica"
+    )
+    parser.add_argument('entradas', nargs='+', help="Arquivos Excel ou padrões (ex: 'pasta/*.xlsx')")
+    parser.add_argument('--tipo', choices=['auto', 'ruptura'] + list(TIPOS), default='auto',
+                        help="Tipo de relatório (auto = identifica cada arquivo)")
+    parser.add_argument('--formato', choices=[ext.lstrip('.') for ext in formatos_disponiveis()],
+                        default='xlsx', help="Formato de saída")
+    parser.add_argument('--saida', default='.', help="Pasta onde os arquivos são gravados")
+    parser.add_argument('--media', help="Planilha de média de vendas (ruptura)")
+    parser.add_argument('--sem-cache', action='store_true', help="Reprocessa mesmo se o arquivo estiver no cache")
+    return parser
+
+
+def _gerar_ruptura(processados, args, tempos):
+    """
+    Gera o relatório de ruptura com as Curvas ABC e Estoques carregados.
+
+    Returns:
+        int: 1 se não foi possível gerar, 0 caso contrário
+    """
+    curvas = processados.get(TIPOS['curva_abc'])
+    estoques = processados.get(TIPOS['estoque'])
+    if not curvas or not estoques:
+        print("❌ Ruptura precisa de pelo menos uma Curva ABC e um Estoque")
+        return 1
+
+    from src.models.modelo_ruptura import ModeloRuptura
+
+    # try/finally: o tempo gasto entra no resumo mesmo se a etapa falhar
+    inicio = time.perf_counter()
+    try:
+        if args.media:
+            df_media = ler_excel(args.media)
+        else:
+            from src.config.media_vendas import get_media_vendas
+            df_media = get_media_vendas().get_df()
+    finally:
+        tempos['carga'] += time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    try:
+        df_curva = pd.concat(curvas, ignore_index=True) if len(curvas) > 1 else curvas[0]
+        df_estoque = pd.concat(estoques, ignore_index=True) if len(estoques) > 1 else estoques[0]
+        df_ruptura = ModeloRuptura().processar(df_estoque, df_curva, df_media)
+    finally:
+        tempos['ruptura'] += time.perf_counter() - inicio
+
+    if df_ruptura is None or len(df_ruptura) == 0:
+        print("❌ Relatório de ruptura vazio")
+        return 1
+
+    data_hora = datetime.now().strftime("%Y%m%d_%H%M%S")
+    _exportar(df_ruptura, _nome_saida(f"Relatorio_Ruptura_{data_hora}", args.formato, args.saida), "Ruptura", tempos)
+    return 0
+
+
+def main(argv=None):
+    """
+    Executa o processamento em lote.
+
+    Returns:
+        int: 0 se todos os arquivos foram processados, 1 caso contrário
+    """
+    args = criar_parser().parse_args(argv)
+    inicio_total = time.perf_counter()
+    tempos = dict.fromkeys(ETAPAS, 0.0)
+
+    arquivos = expandir_entradas(args.entradas)
+    if not arquivos:
+        print("❌ Nenhum arquivo encontrado")
+        return 1
+
+    os.makedirs(args.saida, exist_ok=True)
+    identificador = IdentificadorModelos()
+    falhas = 0
+    processados = {}
+
+    print(f"📂 {len(arquivos)} arquivo(s) | tipo: {args.tipo} | formato: {args.formato}")
+
+    for caminho in arquivos:
+        try:
+            modelo, df = identificador.carregar_processado(caminho, usar_cache=not args.sem_cache)
+            tempos_arquivo = identificador.get_tempos()
+            for etapa in ('cache', 'identificacao', 'carga', 'processamento'):
+                tempos[etapa] += tempos_arquivo.get(f'{etapa}_ms', 0.0) / 1000
+
+            if modelo is None or df is None or len(df) == 0:
+                print(f"❌ {caminho}: tipo não identificado ou sem dados")
+                falhas += 1
+                continue
+
+            origem = " (cache)" if tempos_arquivo.get('cache') else ""
+            print(f"✅ {caminho}: {modelo.nome} - {len(df)} linhas{origem}")
+
+            tipo_esperado = TIPOS.get(args.tipo)
+            if tipo_esperado and modelo.nome != tipo_esperado:
+                print(f"⚠️ {caminho}: ignorado (não é {tipo_esperado})")
+                continue
+
+            if args.tipo == 'ruptura':
+                processados.setdefault(modelo.nome, []).append(df.reset_index(drop=True))
+                continue
+
+            base = os.path.splitext(os.path.basename(caminho))[0]
+            nome_modelo = modelo.nome.replace(' ', '_')
+            _exportar(df, _nome_saida(f"{base}_{nome_modelo}", args.formato, args.saida), modelo.nome[:31], tempos)
+
+        except Exception as e:
+            print(f"❌ {caminho}: {e}")
+            falhas += 1
+
+    if args.tipo == 'ruptura':
+        try:
+            falhas += _gerar_ruptura(processados, args, tempos)
+        except Exception as e:
+            print(f"❌ Ruptura: {e}")
+            falhas += 1
+
+    _resumo_tempos(tempos, time.perf_counter() - inicio_total)
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,9 +2,19 @@
 """
 Ponto de entrada do programa K'PY AUTOMATE.
 Versão 2.2.0 - Com ajuste de fonte e temas personalizados
+
+Inicialização rápida: só o necessário para a janela (tema, menu) é
+importado aqui. As telas são criadas na primeira vez que são abertas e
+pandas, modelos e média de vendas são aquecidos em segundo plano depois
+que a janela aparece.
 """
+import time
+INICIO = time.perf_counter()
+
 import sys
 import os
+import threading
+import multiprocessing
 import customtkinter as ctk
 
 # Configurar o tema e aparência do CustomTkinter
@@ -23,10 +33,6 @@ try:
     from src.utils.config import ESCURO, CLARO, LAYOUT, get_tema_personalizado, listar_temas_disponiveis
     from src.utils.helpers import centralizar_janela
     from src.ui.menu import MenuLateral
-    from src.ui.telas.tela_resultado import TelaResultado
-    from src.ui.telas.tela_entradas import TelaEntradas
-    from src.ui.telas.tela_criar_relatorio import TelaCriarRelatorio
-    from src.core.identificador import IdentificadorModelos
     from src.utils.config_manager import config
     print("✅ Módulos importados com sucesso!")
 except Exception as e:
@@ -56,10 +62,11 @@ class Aplicacao:
         self.tema_escuro = (self.tema_atual == 'escuro')
         self._carregar_tema()
         
-        # Inicializa o identificador
-        self.identificador = IdentificadorModelos()
+        # Identificador dos modelos (criado no primeiro uso ou no aquecimento)
+        self._identificador = None
+        self._lock_identificador = threading.Lock()
         
-        # Dicionário para guardar as telas
+        # Dicionário para guardar as telas (criadas na primeira vez que são abertas)
         self.telas = {}
         
         # Callbacks para cada relatório
@@ -80,30 +87,64 @@ class Aplicacao:
         )
         self.frame_work.grid(row=0, column=1, sticky='nsew')
         
-        # Criar as telas
-        self._criar_telas()
-        
-        # Abre tela inicial
-        self.abrir_curva_abc()
+        # Abre a tela inicial e aquece o restante depois que a janela aparecer
+        self.root.after_idle(self._janela_pronta)
         
         print("✅ Aplicação iniciada com sucesso!")
         print(f"📐 Tamanho da janela: {LAYOUT['largura_janela']}x{LAYOUT['altura_janela']}")
         print(f"🔤 Fonte: {self.fonte_atual}pt")
     
-    def _criar_telas(self):
-        """Cria todas as telas uma única vez"""
-        print("🔄 Criando telas...")
-        
-        # Tela Curva ABC
-        self.telas['curva_abc'] = TelaResultado(self.frame_work, self.cores, self.identificador)
-        
-        # Tela Entradas
-        self.telas['entradas'] = TelaEntradas(self.frame_work, self.cores)
-        
-        # Tela Criar Relatório
-        self.telas['criar_relatorio'] = TelaCriarRelatorio(self.frame_work, self.cores)
-        
-        print("✅ Telas criadas!")
+    @property
+    def identificador(self):
+        """Identificador de modelos compartilhado pelas telas (criado uma única vez)"""
+        if self._identificador is None:
+            with self._lock_identificador:
+                if self._identificador is None:
+                    from src.core.identificador import IdentificadorModelos
+                    self._identificador = IdentificadorModelos()
+        return self._identificador
+    
+    def _janela_pronta(self):
+        """Chamado quando a janela já está na tela"""
+        print(f"⏱️ Janela pronta em {(time.perf_counter() - INICIO) * 1000:.0f} ms")
+        self.abrir_curva_abc()
+        threading.Thread(target=self._aquecer, daemon=True).start()
+    
+    def _aquecer(self):
+        """
+        Carrega em segundo plano o que as telas vão precisar: módulos das
+        telas (pandas, numpy, modelos) e identificador. A média de vendas
+        tem a própria thread (carregar_em_segundo_plano).
+        Não cria widgets: isso continua na thread principal.
+        """
+        inicio = time.perf_counter()
+        try:
+            from src.config.media_vendas import carregar_em_segundo_plano
+            carregar_em_segundo_plano()
+            import src.ui.telas.tela_entradas
+            import src.ui.telas.tela_criar_relatorio
+            self.identificador
+            print(f"🔥 Aquecimento concluído em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        except Exception as e:
+            print(f"⚠️ Erro no aquecimento: {e}")
+    
+    def _obter_tela(self, nome):
+        """Cria a tela na primeira vez que é aberta (o módulo só é importado aqui)"""
+        if nome not in self.telas:
+            inicio = time.perf_counter()
+            
+            if nome == 'curva_abc':
+                from src.ui.telas.tela_resultado import TelaResultado
+                self.telas[nome] = TelaResultado(self.frame_work, self.cores, self.identificador)
+            elif nome == 'entradas':
+                from src.ui.telas.tela_entradas import TelaEntradas
+                self.telas[nome] = TelaEntradas(self.frame_work, self.cores)
+            elif nome == 'criar_relatorio':
+                from src.ui.telas.tela_criar_relatorio import TelaCriarRelatorio
+                self.telas[nome] = TelaCriarRelatorio(self.frame_work, self.cores, self.identificador)
+            
+            print(f"🔄 Tela '{nome}' criada em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        return self.telas[nome]
     
     def _carregar_tema(self):
         """Carrega as cores do tema baseado nas configurações"""
@@ -199,7 +240,7 @@ class Aplicacao:
         """Abre a tela de Curva ABC sem perder dados"""
         print("📊 Abrindo Curva ABC")
         self._esconder_todas_telas()
-        tela = self.telas['curva_abc']
+        tela = self._obter_tela('curva_abc')
         
         if not hasattr(tela, 'frame') or not tela.frame:
             tela.mostrar()
@@ -212,7 +253,7 @@ class Aplicacao:
         """Abre a tela de Entradas sem perder dados"""
         print("📦 Abrindo Entradas")
         self._esconder_todas_telas()
-        tela = self.telas['entradas']
+        tela = self._obter_tela('entradas')
         
         if not hasattr(tela, 'frame') or not tela.frame:
             tela.mostrar()
@@ -225,7 +266,7 @@ class Aplicacao:
         """Abre a tela de Criar Relatório"""
         print("📋 Abrindo Criar Relatório")
         self._esconder_todas_telas()
-        tela = self.telas['criar_relatorio']
+        tela = self._obter_tela('criar_relatorio')
         
         if not hasattr(tela, 'frame') or not tela.frame:
             tela.mostrar()
@@ -240,4 +281,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # Necessário para os processos do carregamento paralelo no executável (PyInstaller)
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
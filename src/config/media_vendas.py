@@ -2,38 +2,112 @@
 """
 Arquivo com a média de vendas de todas as lojas.
 Versão 2.1.0 - Com sistema de logs integrado
+
+Fonte única da média de vendas para todo o sistema: a planilha é lida uma
+vez (de preferência em segundo plano), um snapshot em Parquet fica ao lado do
+xlsx e só há nova leitura quando a planilha muda (mtime/tamanho e hash).
 """
 import pandas as pd
+import numpy as np
 import os
-from src.utils.helpers import get_resource_path
+import json
+import time
+import threading
+from pathlib import Path
+from src.utils.helpers import get_resource_path, resource_path
+from src.utils.leitor_excel import ler_excel
+from src.utils.codigos import normalizar_codigos, normalizar_codigo, SEM_CODIGO
 from src.utils.logger import info, error, warning, debug
 
+ARQUIVO_MEDIA = "data/media_vendas.xlsx"
+SUFIXO_SNAPSHOT = ".snapshot.parquet"
+SUFIXO_METADADOS = ".snapshot.json"
+VERSAO_SNAPSHOT = 2
+
+# Depois de uma falha, a planilha (se não mudou) só é lida de novo após esse tempo
+INTERVALO_NOVA_TENTATIVA = 30
+
+# Nas buscas individuais (produto a produto), a planilha só é conferida
+# (os.stat) uma vez a cada tantos segundos; get_df e get_medias conferem sempre
+INTERVALO_VERIFICACAO = 2
+
+
+def caminho_planilha():
+    """
+    Caminho da planilha de média: a que está ao lado do programa (pode ser
+    atualizada pelo usuário) ou, se não existir, a que veio empacotada.
+    """
+    for caminho in (resource_path(ARQUIVO_MEDIA), get_resource_path(ARQUIVO_MEDIA)):
+        if os.path.exists(caminho):
+            return caminho
+    return get_resource_path(ARQUIVO_MEDIA)
+
+
+def _assinatura(caminho):
+    """(mtime, tamanho) da planilha ou None se ela não existir"""
+    try:
+        stat = os.stat(caminho)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def _caminhos_snapshot(caminho):
+    """
+    Snapshot ao lado do xlsx; se a pasta não aceitar escrita, na pasta do cache.
+    Cada snapshot é um par (dados em Parquet, metadados em JSON).
+    """
+    bases = [caminho, str(Path.home() / ".kpy_automate" / "cache" / "media_vendas")]
+    return [(Path(base + SUFIXO_SNAPSHOT), Path(base + SUFIXO_METADADOS)) for base in bases]
+
+
 class MediaVendas:
     """Classe para gerenciar os dados de média de vendas"""
     
     _instance = None
     _df = None
+    _indice_loja = None
+    _indice_produto = None
+    _caminho = None
+    _assinatura = None
+    _falha = None  # (assinatura, instante) da última carga que falhou
+    _verificado_em = None  # instante (monotonic) da última conferência da planilha
+    
+    _lock = threading.Lock()
     
     def __new__(cls):
+        # Criada no primeiro uso (ou no aquecimento em segundo plano), nunca na importação
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._carregar_dados()
+            with cls._lock:
+                if cls._instance is None:
+                    instancia = super().__new__(cls)
+                    instancia._carregar_dados()
+                    cls._instance = instancia
         return cls._instance
     
     def _carregar_dados(self):
-        """Carrega os dados da planilha de média de vendas"""
+        """
+        Carrega os dados da planilha de média de vendas (do snapshot, se estiver em dia).
+        A assinatura só é registrada depois de uma leitura bem-sucedida; se a
+        leitura falhar (ex: planilha aberta no Excel), atualizar() tenta de novo.
+        """
+        caminho = caminho_planilha()
+        assinatura = _assinatura(caminho)
+        self._caminho = caminho
         try:
-            caminho = get_resource_path("data/media_vendas.xlsx")
             info(f"📁 Carregando média de vendas de: {caminho}")
             
-            if os.path.exists(caminho):
-                self._df = pd.read_excel(caminho)
-                info(f"✅ Média de vendas carregada: {len(self._df)} linhas")
-                debug(f"📊 Colunas disponíveis: {list(self._df.columns)}")
+            if assinatura is not None:
+                df = self._ler_snapshot(caminho, assinatura)
+                if df is None:
+                    df = ler_excel(caminho)
+                    self._salvar_snapshot(caminho, df, assinatura)
+                info(f"✅ Média de vendas carregada: {len(df)} linhas")
+                debug(f"📊 Colunas disponíveis: {list(df.columns)}")
                 
                 # Verificar se as colunas necessárias existem
                 colunas_necessarias = ['Código', 'Loja', 'Qtd']
-                colunas_faltando = [col for col in colunas_necessarias if col not in self._df.columns]
+                colunas_faltando = [col for col in colunas_necessarias if col not in df.columns]
                 
                 if colunas_faltando:
                     warning(f"⚠️ Colunas faltando no arquivo de média: {colunas_faltando}")
@@ -42,18 +116,187 @@ class MediaVendas:
                     
             else:
                 warning(f"⚠️ Arquivo de média de vendas NÃO encontrado em: {caminho}")
-                self._df = pd.DataFrame(columns=['Código', 'Loja', 'Qtd'])
+                df = pd.DataFrame(columns=['Código', 'Loja', 'Qtd'])
+            
+            self._df = df
+            self._assinatura = assinatura
+            self._falha = None
                 
         except Exception as e:
             error(f"❌ Erro ao carregar média de vendas: {e}")
             self._df = pd.DataFrame(columns=['Código', 'Loja', 'Qtd'])
+            self._assinatura = None
+            self._falha = (assinatura, time.monotonic())
+        
+        self._construir_indices()
     
-    def get_df(self):
-        """Retorna o DataFrame com as médias de vendas"""
-        # Se estiver vazio, tenta carregar novamente
-        if self._df is None or len(self._df) == 0:
-            warning("⚠️ DataFrame vazio, tentando recarregar...")
+    def _ler_snapshot(self, caminho, assinatura):
+        """
+        Lê o snapshot se ele corresponde à planilha atual.
+        Mesmo mtime/tamanho basta; se só o mtime mudou, compara o hash do
+        conteúdo e, se for o mesmo, atualiza a assinatura do snapshot.
+        Os dados ficam em Parquet (nada é desserializado com pickle) e os
+        metadados dizem o tamanho esperado do arquivo de dados.
+        """
+        for arquivo, arquivo_meta in _caminhos_snapshot(caminho):
+            if not (arquivo.exists() and arquivo_meta.exists()):
+                continue
+            try:
+                with open(arquivo_meta, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                if meta.get('versao') != VERSAO_SNAPSHOT or meta.get('planilha') != os.path.abspath(caminho):
+                    continue
+                if meta.get('tamanho_dados') != arquivo.stat().st_size:
+                    continue
+                
+                if meta.get('assinatura') == list(assinatura):
+                    info(f"⚡ Média de vendas do snapshot: {arquivo.name}")
+                    return pd.read_parquet(arquivo)
+                
+                from src.utils.cache_arquivos import cache_arquivos
+                if meta.get('hash') == cache_arquivos.hash_arquivo(caminho):
+                    info(f"⚡ Média de vendas do snapshot (conteúdo igual): {arquivo.name}")
+                    df = pd.read_parquet(arquivo)
+                    self._salvar_snapshot(caminho, df, assinatura, meta['hash'])
+                    return df
+            except Exception as e:
+                debug(f"Snapshot da média ignorado ({arquivo}): {e}")
+        return None
+    
+    def _salvar_snapshot(self, caminho, df, assinatura, hash_planilha=None):
+        """
+        Grava o snapshot (ao lado do xlsx ou, sem permissão, na pasta do cache).
+        Sem suporte a Parquet (pyarrow), não há snapshot e a planilha é lida sempre.
+        """
+        from src.utils.cache_arquivos import cache_arquivos
+        
+        for arquivo, arquivo_meta in _caminhos_snapshot(caminho):
+            temporario = arquivo.with_name(f"{arquivo.name}.{os.getpid()}.tmp")
+            temporario_meta = arquivo_meta.with_name(f"{arquivo_meta.name}.{os.getpid()}.tmp")
+            try:
+                arquivo.parent.mkdir(parents=True, exist_ok=True)
+                df.to_parquet(temporario, index=False)
+                meta = {
+                    'versao': VERSAO_SNAPSHOT,
+                    'planilha': os.path.abspath(caminho),
+                    'assinatura': list(assinatura),
+                    'hash': hash_planilha or cache_arquivos.hash_arquivo(caminho),
+                    'tamanho_dados': temporario.stat().st_size,
+                }
+                with open(temporario_meta, 'w', encoding='utf-8') as f:
+                    json.dump(meta, f)
+                os.replace(temporario, arquivo)
+                os.replace(temporario_meta, arquivo_meta)
+                debug(f"💾 Snapshot da média salvo: {arquivo}")
+                return True
+            except OSError as e:
+                debug(f"Não foi possível salvar o snapshot em {arquivo}: {e}")
+            except Exception as e:
+                debug(f"Snapshot da média indisponível ({e}), a planilha será lida a cada carga")
+                return False
+            finally:
+                for resto in (temporario, temporario_meta):
+                    if resto.exists():
+                        try:
+                            resto.unlink()
+                        except OSError:
+                            pass
+        return False
+    
+    def _em_dia(self, caminho):
+        """
+        True se não é preciso ler a planilha de novo: os dados carregados
+        correspondem a ela ou a última leitura falhou há pouco com a mesma planilha.
+        """
+        if caminho != self._caminho:
+            return False
+        assinatura = _assinatura(caminho)
+        if self._falha is not None:
+            assinatura_falha, instante = self._falha
+            return assinatura == assinatura_falha and \
+                time.monotonic() - instante < INTERVALO_NOVA_TENTATIVA
+        return assinatura == self._assinatura
+    
+    def atualizar(self):
+        """
+        Recarrega a média se a planilha mudou desde a última carga ou se a
+        última leitura falhou (nova tentativa após INTERVALO_NOVA_TENTATIVA).
+        
+        Returns:
+            bool: True se os dados foram recarregados
+        """
+        self._verificado_em = time.monotonic()
+        caminho = caminho_planilha()
+        if self._em_dia(caminho):
+            return False
+        
+        with self._lock:
+            if self._em_dia(caminho):
+                return False
+            info("🔄 Planilha de média de vendas mudou, recarregando...")
             self._carregar_dados()
+        return True
+    
+    @staticmethod
+    def _float_seguro(valor):
+        """Converte para float como nas buscas individuais (erro vira 0)"""
+        try:
+            return float(valor)
+        except (TypeError, ValueError):
+            return 0.0
+    
+    @staticmethod
+    def _chaves_codigo(codigos):
+        """Normaliza códigos para busca: chave inteira (ver src.utils.codigos)"""
+        return normalizar_codigos(codigos).values
+    
+    @staticmethod
+    def _chaves_loja(lojas):
+        """Normaliza lojas para busca: texto sem espaços, em maiúsculas"""
+        return pd.Series(lojas).astype(str).str.strip().str.upper().values
+    
+    def _construir_indices(self):
+        """
+        Monta os índices de busca uma única vez por carga:
+        - (código, loja) -> primeira média encontrada
+        - código -> média de todas as lojas
+        """
+        self._indice_loja = pd.Series(dtype=float, index=pd.MultiIndex.from_arrays([[], []]))
+        self._indice_produto = pd.Series(dtype=float)
+        
+        df = self._df
+        if df is None or len(df) == 0:
+            return
+        
+        try:
+            codigos = self._chaves_codigo(df['Código'])
+            lojas = self._chaves_loja(df['Loja'])
+            qtd = df['Qtd']
+            
+            # Índice por produto e loja (primeira ocorrência, como no filtro original)
+            df_indice = pd.DataFrame({'codigo': codigos, 'loja': lojas, 'qtd': qtd.values})
+            df_indice = df_indice[df_indice['codigo'] != SEM_CODIGO]
+            df_indice = df_indice.drop_duplicates(['codigo', 'loja'], keep='first')
+            self._indice_loja = pd.Series(
+                [self._float_seguro(v) for v in df_indice['qtd']],
+                index=pd.MultiIndex.from_arrays([df_indice['codigo'], df_indice['loja']]),
+                dtype=float
+            )
+            
+            # Agregado por produto (média entre as lojas)
+            qtd_num = pd.to_numeric(qtd, errors='coerce')
+            self._indice_produto = qtd_num.groupby(codigos).mean().astype(float)
+            self._indice_produto = self._indice_produto.drop(SEM_CODIGO, errors='ignore')
+            
+            debug(f"📊 Índices de média: {len(self._indice_loja)} produto/loja, "
+                  f"{len(self._indice_produto)} produtos")
+        except Exception as e:
+            error(f"❌ Erro ao montar índices da média de vendas: {e}")
+    
+    def get_df(self):
+        """Retorna o DataFrame com as médias de vendas (não deve ser alterado)"""
+        # Só lê a planilha de novo se ela mudou
+        self.atualizar()
         
         # Garantir que nunca retorna None
         if self._df is None:
@@ -62,6 +305,15 @@ class MediaVendas:
         
         return self._df
     
+    def _atualizar_se_preciso(self):
+        """
+        Confere a planilha nas buscas individuais no máximo uma vez a cada
+        INTERVALO_VERIFICACAO segundos, em vez de um os.stat por produto.
+        """
+        if self._verificado_em is None or \
+                time.monotonic() - self._verificado_em >= INTERVALO_VERIFICACAO:
+            self.get_df()
+    
     def get_media_por_produto_loja(self, codigo, loja):
         """
         Retorna a média de vendas para um produto específico em uma loja.
@@ -73,27 +325,15 @@ class MediaVendas:
         Returns:
             float: Média de vendas ou 0 se não encontrado
         """
-        df = self.get_df()
-        
-        if df is None or len(df) == 0:
-            debug(f"📊 DataFrame vazio, retornando 0 para {codigo} - {loja}")
-            return 0
+        self._atualizar_se_preciso()
         
         try:
-            # Converter para string para comparação segura
-            codigo_str = str(codigo).strip()
-            loja_str = str(loja).strip().upper()
+            chave = (normalizar_codigo(codigo), str(loja).strip().upper())
+            valor = self._indice_loja.get(chave)
             
-            # Filtrar por código e loja
-            filtro = df[
-                (df['Código'].astype(str).str.strip() == codigo_str) & 
-                (df['Loja'].astype(str).str.strip().str.upper() == loja_str)
-            ]
-            
-            if len(filtro) > 0:
-                valor = float(filtro.iloc[0]['Qtd'])
+            if valor is not None:
                 debug(f"📊 Média encontrada: {codigo} - {loja} = {valor}")
-                return valor
+                return float(valor)
             else:
                 debug(f"📊 Média NÃO encontrada: {codigo} - {loja}")
                 return 0
@@ -112,21 +352,14 @@ class MediaVendas:
         Returns:
             float: Média de vendas ou 0 se não encontrado
         """
-        df = self.get_df()
-        
-        if df is None or len(df) == 0:
-            debug(f"📊 DataFrame vazio, retornando 0 para {codigo}")
-            return 0
+        self._atualizar_se_preciso()
         
         try:
-            codigo_str = str(codigo).strip()
+            valor = self._indice_produto.get(normalizar_codigo(codigo))
             
-            filtro = df[df['Código'].astype(str).str.strip() == codigo_str]
-            
-            if len(filtro) > 0:
-                valor = float(filtro['Qtd'].mean())
-                debug(f"📊 Média global para {codigo}: {valor} (baseado em {len(filtro)} lojas)")
-                return valor
+            if valor is not None:
+                debug(f"📊 Média global para {codigo}: {valor}")
+                return float(valor)
             else:
                 debug(f"📊 Média global NÃO encontrada para {codigo}")
                 return 0
@@ -135,6 +368,46 @@ class MediaVendas:
             error(f"❌ Erro ao buscar média global para {codigo}: {e}")
             return 0
     
+    def get_medias(self, codigos, lojas, usar_media_produto=True):
+        """
+        Busca as médias de vários produtos/lojas de uma vez.
+        
+        Args:
+            codigos: Sequência de códigos de produto
+            lojas: Sequência de lojas (mesmo tamanho de codigos)
+            usar_media_produto: Quando não houver média (ou for 0) para a loja,
+                usa a média do produto em todas as lojas
+            
+        Returns:
+            np.ndarray: Médias (float), 0 quando não encontrado
+        """
+        self.get_df()
+        
+        chaves_codigo = self._chaves_codigo(codigos)
+        chaves_loja = self._chaves_loja(lojas)
+        
+        medias = np.zeros(len(chaves_codigo), dtype=float)
+        if len(medias) == 0:
+            return medias
+        
+        if len(self._indice_loja) > 0:
+            posicoes = self._indice_loja.index.get_indexer(
+                pd.MultiIndex.from_arrays([chaves_codigo, chaves_loja])
+            )
+            encontrados = posicoes >= 0
+            medias[encontrados] = self._indice_loja.values[posicoes[encontrados]]
+        
+        if usar_media_produto and len(self._indice_produto) > 0:
+            sem_media = medias == 0
+            if sem_media.any():
+                posicoes = self._indice_produto.index.get_indexer(chaves_codigo[sem_media])
+                valores = np.zeros(len(posicoes), dtype=float)
+                encontrados = posicoes >= 0
+                valores[encontrados] = self._indice_produto.values[posicoes[encontrados]]
+                medias[sem_media] = valores
+        
+        return medias
+    
     def get_estatisticas(self):
         """
         Retorna estatísticas sobre os dados de média de vendas.
@@ -176,10 +449,21 @@ class MediaVendas:
                 'media_global': 0
             }
 
-# Singleton para uso em todo o sistema
-media_vendas = MediaVendas()
-
 # Função de conveniência para acesso rápido
 def get_media_vendas():
-    """Retorna a instância singleton de MediaVendas"""
-    return media_vendas
\ No newline at end of file
+    """Retorna a instância singleton de MediaVendas (carrega a planilha no primeiro uso)"""
+    return MediaVendas()
+
+
+def carregar_em_segundo_plano():
+    """
+    Carrega a média (ou verifica se a planilha mudou) numa thread, para
+    que ela já esteja pronta quando o usuário gerar um relatório.
+    
+    Returns:
+        threading.Thread: Thread iniciada
+    """
+    thread = threading.Thread(target=lambda: get_media_vendas().atualizar(),
+                              name="media_vendas", daemon=True)
+    thread.start()
+    return thread
\ No newline at end of file
@@ -0,0 +1,117 @@
+# src/core/carregador_paralelo.py
+"""
+Carregamento de vários arquivos em paralelo, um processo por arquivo.
+Leitura do Excel, identificação e processamento são limitados pelo GIL,
+então threads não ajudam: cada arquivo roda num processo separado e o
+DataFrame processado volta para a interface via pickle. Com vários
+arquivos o tempo total fica próximo ao do arquivo mais lento.
+"""
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from src.utils.cancelamento import OperacaoCancelada
+from src.utils.logger import info, warning
+
+# Intervalo (s) entre verificações do token de cancelamento enquanto os processos trabalham
+INTERVALO_CANCELAMENTO = 0.2
+
+
+def _carregar_no_processo(caminho, usar_cache):
+    """
+    Executado no processo filho: identifica e processa um arquivo.
+
+    Returns:
+        tuple: (nome_do_modelo, DataFrame, tempos) ou (None, None, tempos)
+    """
+    from src.core.identificador import IdentificadorModelos
+
+    identificador = IdentificadorModelos()
+    modelo, df = identificador.carregar_processado(caminho, usar_cache=usar_cache)
+    return (modelo.nome if modelo else None), df, identificador.get_tempos()
+
+
+def carregar_arquivos(identificador, caminhos, progresso=None, usar_cache=True, max_processos=None,
+                      token=None):
+    """
+    Identifica e processa os arquivos em paralelo.
+
+    Com um único arquivo (ou uma única CPU) tudo roda no próprio processo,
+    sem o custo de iniciar outros interpretadores. Os modelos devolvidos
+    são as instâncias do identificador informado, como em carregar_processado.
+
+    Args:
+        identificador: IdentificadorModelos da tela
+        caminhos: Lista de caminhos dos arquivos
+        progresso: Função opcional chamada com (concluidos, total, caminho)
+            a cada arquivo terminado; pode interromper a carga levantando
+            OperacaoCancelada (os arquivos que ainda não começaram são descartados)
+        usar_cache: Se False, ignora o cache de arquivos processados
+        max_processos: Limite de processos (padrão: nº de arquivos/CPUs)
+        token: TokenCancelamento opcional, conferido entre arquivos e, com
+            vários processos, a cada INTERVALO_CANCELAMENTO segundos
+
+    Returns:
+        dict: caminho -> (modelo, DataFrame), ou (None, None) se o arquivo
+            não foi identificado ou deu erro
+    """
+    total = len(caminhos)
+    resultados = {}
+    inicio = time.perf_counter()
+    processos = max_processos or min(total, os.cpu_count() or 1)
+
+    if total <= 1 or processos <= 1:
+        for caminho in caminhos:
+            if token:
+                token.verificar()
+            try:
+                resultados[caminho] = identificador.carregar_processado(caminho, usar_cache=usar_cache)
+            except Exception as e:
+                warning(f"⚠️ Erro ao carregar {caminho}: {e}")
+                resultados[caminho] = (None, None)
+            if progresso:
+                progresso(len(resultados), total, caminho)
+        return resultados
+
+    # spawn em todas as plataformas: fork com threads da interface ativas não é seguro
+    contexto = multiprocessing.get_context('spawn')
+
+    executor = ProcessPoolExecutor(max_workers=processos, mp_context=contexto)
+    cancelado = False
+    try:
+        futuros = {executor.submit(_carregar_no_processo, caminho, usar_cache): caminho
+                   for caminho in caminhos}
+
+        pendentes = set(futuros)
+        while pendentes:
+            prontos, pendentes = wait(pendentes, timeout=INTERVALO_CANCELAMENTO,
+                                      return_when=FIRST_COMPLETED)
+            if token:
+                token.verificar()
+
+            for futuro in prontos:
+                caminho = futuros[futuro]
+                try:
+                    nome_modelo, df, tempos = futuro.result()
+                    modelo = identificador.get_modelo_por_nome(nome_modelo) if nome_modelo else None
+                    if modelo is not None:
+                        modelo.df_processado = df
+                    resultados[caminho] = (modelo, df) if modelo is not None else (None, None)
+                    info(f"📄 {os.path.basename(caminho)}: {nome_modelo} "
+                         f"(carga {tempos.get('carga_ms', 0):.0f} ms, "
+                         f"processamento {tempos.get('processamento_ms', 0):.0f} ms)")
+                except Exception as e:
+                    warning(f"⚠️ Erro ao carregar {caminho}: {e}")
+                    resultados[caminho] = (None, None)
+
+                if progresso:
+                    progresso(len(resultados), total, caminho)
+    except OperacaoCancelada:
+        # Não espera os arquivos em andamento: os processos terminam sozinhos
+        cancelado = True
+        raise
+    finally:
+        executor.shutdown(wait=not cancelado, cancel_futures=cancelado)
+
+    info(f"⚡ {total} arquivos carregados em {time.perf_counter() - inicio:.1f} s ({processos} processos)")
+    return resultados
@@ -2,7 +2,9 @@
 """
 Módulo responsável por identificar qual modelo de planilha deve ser usado.
 """
-import pandas as pd
+import time
+from src.utils.leitor_excel import abrir_excel
+from src.utils.cache_arquivos import cache_arquivos
 from src.models.modelo_curva_abc import ModeloCurvaABC
 from src.models.modelo_entradas import ModeloEntradas
 from src.models.modelo_estoque import ModeloEstoque
@@ -16,44 +18,120 @@ class IdentificadorModelos:
             ModeloEntradas(),
             ModeloEstoque(),
         ]
+        self.tempos = {'identificacao_ms': 0.0, 'carga_ms': 0.0}
     
     def identificar(self, caminho_arquivo):
         """
         Identifica qual modelo de planilha deve ser usado.
         
+        O arquivo é aberto uma única vez: as primeiras linhas são lidas do
+        mesmo handle para identificação e, se algum modelo reconhecer a
+        planilha, o restante é carregado sem reabrir o arquivo.
+        Os tempos gastos ficam em self.tempos (ver get_tempos).
+        
         Args:
             caminho_arquivo: Caminho completo para o arquivo Excel
             
         Returns:
             tuple: (modelo, dataframe_completo) ou (None, None) se não identificado
         """
+        self.tempos = {'identificacao_ms': 0.0, 'carga_ms': 0.0}
+        
         try:
             print(f"\n🔍 Identificando arquivo: {caminho_arquivo}")
             
-            # Ler apenas as primeiras 20 linhas para identificação
-            df_amostra = pd.read_excel(caminho_arquivo, nrows=20)
-            
-            print(f"📊 Amostra: {df_amostra.shape[0]} linhas x {df_amostra.shape[1]} colunas")
-            
-            # Testar cada modelo
-            for modelo in self.modelos:
-                try:
-                    if modelo.identificar(df_amostra):
-                        print(f"✅ Modelo identificado: {modelo.nome}")
-                        # Ler o arquivo completo
-                        df_completo = pd.read_excel(caminho_arquivo)
-                        return modelo, df_completo
-                except Exception as e:
-                    print(f"⚠️ Erro ao testar {modelo.nome}: {e}")
-                    continue
+            inicio = time.perf_counter()
+            with abrir_excel(caminho_arquivo) as arquivo:
+                # Ler apenas as primeiras 20 linhas para identificação
+                df_amostra = arquivo.parse(nrows=20)
+                
+                print(f"📊 Amostra: {df_amostra.shape[0]} linhas x {df_amostra.shape[1]} colunas")
+                
+                modelo_encontrado = None
+                for modelo in self.modelos:
+                    try:
+                        if modelo.identificar(df_amostra):
+                            modelo_encontrado = modelo
+                            break
+                    except Exception as e:
+                        print(f"⚠️ Erro ao testar {modelo.nome}: {e}")
+                        continue
+                
+                self.tempos['identificacao_ms'] = (time.perf_counter() - inicio) * 1000
+                
+                if modelo_encontrado is None:
+                    print("❌ Nenhum modelo identificado para este arquivo")
+                    return None, None
+                
+                print(f"✅ Modelo identificado: {modelo_encontrado.nome}")
+                
+                # Ler o arquivo completo pelo mesmo handle
+                inicio_carga = time.perf_counter()
+                df_completo = arquivo.parse()
+                self.tempos['carga_ms'] = (time.perf_counter() - inicio_carga) * 1000
             
-            print("❌ Nenhum modelo identificado para este arquivo")
-            return None, None
+            print(f"⏱️ Identificação: {self.tempos['identificacao_ms']:.0f} ms | "
+                  f"Carga: {self.tempos['carga_ms']:.0f} ms")
+            return modelo_encontrado, df_completo
             
         except Exception as e:
             print(f"❌ Erro ao identificar arquivo: {e}")
             return None, None
     
+    def get_tempos(self):
+        """
+        Retorna os tempos da última chamada a identificar() ou carregar_processado().
+        
+        Returns:
+            dict: {'identificacao_ms': float, 'carga_ms': float} e, depois de
+                carregar_processado, também 'processamento_ms', 'cache_ms' e 'cache'
+        """
+        return dict(self.tempos)
+    
+    def carregar_processado(self, caminho_arquivo, usar_cache=True, progresso=None):
+        """
+        Identifica e processa o arquivo, usando o cache quando possível.
+        
+        Se o arquivo já foi processado antes (mesmo conteúdo, mesmo modelo
+        e mesma versão do parser), o DataFrame vem do cache sem ler o Excel.
+        
+        Os tempos (identificação, carga, processamento e se veio do cache)
+        ficam em self.tempos.
+        
+        Args:
+            caminho_arquivo: Caminho completo para o arquivo Excel
+            usar_cache: Se False, ignora o cache e reprocessa o arquivo
+            progresso: Função opcional chamada com (etapas_concluidas, 2, descricao)
+                depois da leitura e depois do processamento
+            
+        Returns:
+            tuple: (modelo, dataframe_processado) ou (None, None) se não identificado
+        """
+        if usar_cache:
+            inicio = time.perf_counter()
+            for modelo in self.modelos:
+                df_cache = cache_arquivos.obter(caminho_arquivo, modelo)
+                if df_cache is not None:
+                    modelo.df_processado = df_cache
+                    self.tempos = {'identificacao_ms': 0.0, 'carga_ms': 0.0, 'processamento_ms': 0.0,
+                                   'cache_ms': (time.perf_counter() - inicio) * 1000, 'cache': True}
+                    return modelo, df_cache
+        
+        modelo, df = self.identificar(caminho_arquivo)
+        self.tempos.update({'processamento_ms': 0.0, 'cache_ms': 0.0, 'cache': False})
+        if modelo is None:
+            return None, None
+        if progresso:
+            progresso(1, 2, f"{modelo.nome}: {len(df)} linhas lidas")
+        
+        inicio = time.perf_counter()
+        df_processado = modelo.processar(df)
+        self.tempos['processamento_ms'] = (time.perf_counter() - inicio) * 1000
+        if progresso:
+            progresso(2, 2, f"{modelo.nome}: {len(df_processado)} linhas processadas")
+        cache_arquivos.salvar(caminho_arquivo, modelo, df_processado)
+        return modelo, df_processado
+    
     def identificar_com_df(self, df):
         """
         Identifica o modelo a partir de um DataFrame já carregado.
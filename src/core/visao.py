@@ -0,0 +1,127 @@
+# src/core/visao.py
+"""
+Camada entre os modelos e os widgets: guarda o que cada tela exibe (dados
+filtrados, texto do resumo, texto do preview) pela chave
+(versão dos dados, estado do filtro, linhas do preview).
+Recriar a tela, trocar tema ou fonte e reaplicar o mesmo filtro devolvem o
+que já foi calculado; só uma mudança nos dados (outro DataFrame ou um
+DataFrame marcado como alterado) ou no filtro recalcula.
+"""
+import itertools
+import threading
+import weakref
+from collections import OrderedDict
+
+from src.utils.resumo import invalidar
+
+# Quantos resultados cada tela mantém em cache
+LIMITE_CACHE = 8
+
+_versoes = {}
+_contador = itertools.count(1)
+_lock = threading.Lock()
+
+
+def _esquecer(ref, chave):
+    """Remove a versão de um DataFrame que foi coletado"""
+    with _lock:
+        if _versoes.get(chave, (None,))[0] is ref:
+            del _versoes[chave]
+
+
+def versao(df):
+    """
+    Versão dos dados: muda quando é outro DataFrame ou quando ele foi
+    marcado como alterado (marcar_alterado).
+
+    Returns:
+        int: Número da versão (nunca reaproveitado), 0 para None
+    """
+    if df is None:
+        return 0
+    with _lock:
+        entrada = _versoes.get(id(df))
+        if entrada is None or entrada[0]() is not df:
+            ref = weakref.ref(df, lambda r, chave=id(df): _esquecer(r, chave))
+            entrada = (ref, next(_contador))
+            _versoes[id(df)] = entrada
+        return entrada[1]
+
+
+def marcar_alterado(df):
+    """Informa que o DataFrame foi alterado no lugar (nova versão, resumos descartados)"""
+    with _lock:
+        ref = weakref.ref(df, lambda r, chave=id(df): _esquecer(r, chave))
+        _versoes[id(df)] = (ref, next(_contador))
+    invalidar(df)
+
+
+def chave_filtro(filtro):
+    """Forma imutável do estado do filtro (lista de valores ou dict coluna -> valores)"""
+    if not filtro:
+        return None
+    if isinstance(filtro, dict):
+        return frozenset((coluna, frozenset(map(str, valores)))
+                         for coluna, valores in filtro.items() if valores) or None
+    return frozenset(map(str, filtro))
+
+
+class VisaoRelatorio:
+    """Resultados memorizados de uma tela"""
+
+    def __init__(self, aplicar_filtro=None, limite=LIMITE_CACHE):
+        """
+        Args:
+            aplicar_filtro: Função (df, filtro) -> DataFrame filtrado
+            limite: Quantos resultados manter em cache
+        """
+        self.aplicar_filtro = aplicar_filtro
+        self.limite = limite
+        self._cache = OrderedDict()
+
+    def _memo(self, chave, calcular):
+        """Devolve o valor guardado para a chave ou calcula e guarda"""
+        if chave in self._cache:
+            self._cache.move_to_end(chave)
+            return self._cache[chave]
+
+        valor = calcular()
+        self._cache[chave] = valor
+        while len(self._cache) > self.limite:
+            self._cache.popitem(last=False)
+        return valor
+
+    def dados(self, df, filtro=None):
+        """DataFrame exibido: o próprio df sem filtro, ou o resultado do filtro"""
+        chave_f = chave_filtro(filtro)
+        if df is None or chave_f is None or self.aplicar_filtro is None:
+            return df
+        return self._memo(('dados', versao(df), chave_f), lambda: self.aplicar_filtro(df, filtro))
+
+    def calcular(self, tipo, df, filtro=None, gerar=None, extra=None):
+        """
+        Valor derivado dos dados exibidos, calculado uma vez por
+        (tipo, versão, filtro, extra).
+
+        Args:
+            tipo: Nome do valor (ex: 'resumo', 'preview')
+            df: DataFrame sem filtro
+            filtro: Estado do filtro
+            gerar: Função que recebe o DataFrame exibido
+            extra: Parte adicional da chave (ex: nº de linhas)
+        """
+        chave = (tipo, versao(df), chave_filtro(filtro), extra)
+        return self._memo(chave, lambda: gerar(self.dados(df, filtro)))
+
+    def resumo(self, modelo, df, filtro=None):
+        """Texto de modelo.get_resumo para os dados exibidos"""
+        return self.calcular(('resumo', modelo.nome), df, filtro, modelo.get_resumo)
+
+    def preview(self, modelo, df, filtro=None, linhas=20):
+        """Texto de modelo.get_preview para os dados exibidos"""
+        return self.calcular(('preview', modelo.nome), df, filtro,
+                             lambda dados: modelo.get_preview(dados, linhas), extra=linhas)
+
+    def limpar(self):
+        """Descarta tudo o que está em cache"""
+        self._cache.clear()
@@ -1,10 +1,18 @@
 # src/models/base.py
 from abc import ABC, abstractmethod
+from src.utils.compactacao import compactar_tipos, memoria_mb
 
 class ModeloBase(ABC):
+    # Pré-visualização em tabela (BlocoPreview.mostrar_tabela)
+    colunas_preview = None   # None = todas as colunas
+    formatos_preview = {}    # coluna -> tipo de formatar_br
+    titulos_preview = {}     # coluna -> texto do cabeçalho
+    
     def __init__(self):
         self.nome = "Base"
         self.df_processado = None
+        # Incrementar quando a saída de processar() mudar (invalida o cache)
+        self.versao_parser = 2
     
     @abstractmethod
     def identificar(self, df):
@@ -14,8 +22,23 @@ class ModeloBase(ABC):
     def processar(self, df):
         pass
     
+    def compactar(self, df):
+        """Compacta os tipos do DataFrame processado (fim de processar)"""
+        antes = memoria_mb(df)
+        df = compactar_tipos(df)
+        print(f"🗜️ {self.nome}: memória {antes:.1f} MB -> {memoria_mb(df):.1f} MB")
+        return df
+    
     def get_resumo(self, df):
         return "Resumo não implementado"
     
     def get_preview(self, df, linhas=20):
-        return "Preview não implementado"
\ No newline at end of file
+        return "Preview não implementado"
+    
+    def get_opcoes_preview(self):
+        """Colunas, formatos e cabeçalhos da pré-visualização em tabela"""
+        return {
+            'colunas': self.colunas_preview,
+            'formatos': self.formatos_preview,
+            'titulos': self.titulos_preview,
+        }
\ No newline at end of file
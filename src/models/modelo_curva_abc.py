@@ -4,14 +4,22 @@ Modelo para processar relatórios de Curva ABC por Loja.
 """
 import pandas as pd
 from src.models.base import ModeloBase
+from src.models.parser_secoes import mascara_secao, mascara_produtos, propagar_secao
+from src.utils.codigos import normalizar_codigos
+from src.utils.helpers import formatar_br, formatar_br_serie
+from src.utils.resumo import resumir
 
 class ModeloCurvaABC(ModeloBase):
     """Modelo específico para Curva ABC por Loja"""
     
+    colunas_preview = ['Código', 'Produto', 'Qtd', 'Total R$', 'Loja_Nome']
+    formatos_preview = {'Código': 'inteiro', 'Qtd': 'decimal_3', 'Total R$': 'moeda'}
+    
     def __init__(self):
         super().__init__()
         self.nome = "Curva ABC por Loja"
         self.descricao = "Processa relatórios de vendas com cabeçalho na linha 4"
+        self.versao_parser = 3
     
     def identificar(self, df):
         """
@@ -30,20 +38,6 @@ class ModeloCurvaABC(ModeloBase):
         except:
             return False
     
-    def _is_valid_product(self, x):
-        """Verifica se uma linha corresponde a um produto válido"""
-        try:
-            val = str(x).strip()
-            if val == '' or val == 'nan' or pd.isna(x) or val == 'None':
-                return False
-            if not val[0].isdigit():
-                return False
-            val_num = val.replace(',', '.')
-            float(val_num)
-            return True
-        except:
-            return False
-    
     def processar(self, df):
         """
         Processa o relatório de Curva ABC por Loja.
@@ -55,42 +49,34 @@ class ModeloCurvaABC(ModeloBase):
             df_dados.columns = df_dados.iloc[0]
             df_dados = df_dados.iloc[1:].reset_index(drop=True)
             
-            # PASSO 2: Criar colunas para loja
-            df_dados['Loja_Codigo'] = ''
-            df_dados['Loja_Nome'] = ''
-            
-            # PASSO 3: Preencher loja para cada produto
-            loja_atual_codigo = ''
-            loja_atual_nome = ''
-            
-            for i in range(len(df_dados)):
-                valor_codigo = str(df_dados.iloc[i, 0])
-                
-                if 'Loja:' in valor_codigo:
-                    codigo_loja = df_dados.iloc[i, 1]
-                    nome_loja = df_dados.iloc[i, 2]
-                    
-                    loja_atual_codigo = str(codigo_loja) if pd.notna(codigo_loja) else ''
-                    loja_atual_nome = str(nome_loja) if pd.notna(nome_loja) else ''
-                else:
-                    df_dados.loc[i, 'Loja_Codigo'] = loja_atual_codigo
-                    df_dados.loc[i, 'Loja_Nome'] = loja_atual_nome
-            
+            # PASSO 2: Marcar as linhas de cabeçalho de loja ("Loja:")
+            primeira_coluna = df_dados.iloc[:, 0]
+            mask_loja = mascara_secao(primeira_coluna, 'Loja:')
+
+            # PASSO 3: Propagar código e nome da loja para os produtos (forward-fill)
+            df_dados['Loja_Codigo'] = propagar_secao(df_dados.iloc[:, 1], mask_loja)
+            df_dados['Loja_Nome'] = propagar_secao(df_dados.iloc[:, 2], mask_loja)
+
             # PASSO 4: Remover linhas que são loja
-            df_limpo = df_dados[~df_dados.iloc[:, 0].astype(str).str.contains('Loja:', na=False)].copy()
-            
+            df_limpo = df_dados[~mask_loja]
+
             # PASSO 5: Remover linhas onde a primeira coluna não é número
-            mask_produto = df_limpo.iloc[:, 0].apply(self._is_valid_product)
+            mask_produto = mascara_produtos(df_limpo.iloc[:, 0], exigir_numerico=True)
             df_limpo = df_limpo[mask_produto].copy()
             df_limpo = df_limpo.reset_index(drop=True)
             
-            # PASSO 6: Converter colunas para número
-            colunas_para_converter = ['Código', 'Qtd', 'Total R$', 'Loja_Codigo']
+            # PASSO 6: Converter colunas para número (código como chave inteira)
+            if 'Código' in df_limpo.columns:
+                df_limpo['Código'] = normalizar_codigos(df_limpo['Código'])
+            
+            colunas_para_converter = ['Qtd', 'Total R$', 'Loja_Codigo']
             for coluna in colunas_para_converter:
                 if coluna in df_limpo.columns:
                     df_limpo[coluna] = df_limpo[coluna].astype(str).str.replace(',', '.')
                     df_limpo[coluna] = pd.to_numeric(df_limpo[coluna], errors='coerce')
             
+            df_limpo = self.compactar(df_limpo)
+            
             self.df_original = df
             self.df_processado = df_limpo
             return df_limpo
@@ -98,27 +84,6 @@ class ModeloCurvaABC(ModeloBase):
         except Exception as e:
             raise Exception(f"Erro no processamento: {str(e)}")
     
-    def _formatar_br(self, valor, tipo='moeda'):
-        """Formata números no padrão brasileiro"""
-        if pd.isna(valor) or valor == '':
-            return ''
-        
-        try:
-            valor_float = float(valor)
-            
-            if tipo == 'moeda':
-                return f"R$ {valor_float:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-            elif tipo == 'inteiro':
-                return f"{int(valor_float)}"
-            elif tipo == 'decimal_3':
-                return f"{valor_float:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-            elif tipo == 'decimal_2':
-                return f"{valor_float:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-            else:
-                return str(valor_float).replace('.', ',')
-        except:
-            return str(valor)
-    
     def get_resumo(self, df_processado):
         """Gera resumo formatado em colunas"""
         if df_processado is None:
@@ -126,16 +91,20 @@ class ModeloCurvaABC(ModeloBase):
         
         resumo_lines = []
         
+        # Uma agregação só (em cache para este DataFrame) alimenta todas as seções
+        resumo = resumir(df_processado, grupos=('Loja_Nome',), somas=('Qtd', 'Total R$'),
+                         unicos=('Código', 'Loja_Nome'))
+        
         # Totais gerais
-        num_produtos = df_processado['Código'].nunique()
-        num_lojas = df_processado['Loja_Nome'].nunique()
-        qtd_total = df_processado['Qtd'].sum()
-        fat_total = df_processado['Total R$'].sum()
-        
-        resumo_lines.append(f"📦 Total de produtos únicos: {self._formatar_br(num_produtos, 'inteiro')}")
-        resumo_lines.append(f"🏪 Total de lojas: {self._formatar_br(num_lojas, 'inteiro')}")
-        resumo_lines.append(f"📊 Quantidade total: {self._formatar_br(qtd_total, 'decimal_3')}")
-        resumo_lines.append(f"💰 Faturamento total: {self._formatar_br(fat_total, 'moeda')}")
+        num_produtos = resumo.unicos['Código']
+        num_lojas = resumo.unicos['Loja_Nome']
+        qtd_total = resumo.somas['Qtd']
+        fat_total = resumo.somas['Total R$']
+        
+        resumo_lines.append(f"📦 Total de produtos únicos: {formatar_br(num_produtos, 'inteiro')}")
+        resumo_lines.append(f"🏪 Total de lojas: {formatar_br(num_lojas, 'inteiro')}")
+        resumo_lines.append(f"📊 Quantidade total: {formatar_br(qtd_total, 'decimal_3')}")
+        resumo_lines.append(f"💰 Faturamento total: {formatar_br(fat_total, 'moeda')}")
         resumo_lines.append("")
         resumo_lines.append("=" * 95)
         resumo_lines.append("")
@@ -149,17 +118,14 @@ class ModeloCurvaABC(ModeloBase):
         resumo_lines.append(cabecalho)
         resumo_lines.append("-" * 85)
         
-        # Agrupa por loja
-        lojas = df_processado.groupby('Loja_Nome').agg({
-            'Qtd': 'sum',
-            'Total R$': 'sum'
-        }).sort_values('Total R$', ascending=False)
+        # Por loja, do maior faturamento para o menor
+        lojas = resumo.por('Loja_Nome', ordenar='Total R$')
         
         for loja, row in lojas.iterrows():
             if pd.notna(loja) and loja != '':
                 loja_nome = str(loja).strip()
                 # Formata a linha com as colunas
-                linha = f"{loja_nome:<35} {self._formatar_br(row['Qtd'], 'decimal_3'):>20} {self._formatar_br(row['Total R$'], 'moeda'):>25}"
+                linha = f"{loja_nome:<35} {formatar_br(row['Qtd'], 'decimal_3'):>20} {formatar_br(row['Total R$'], 'moeda'):>25}"
                 resumo_lines.append(linha)
         
         return "\n".join(resumo_lines)
@@ -195,19 +161,17 @@ class ModeloCurvaABC(ModeloBase):
         preview_lines.append(cabecalho)
         preview_lines.append("-" * len(cabecalho))
         
+        # Colunas numéricas formatadas de uma vez
+        for col, tipo in self.formatos_preview.items():
+            df_preview[col] = formatar_br_serie(df_preview[col], tipo)
+        
         # Linhas de dados
         for _, row in df_preview.iterrows():
             linha = ""
             for col in cols_preview:
-                valor = row[col]
-                if col == 'Código':
-                    texto = self._formatar_br(valor, 'inteiro')
-                elif col == 'Qtd':
-                    texto = self._formatar_br(valor, 'decimal_3')
-                elif col == 'Total R$':
-                    texto = self._formatar_br(valor, 'moeda')
-                else:
-                    texto = str(valor)[:larguras[col]-2] + '..' if len(str(valor)) > larguras[col]-2 else str(valor)
+                texto = str(row[col])
+                if col not in self.formatos_preview and len(texto) > larguras[col]-2:
+                    texto = texto[:larguras[col]-2] + '..'
                 
                 # Centraliza o texto na largura da coluna
                 linha += f"{texto:^{larguras[col]}} "
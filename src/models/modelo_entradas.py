@@ -5,9 +5,17 @@ VERSÃO FINAL - COM PREVIEW PERFEITAMENTE ALINHADO
 """
 import pandas as pd
 from src.models.base import ModeloBase
+from src.models.parser_secoes import mascara_secao, mascara_produtos, propagar_secao, extrair_bloco
 from src.config.compradores import get_comprador
+from src.utils.codigos import normalizar_codigos
+from src.utils.helpers import formatar_br, formatar_br_serie
+from src.utils.resumo import resumir
 
 class ModeloEntradas(ModeloBase):
+    colunas_preview = ['Codigo', 'Produto', 'Qtd', 'Total', 'Ult.Ent.', 'Grupo', 'Comprador']
+    formatos_preview = {'Qtd': 'decimal_2', 'Total': 'decimal_2'}
+    titulos_preview = {'Codigo': 'Código', 'Ult.Ent.': 'Últ.Ent.'}
+    
     def __init__(self):
         super().__init__()
         self.nome = "Entradas por Grupo"
@@ -19,29 +27,6 @@ class ModeloEntradas(ModeloBase):
         except:
             return False
     
-    def _is_numero(self, valor):
-        """Verifica se o valor parece um número (código de produto)"""
-        try:
-            if pd.isna(valor):
-                return False
-            val = str(valor).strip()
-            if not val or val in ['nan', 'None', '']:
-                return False
-            return val[0].isdigit()
-        except:
-            return False
-    
-    def _formatar_br(self, valor):
-        """Formata número no padrão brasileiro"""
-        try:
-            if pd.isna(valor) or valor == '':
-                return "0,00"
-            if isinstance(valor, str):
-                valor = valor.replace('.', '').replace(',', '.')
-            return f"{float(valor):,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-        except:
-            return str(valor)
-    
     def processar(self, df):
         """
         Processa o relatório de Entradas por Grupo.
@@ -51,60 +36,37 @@ class ModeloEntradas(ModeloBase):
             print("INICIANDO PROCESSAMENTO")
             print("="*60)
             
-            todos_dados = []
+            # CLASSIFICAR AS LINHAS (categoria, produto ou lixo)
+            primeira = df.iloc[:, 0]
+            mask_categoria = mascara_secao(primeira, 'Categoria:')
+            mask_produto = ~mask_categoria & mascara_produtos(primeira)
             
-            # Valores atuais de categoria e grupo
-            cat_codigo = ""
-            cat_nome = ""
-            grupo_codigo = ""
-            grupo_nome = ""
+            print(f"📁 Categorias encontradas: {int(mask_categoria.sum())}")
             
-            # VAI LINHA POR LINHA
-            for i in range(len(df)):
-                # Pega a primeira coluna
-                primeira = df.iloc[i, 0] if pd.notna(df.iloc[i, 0]) else ""
-                primeira_str = str(primeira).strip()
-                
-                # CASO 1: Encontrou CATEGORIA
-                if 'Categoria:' in primeira_str:
-                    # Pega os valores nas posições fixas
-                    if df.shape[1] > 2:
-                        cat_codigo = str(df.iloc[i, 1]).lstrip('0') if pd.notna(df.iloc[i, 1]) else ""
-                        cat_nome = str(df.iloc[i, 2]) if pd.notna(df.iloc[i, 2]) else ""
-                    if df.shape[1] > 5:
-                        grupo_codigo = str(df.iloc[i, 4]).lstrip('0') if pd.notna(df.iloc[i, 4]) else ""
-                        grupo_nome = str(df.iloc[i, 5]) if pd.notna(df.iloc[i, 5]) else ""
-                    
-                    print(f"📁 Linha {i}: Categoria {cat_codigo}-{cat_nome}, Grupo {grupo_codigo}-{grupo_nome}")
-                
-                # CASO 2: Encontrou PRODUTO (começa com número)
-                elif self._is_numero(primeira):
-                    # Coletar TODAS as colunas (12 colunas)
-                    linha_produto = []
-                    
-                    # Colunas 0 a 11
-                    for j in range(12):
-                        if j < df.shape[1]:
-                            val = df.iloc[i, j] if pd.notna(df.iloc[i, j]) else ""
-                            linha_produto.append(str(val).strip())
-                        else:
-                            linha_produto.append("")
-                    
-                    # Adicionar as 5 colunas extras
-                    linha_produto.append(cat_codigo)      # Codigo Categoria
-                    linha_produto.append(cat_nome)        # Categoria
-                    linha_produto.append(grupo_codigo)    # Codigo Grupo
-                    linha_produto.append(grupo_nome)      # Grupo
-                    linha_produto.append('')              # Comprador (será preenchido depois)
-                    
-                    todos_dados.append(linha_produto)
+            # Coletar TODAS as colunas (12 colunas) das linhas de produto
+            df_final = extrair_bloco(df, mask_produto, 12)
             
-            print(f"\n📦 Total de produtos encontrados: {len(todos_dados)}")
+            print(f"\n📦 Total de produtos encontrados: {len(df_final)}")
             
-            if not todos_dados:
+            if len(df_final) == 0:
                 print("❌ Nenhum produto encontrado")
                 return pd.DataFrame()
             
+            # Categoria e grupo vigentes em cada linha (posições fixas do cabeçalho)
+            contexto = {
+                'Codigo Categoria': (1, True, 2),
+                'Categoria': (2, False, 2),
+                'Codigo Grupo': (4, True, 5),
+                'Grupo': (5, False, 5),
+            }
+            for nome_coluna, (posicao, remover_zeros, minimo) in contexto.items():
+                if df.shape[1] > minimo:
+                    valores = propagar_secao(df.iloc[:, posicao], mask_categoria, remover_zeros)
+                    df_final[nome_coluna] = valores[mask_produto].values
+                else:
+                    df_final[nome_coluna] = ''
+            df_final['Comprador'] = ''  # Será preenchido depois
+            
             # NOMES DAS COLUNAS
             colunas_base = [
                 'Codigo', 'Produto', 'Peças', 'Qtd', 'Unid', 
@@ -112,17 +74,16 @@ class ModeloEntradas(ModeloBase):
             ]
             
             # Verificar se a coluna 11 tem dados
-            col11_tem_dados = any(len(row) > 11 and row[11].strip() for row in todos_dados)
+            col11_tem_dados = df_final[11].str.strip().ne('').any()
             
             if col11_tem_dados:
                 colunas = colunas_base + ['Col11'] + ['Codigo Categoria', 'Categoria', 'Codigo Grupo', 'Grupo', 'Comprador']
             else:
-                # Remove a col11 de todas as linhas
-                todos_dados = [row[:11] + row[12:] for row in todos_dados]
+                # Remove a col11
+                df_final = df_final.drop(columns=[11])
                 colunas = colunas_base + ['Codigo Categoria', 'Categoria', 'Codigo Grupo', 'Grupo', 'Comprador']
             
-            # Criar DataFrame
-            df_final = pd.DataFrame(todos_dados, columns=colunas)
+            df_final.columns = colunas
             
             # ===== PREENCHER COMPRADOR BASEADO NO GRUPO =====
             if 'Grupo' in df_final.columns:
@@ -133,7 +94,7 @@ class ModeloEntradas(ModeloBase):
             
             # Converter Código para inteiro
             if 'Codigo' in df_final.columns:
-                df_final['Codigo'] = pd.to_numeric(df_final['Codigo'], errors='coerce').fillna(0).astype(int)
+                df_final['Codigo'] = normalizar_codigos(df_final['Codigo'])
             
             # Converter colunas numéricas
             colunas_numericas = ['Qtd', 'Total', 'Custo Md', 'Pr. Vda', 'Markup', 'Margem', 'Peças']
@@ -144,10 +105,10 @@ class ModeloEntradas(ModeloBase):
             
             # Converter códigos de categoria e grupo para inteiro
             if 'Codigo Categoria' in df_final.columns:
-                df_final['Codigo Categoria'] = pd.to_numeric(df_final['Codigo Categoria'], errors='coerce').fillna(0).astype(int)
+                df_final['Codigo Categoria'] = normalizar_codigos(df_final['Codigo Categoria'])
             
             if 'Codigo Grupo' in df_final.columns:
-                df_final['Codigo Grupo'] = pd.to_numeric(df_final['Codigo Grupo'], errors='coerce').fillna(0).astype(int)
+                df_final['Codigo Grupo'] = normalizar_codigos(df_final['Codigo Grupo'])
             
             # Converter data
             if 'Ult.Ent.' in df_final.columns:
@@ -185,6 +146,7 @@ class ModeloEntradas(ModeloBase):
             print(f"\n✅ PROCESSADO: {len(df_final)} produtos")
             print(f"📊 Colunas: {list(df_final.columns)}")
             
+            df_final = self.compactar(df_final)
             self.df_processado = df_final
             return df_final
             
@@ -199,6 +161,11 @@ class ModeloEntradas(ModeloBase):
         if df is None or len(df) == 0:
             return "Nenhum dado processado"
         
+        # Uma agregação só (em cache para este DataFrame) alimenta todas as seções
+        resumo = resumir(df, grupos=('Categoria', 'Grupo', 'Comprador'), somas=('Qtd', 'Total'),
+                         unicos=('Codigo',))
+        tem_total = 'Total' in df.columns
+        
         linhas = []
         
         # Estatísticas gerais
@@ -207,63 +174,51 @@ class ModeloEntradas(ModeloBase):
         linhas.append(f"📦 Total de produtos: {len(df)}")
         
         if 'Codigo' in df.columns:
-            linhas.append(f"📦 Produtos únicos: {df['Codigo'].nunique()}")
+            linhas.append(f"📦 Produtos únicos: {resumo.unicos['Codigo']}")
         
         if 'Qtd' in df.columns:
-            qtd_total = df['Qtd'].sum()
-            linhas.append(f"📊 Quantidade total: {self._formatar_br(qtd_total)}")
+            linhas.append(f"📊 Quantidade total: {formatar_br(resumo.somas['Qtd'], 'decimal_2', vazio='0,00')}")
         
-        if 'Total' in df.columns:
-            valor_total = df['Total'].sum()
-            linhas.append(f"💰 Valor total: R$ {self._formatar_br(valor_total)}")
+        if tem_total:
+            linhas.append(f"💰 Valor total: R$ {formatar_br(resumo.somas['Total'], 'decimal_2', vazio='0,00')}")
         
         # Por CATEGORIA
         if 'Categoria' in df.columns:
             linhas.append("\n📁 POR CATEGORIA")
             linhas.append("-" * 90)
-            for cat, qtd in df['Categoria'].value_counts().items():
+            for cat, row in resumo.por('Categoria').iterrows():
                 if cat and str(cat).strip():
-                    valor_cat = df[df['Categoria'] == cat]['Total'].sum() if 'Total' in df.columns else 0
-                    linhas.append(f"  {cat:<30} {qtd:>6} produtos  R$ {self._formatar_br(valor_cat):>15}")
+                    valor_cat = row['Total'] if tem_total else 0
+                    linhas.append(f"  {cat:<30} {int(row['linhas']):>6} produtos  R$ {formatar_br(valor_cat, 'decimal_2', vazio='0,00'):>15}")
         
         # Por GRUPO (TODOS)
         if 'Grupo' in df.columns:
             linhas.append("\n📁 POR GRUPO")
             linhas.append("-" * 90)
             
-            # Agrupar por grupo e somar
-            grupos = df.groupby('Grupo').agg({
-                'Codigo': 'count',
-                'Total': 'sum' if 'Total' in df.columns else lambda x: 0
-            }).sort_values('Codigo', ascending=False)
-            
-            for grupo, row in grupos.iterrows():
+            for grupo, row in resumo.por('Grupo').iterrows():
                 if grupo and str(grupo).strip():
-                    linhas.append(f"  {grupo[:35]:<35} {int(row['Codigo']):>6} produtos  R$ {self._formatar_br(row['Total']):>15}")
+                    valor_grupo = row['Total'] if tem_total else 0
+                    linhas.append(f"  {grupo[:35]:<35} {int(row['linhas']):>6} produtos  R$ {formatar_br(valor_grupo, 'decimal_2', vazio='0,00'):>15}")
         
         # Por COMPRADOR
         if 'Comprador' in df.columns:
             linhas.append("\n👤 POR COMPRADOR")
             linhas.append("-" * 90)
             
-            # Agrupar por comprador
-            compradores = df.groupby('Comprador').agg({
-                'Codigo': 'count',
-                'Total': 'sum' if 'Total' in df.columns else lambda x: 0
-            }).sort_values('Codigo', ascending=False)
-            
-            for comp, row in compradores.iterrows():
+            for comp, row in resumo.por('Comprador').iterrows():
                 if comp != 'NÃO MAPEADO':
-                    linhas.append(f"  {comp:<20} {int(row['Codigo']):>6} produtos  R$ {self._formatar_br(row['Total']):>15}")
+                    valor_comp = row['Total'] if tem_total else 0
+                    linhas.append(f"  {comp:<20} {int(row['linhas']):>6} produtos  R$ {formatar_br(valor_comp, 'decimal_2', vazio='0,00'):>15}")
             
             # Mostrar não mapeados se houver
-            nao_mapeados = df[df['Comprador'] == 'NÃO MAPEADO']
-            if len(nao_mapeados) > 0:
-                linhas.append(f"\n⚠️ GRUPOS NÃO MAPEADOS:")
-                for grupo in nao_mapeados['Grupo'].unique():
-                    qtd_grupo = len(nao_mapeados[nao_mapeados['Grupo'] == grupo])
-                    valor_grupo = nao_mapeados[nao_mapeados['Grupo'] == grupo]['Total'].sum() if 'Total' in df.columns else 0
-                    linhas.append(f"  - {grupo}: {qtd_grupo} produtos (R$ {self._formatar_br(valor_grupo)})")
+            if 'Grupo' in df.columns:
+                nao_mapeados = resumo.por('Grupo', onde={'Comprador': 'NÃO MAPEADO'}, ordenar=None)
+                if len(nao_mapeados) > 0:
+                    linhas.append(f"\n⚠️ GRUPOS NÃO MAPEADOS:")
+                    for grupo, row in nao_mapeados.iterrows():
+                        valor_grupo = row['Total'] if tem_total else 0
+                        linhas.append(f"  - {grupo}: {int(row['linhas'])} produtos (R$ {formatar_br(valor_grupo, 'decimal_2', vazio='0,00')})")
         
         return "\n".join(linhas)
     
@@ -304,12 +259,10 @@ class ModeloEntradas(ModeloBase):
         # Criar cópia para preview
         df_preview = df[cols_preview].head(linhas).copy()
         
-        # Formatar números
-        if 'Qtd' in df_preview.columns:
-            df_preview['Qtd'] = df_preview['Qtd'].apply(lambda x: self._formatar_br(x))
-        
-        if 'Total' in df_preview.columns:
-            df_preview['Total'] = df_preview['Total'].apply(lambda x: self._formatar_br(x))
+        # Formatar números (coluna inteira de uma vez)
+        for col in ('Qtd', 'Total'):
+            if col in df_preview.columns:
+                df_preview[col] = formatar_br_serie(df_preview[col], 'decimal_2', vazio='0,00')
         
         # Renomear colunas para exibição
         df_preview = df_preview.rename(columns=col_map)
@@ -4,10 +4,16 @@ Modelo para processar relatórios de Estoque.
 """
 import pandas as pd
 from src.models.base import ModeloBase
+from src.models.parser_secoes import mascara_produtos, extrair_bloco
+from src.utils.codigos import normalizar_codigos
+from src.utils.helpers import formatar_br
+from src.utils.resumo import resumir
 
 class ModeloEstoque(ModeloBase):
     """Modelo específico para relatórios de Estoque"""
     
+    colunas_preview = ['Codigo', 'Descricao', 'Estoque_Loja', 'Estoque_Geral', 'Categoria', 'Grupo', 'Loja']
+    
     def __init__(self):
         super().__init__()
         self.nome = "Estoque"
@@ -62,32 +68,19 @@ class ModeloEstoque(ModeloBase):
             print(f"❌ Erro na identificação: {e}")
             return False
     
-    def _is_numero(self, valor):
-        """Verifica se o valor parece um número (código de produto)"""
-        try:
-            if pd.isna(valor):
-                return False
-            if isinstance(valor, (int, float)):
-                return True
-            val = str(valor).strip()
-            if not val or val in ['nan', 'None', '']:
-                return False
-            return val[0].isdigit()
-        except:
-            return False
-    
-    def _tratar_numero_br(self, valor):
-        """Converte número para float"""
-        try:
-            if pd.isna(valor) or valor == '':
-                return 0.0
-            if isinstance(valor, (int, float)):
-                return float(valor)
-            val = str(valor).strip()
-            val = val.replace('.', '').replace(',', '.')
-            return float(val)
-        except:
-            return 0.0
+    def _tratar_numeros_br(self, serie):
+        """Converte uma coluna para float (texto no padrão brasileiro, vazios viram 0)"""
+        if pd.api.types.is_numeric_dtype(serie):
+            return serie.astype(float).fillna(0.0)
+        
+        eh_numero = serie.map(lambda v: isinstance(v, (int, float))).astype(bool)
+        numeros = pd.to_numeric(serie.where(eh_numero), errors='coerce')
+        
+        texto = serie.where(~eh_numero).astype(str).str.strip()
+        texto = texto.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+        convertidos = pd.to_numeric(texto, errors='coerce')
+        
+        return numeros.where(eh_numero, convertidos).fillna(0.0).astype(float)
     
     def _encontrar_linha_cabecalho(self, df):
         """Encontra a linha onde está o cabeçalho"""
@@ -178,21 +171,11 @@ class ModeloEstoque(ModeloBase):
                     colunas = self._extrair_colunas_do_cabecalho(linha_cab, df)
                     print(f"📋 Colunas extraídas: {colunas}")
                     
-                    # Criar novo DataFrame com os dados
-                    dados = []
-                    for i in range(linha_cab + 1, len(df)):
-                        primeira = df.iloc[i, 0] if pd.notna(df.iloc[i, 0]) else ""
-                        if self._is_numero(primeira):
-                            linha_produto = []
-                            for j in range(len(colunas)):
-                                if j < df.shape[1]:
-                                    val = df.iloc[i, j] if pd.notna(df.iloc[i, j]) else ""
-                                    linha_produto.append(str(val).strip())
-                                else:
-                                    linha_produto.append("")
-                            dados.append(linha_produto)
-                    
-                    df = pd.DataFrame(dados, columns=colunas)
+                    # Criar novo DataFrame com as linhas de produto abaixo do cabeçalho
+                    df_dados = df.iloc[linha_cab + 1:]
+                    mask_produto = mascara_produtos(df_dados.iloc[:, 0], aceitar_numeros=True)
+                    df = extrair_bloco(df_dados, mask_produto, len(colunas))
+                    df.columns = colunas
                     print(f"📦 DataFrame criado com {len(df)} linhas")
                 else:
                     print("❌ Cabeçalho não encontrado")
@@ -211,12 +194,12 @@ class ModeloEstoque(ModeloBase):
             
             # Converter colunas numéricas
             if 'Codigo' in df.columns:
-                df['Codigo'] = pd.to_numeric(df['Codigo'], errors='coerce').fillna(0).astype(int)
+                df['Codigo'] = normalizar_codigos(df['Codigo'])
             
             # Converter estoques
             for col in ['Estoque_Loja', 'Estoque_Geral']:
                 if col in df.columns:
-                    df[col] = df[col].apply(self._tratar_numero_br)
+                    df[col] = self._tratar_numeros_br(df[col])
             
             # Remover códigos 0
             if 'Codigo' in df.columns:
@@ -225,6 +208,7 @@ class ModeloEstoque(ModeloBase):
             print(f"\n✅ ESTOQUE PROCESSADO: {len(df)} produtos")
             print(f"📊 Colunas: {list(df.columns)}")
             
+            df = self.compactar(df)
             self.df_processado = df
             return df
             
@@ -239,27 +223,30 @@ class ModeloEstoque(ModeloBase):
         if df is None or len(df) == 0:
             return "Nenhum dado processado"
         
+        # Uma agregação só (em cache para este DataFrame) alimenta todas as seções
+        resumo = resumir(df, grupos=('Categoria', 'Loja'), somas=('Estoque_Geral',), unicos=('Codigo',))
+        
         linhas = []
         linhas.append("📊 RESUMO DO ESTOQUE")
         linhas.append("-" * 60)
         linhas.append(f"📦 Total de produtos: {len(df)}")
         
         if 'Codigo' in df.columns:
-            linhas.append(f"📦 Produtos únicos: {df['Codigo'].nunique()}")
+            linhas.append(f"📦 Produtos únicos: {resumo.unicos['Codigo']}")
         
         if 'Estoque_Geral' in df.columns:
-            total_estoque = df['Estoque_Geral'].sum()
-            linhas.append(f"📊 Estoque Geral: {total_estoque:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'))
+            total_estoque = resumo.somas['Estoque_Geral']
+            linhas.append(f"📊 Estoque Geral: {formatar_br(total_estoque, 'decimal_2')}")
         
         if 'Categoria' in df.columns:
             linhas.append("\n📁 Por Categoria:")
-            for cat, qtd in df['Categoria'].value_counts().head(10).items():
+            for cat, qtd in resumo.por('Categoria')['linhas'].head(10).items():
                 if cat and str(cat).strip():
                     linhas.append(f"  {cat}: {qtd} produtos")
         
         if 'Loja' in df.columns:
             linhas.append("\n🏪 Por Loja:")
-            for loja, qtd in df['Loja'].value_counts().head(10).items():
+            for loja, qtd in resumo.por('Loja')['linhas'].head(10).items():
                 if loja and str(loja).strip():
                     linhas.append(f"  {loja}: {qtd} produtos")
         
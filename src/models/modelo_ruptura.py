@@ -7,156 +7,212 @@ import pandas as pd
 import numpy as np
 from src.models.base import ModeloBase
 from src.config.compradores import get_comprador
+from src.utils.codigos import normalizar_codigos, SEM_CODIGO
+from src.utils.helpers import formatar_br_serie
+from src.utils.chaves import ChavesLojaProduto
+from src.utils.exportador import exportar_excel
+from src.utils.resumo import resumir
+from src.core.visao import marcar_alterado
 from src.utils.logger import info, error, warning, debug
 
 class ModeloRuptura(ModeloBase):
     nome = "Ruptura"
     descricao = "Relatório completo de ruptura com análise de estoque e vendas"
+    NOME_MATRIZ = "COMCARNE MATRIZ SAO LUIS"
+    formatos_preview = {coluna: 'decimal_2' for coluna in
+                        ['ESTQ LOJA', 'ESTQ MATRIZ', 'VENDAS MÊS ATUAL', 'MÉDIA VENDA MENSAL']}
+    
+    # Nomes aceitos para as colunas do delta de estoque (atualizar_estoque)
+    COLUNAS_DELTA = {
+        'codigo': ['CÓDIGO', 'Código', 'Codigo', 'Codigo_Norm'],
+        'loja': ['LOJA', 'Loja'],
+        'estoque': ['ESTQ LOJA', 'Estoque', 'Estoque_Loja'],
+    }
+    
+    # Etapas de processar, na ordem em que são informadas ao callback de progresso
+    ETAPAS = (
+        'estoque_normalizado', 'curva_normalizada', 'media_normalizada',
+        'estoque_matriz', 'estoque_chaves', 'curva_chaves', 'media_agregada',
+        'join_vendas', 'join_media', 'colunas_derivadas', 'colunas_organizadas',
+    )
 
     def __init__(self):
         super().__init__()
         self.nome = "Ruptura"
         self.descricao = "Relatório completo de ruptura com análise de estoque e vendas"
+        # Estágios intermediários guardados entre execuções (ver _estagio)
+        self._estagios = {}
+        self._chaves = None
+        self.estagios_reutilizados = []
+        # Chaves ordenadas do último resultado (ver _indice_resultado)
+        self._indice = None
+        # Callback de progresso da execução atual de processar
+        self._progresso = None
         info(f"🔧 Modelo {self.nome} inicializado")
     
     def identificar(self, df):
         """Este modelo não é usado para identificar arquivos"""
         return False
 
-    def _normalizar_codigo(self, codigo):
-        """Remove zeros à esquerda e pontos decimais"""
-        try:
-            if pd.isna(codigo):
-                return ""
-            # Converter para string e remover parte decimal se houver
-            codigo_str = str(codigo).split('.')[0].lstrip('0')
-            debug(f"🔢 Código normalizado: {codigo} -> {codigo_str}")
-            return codigo_str
-        except Exception as e:
-            error(f"❌ Erro ao normalizar código {codigo}: {e}")
-            return str(codigo)
-
-    def _calcular_dde(self, row):
-        """Calcula DDE conforme fórmula do Excel"""
-        try:
-            estoque = row.get('Estoque_Loja', 0)
-            media = row.get('Media_Vendas', 0)
-            
-            if pd.isna(estoque) or pd.isna(media):
-                return ""
-            
-            # Converter para float
-            estoque = float(estoque) if estoque else 0
-            media = float(media) if media else 0
-            
-            if estoque == 0 and media == 0:
-                return "Estoque e venda zerados"
-            elif estoque == 0:
-                return "Estoque zerado"
-            elif media == 0:
-                return "Sem venda"
-            else:
-                dias = (estoque / media) * 30
-                if dias >= 30:
-                    meses = int(dias // 30)
-                    return f"{meses} mês(es)"
-                else:
-                    return f"{int(dias)} dia(s)"
-        except Exception as e:
-            error(f"❌ Erro ao calcular DDE: {e}")
-            return ""
-    
-    def _status_estoque(self, row):
-        """Status do estoque combinando loja e matriz"""
-        try:
-            estq_loja = row.get('Estoque_Loja', 0)
-            estq_matriz = row.get('Estoque_Matriz', 0)
-            
-            if pd.isna(estq_loja) or pd.isna(estq_matriz):
-                return ""
-            
-            estq_loja = float(estq_loja) if estq_loja else 0
-            estq_matriz = float(estq_matriz) if estq_matriz else 0
-            
-            status_loja = "C/ESTQ LJ" if estq_loja > 0 else "S/ESTQ LJ"
-            status_matriz = "C/ESTQ MTZ" if estq_matriz > 0 else "S/ESTQ MTZ"
-            
-            return f"{status_loja} {status_matriz}"
-        except Exception as e:
-            error(f"❌ Erro ao calcular status estoque: {e}")
-            return ""
-    
-    def _status_venda(self, row):
-        """Status de venda baseado nas vendas do mês"""
-        try:
-            vendas = row.get('Vendas', 0)
-            if pd.isna(vendas) or float(vendas) < 0.000001:
-                return "SEM VENDA"
-            return "VENDA"
-        except Exception as e:
-            error(f"❌ Erro ao calcular status venda: {e}")
-            return ""
-    
-    def _status_ruptura(self, row):
-        """Identifica se o produto está em ruptura"""
-        try:
-            media = row.get('Media_Vendas', 0)
-            estoque = row.get('Estoque_Loja', 0)
-            
-            if pd.isna(media) or pd.isna(estoque):
-                return "OK"
-            
-            media = float(media) if media else 0
-            estoque = float(estoque) if estoque else 0
-            
-            if media > 0 and estoque == 0:
-                return "RUPTURA"
-            return "OK"
-        except Exception as e:
-            error(f"❌ Erro ao calcular status ruptura: {e}")
-            return "OK"
-    
-    def processar(self, df_estoque, df_curva, df_media):
+    def _valores_numericos(self, df, coluna, vazio_zero=True):
         """
-        Gera o relatório de ruptura completo.
-        
-        Args:
-            df_estoque: DataFrame do estoque
-            df_curva: DataFrame da Curva ABC
-            df_media: DataFrame da média de vendas (pode ser None)
+        Converte uma coluna para float de forma vetorizada.
+        Replica a conversão célula a célula: nulos ficam marcados à parte,
+        valores vazios ("", 0) viram 0 quando vazio_zero=True e o que não
+        converte para float é marcado como inválido.
         
         Returns:
-            DataFrame com todas as colunas do relatório
+            tuple: (valores float, máscara de nulos, máscara de inválidos)
         """
-        info("="*60)
-        info("📊 GERANDO RELATÓRIO DE RUPTURA")
-        info("="*60)
-
-        # ===== VERIFICAÇÃO CRÍTICA - df_media =====
-        if df_media is None:
-            warning("⚠️ df_media é None, tentando carregar novamente...")
+        n = len(df)
+        if coluna not in df.columns:
+            # Mesmo comportamento de row.get(coluna, 0)
+            return np.zeros(n), np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+        
+        serie = df[coluna]
+        nulos = serie.isna().values
+        
+        if pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+            valores = serie.astype(float).values
+            return valores, nulos, np.zeros(n, dtype=bool)
+        
+        # Coluna de texto/misturada: conversão exata valor a valor
+        valores = np.zeros(n)
+        invalidos = np.zeros(n, dtype=bool)
+        for i, valor in enumerate(serie.values):
+            if nulos[i]:
+                continue
             try:
-                from src.config.media_vendas import media_vendas
-                df_media = media_vendas.get_df()
-                info(f"📊 DataFrame recarregado: {type(df_media)} com {len(df_media) if df_media is not None else 0} linhas")
-            except Exception as e:
-                error(f"❌ Erro ao recarregar média: {e}")
-                df_media = pd.DataFrame()
+                valores[i] = float(valor) if (valor or not vazio_zero) else 0
+            except (TypeError, ValueError):
+                invalidos[i] = True
+        return valores, nulos, invalidos
+    
+    def _calcular_colunas_derivadas(self, df):
+        """
+        Calcula DDE, STATUS DO ESTOQUE, VENDA e RUPTURA de uma vez,
+        com np.select/np.where sobre as colunas numéricas.
         
-        if df_media is None:
-            error("❌ df_media continua None, criando DataFrame vazio")
-            df_media = pd.DataFrame(columns=['Código', 'Loja', 'Qtd'])
+        Args:
+            df: DataFrame com Estoque_Loja, Estoque_Matriz, Media_Vendas e Vendas
         
-        if len(df_media) == 0:
-            warning("⚠️ df_media está vazio, criando DataFrame vazio")
-            df_media = pd.DataFrame(columns=['Código', 'Loja', 'Qtd'])
+        Returns:
+            DataFrame: Colunas DDE, STATUS DO ESTOQUE, VENDA e RUPTURA
+        """
+        estoque, estoque_nulo, estoque_invalido = self._valores_numericos(df, 'Estoque_Loja')
+        matriz, matriz_nulo, matriz_invalido = self._valores_numericos(df, 'Estoque_Matriz')
+        media, media_nula, media_invalida = self._valores_numericos(df, 'Media_Vendas')
+        vendas, vendas_nulas, vendas_invalidas = self._valores_numericos(df, 'Vendas', vazio_zero=False)
+        
+        # DDE: (estoque / média) * 30 dias, em meses a partir de 30 dias
+        sem_dde = estoque_nulo | media_nula | estoque_invalido | media_invalida
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dias = (estoque / media) * 30
+        calcula_dias = ~sem_dde & (estoque != 0) & (media != 0)
+        sem_dde |= calcula_dias & ~np.isfinite(dias)
+        calcula_dias &= ~sem_dde
+        
+        dias_validos = np.where(calcula_dias, dias, 0)
+        em_meses = dias_validos >= 30
+        quantidade = np.where(em_meses, dias_validos // 30, np.trunc(dias_validos)).astype(np.int64)
+        texto_dias = pd.Series(quantidade).astype(str).values.astype(object)
+        texto_dias = texto_dias + np.where(em_meses, " mês(es)", " dia(s)")
+        
+        dde = np.select(
+            [sem_dde, (estoque == 0) & (media == 0), estoque == 0, media == 0],
+            ["", "Estoque e venda zerados", "Estoque zerado", "Sem venda"],
+            default=""
+        ).astype(object)
+        dde[calcula_dias] = texto_dias[calcula_dias]
+        
+        # STATUS DO ESTOQUE: loja e matriz
+        sem_status = estoque_nulo | matriz_nulo | estoque_invalido | matriz_invalido
+        status = (np.where(estoque > 0, "C/ESTQ LJ", "S/ESTQ LJ").astype(object) + " " +
+                  np.where(matriz > 0, "C/ESTQ MTZ", "S/ESTQ MTZ").astype(object))
+        status[sem_status] = ""
+        
+        # VENDA: vendas do mês acima de zero
+        venda = np.where(vendas_nulas | (vendas < 0.000001), "SEM VENDA", "VENDA").astype(object)
+        venda[vendas_invalidas] = ""
+        
+        # RUPTURA: tem média de venda e estoque zerado
+        sem_ruptura = media_nula | estoque_nulo | media_invalida | estoque_invalido
+        ruptura = np.where(~sem_ruptura & (media > 0) & (estoque == 0), "RUPTURA", "OK")
+        
+        return pd.DataFrame({
+            'DDE': dde,
+            'STATUS DO ESTOQUE': status,
+            'VENDA': venda,
+            'RUPTURA': ruptura.astype(object)
+        }, index=df.index)
+    
+    def _estagio(self, nome, dependencias, calcular):
+        """
+        Devolve o resultado guardado do estágio se as dependências forem os
+        mesmos objetos da última execução; senão recalcula e guarda.
+        As entradas são tratadas como imutáveis (processar nunca as altera).
         
-        info(f"📊 df_media final: {len(df_media)} linhas, {len(df_media.columns)} colunas")
-
-        # === 1. NORMALIZAR CÓDIGOS ===
-        info("🔧 Normalizando códigos...")
+        Args:
+            nome: Nome do estágio (aparece em estagios_reutilizados)
+            dependencias: Tupla com os objetos dos quais o estágio depende
+            calcular: Função sem argumentos que calcula o estágio
+        """
+        anterior = self._estagios.get(nome)
+        if anterior is not None and len(anterior[0]) == len(dependencias) and \
+                all(a is b for a, b in zip(anterior[0], dependencias)):
+            self.estagios_reutilizados.append(nome)
+            self._etapa(nome)
+            return anterior[1]
+        
+        resultado = calcular()
+        self._estagios[nome] = (dependencias, resultado)
+        self._etapa(nome)
+        return resultado
+    
+    def _etapa(self, nome):
+        """
+        Informa que a etapa terminou. O callback pode interromper o
+        processamento (OperacaoCancelada); como a etapa já foi guardada,
+        a próxima execução continua a partir dela.
+        """
+        if self._progresso:
+            self._progresso(self.ETAPAS.index(nome) + 1, len(self.ETAPAS), nome.replace('_', ' '))
+    
+    def limpar_estagios(self):
+        """Descarta os estágios guardados (a próxima execução recalcula tudo)"""
+        self._estagios = {}
+        self._chaves = None
+        self.estagios_reutilizados = []
+    
+    def _dicionario_lojas(self, *colunas_lojas):
+        """
+        Dicionário de lojas compartilhado pelas chaves. O anterior é mantido
+        enquanto conhecer todas as lojas, para que as chaves já calculadas
+        dos outros arquivos continuem válidas.
+        """
+        if self._chaves is not None and self._chaves.contem(*colunas_lojas):
+            return self._chaves
         
-        # Estoque (BASE)
+        self._chaves = ChavesLojaProduto(*colunas_lojas)
+        debug(f"   Dicionário de lojas: {len(self._chaves.lojas)} lojas")
+        return self._chaves
+    
+    @staticmethod
+    def _remover_sem_codigo(df, origem):
+        """
+        Remove as linhas sem código válido (vazio, zero ou texto).
+        Todas viram SEM_CODIGO e, se ficassem, cruzariam umas com as outras
+        nos merges por código, multiplicando linhas e misturando valores.
+        """
+        sem_codigo = (df['Codigo_Norm'] == SEM_CODIGO).values
+        if sem_codigo.any():
+            warning(f"⚠️ {origem}: {int(sem_codigo.sum())} linha(s) sem código válido ignorada(s)")
+            df = df[~sem_codigo].reset_index(drop=True)
+        return df
+    
+    def _preparar_estoque(self, df_estoque):
+        """Estoque com o código normalizado (Codigo_Norm)"""
+        info("🔧 Normalizando códigos do estoque...")
         df_estoque = df_estoque.copy()
         info(f"📦 Estoque original: {len(df_estoque)} linhas")
         info(f"📋 Colunas disponíveis no estoque: {list(df_estoque.columns)}")
@@ -194,25 +250,21 @@ class ModeloRuptura(ModeloBase):
             raise ValueError(f"Coluna de código não encontrada no estoque. Colunas disponíveis: {list(df_estoque.columns)}")
         
         info(f"   Coluna de código do estoque: '{col_codigo_estoque}'")
-        df_estoque['Codigo_Norm'] = df_estoque[col_codigo_estoque].apply(self._normalizar_codigo)
-        df_estoque['Cadeamento'] = df_estoque['Codigo_Norm'] + "-" + df_estoque['Loja'].astype(str)
-        debug(f"   Exemplos de cadeamento: {df_estoque['Cadeamento'].head(3).tolist()}")
-        
-        # Curva ABC
-        df_curva = df_curva.copy()
+        df_estoque['Codigo_Norm'] = normalizar_codigos(df_estoque[col_codigo_estoque])
+        return self._remover_sem_codigo(df_estoque, "Estoque")
+    
+    def _preparar_curva(self, df_curva):
+        """Curva ABC reduzida a código normalizado, loja e vendas"""
         info(f"📊 Curva ABC original: {len(df_curva)} linhas")
         
         # Encontrar coluna de código na curva ABC
         col_codigo_curva = df_curva.columns[0]  # Assume que é a primeira coluna
         info(f"   Coluna de código da curva ABC: '{col_codigo_curva}'")
         
-        df_curva['Codigo_Norm'] = df_curva[col_codigo_curva].apply(self._normalizar_codigo)
-        df_curva['Cadeamento'] = df_curva['Codigo_Norm'] + "-" + df_curva['Loja_Nome'].astype(str)
-        
         # Encontrar coluna de quantidade na curva ABC
         col_qtd_curva = None
         for col in df_curva.columns:
-            if 'qtd' in col.lower() or 'quantidade' in col.lower():
+            if 'qtd' in str(col).lower() or 'quantidade' in str(col).lower():
                 col_qtd_curva = col
                 break
         
@@ -220,61 +272,161 @@ class ModeloRuptura(ModeloBase):
             col_qtd_curva = df_curva.columns[4]  # Assume que é a 5ª coluna (índice 4)
             warning(f"⚠️ Coluna de quantidade não identificada, usando coluna {col_qtd_curva}")
         
-        df_curva['Vendas'] = pd.to_numeric(df_curva[col_qtd_curva], errors='coerce').fillna(0)
-        
-        # Média de Vendas (com verificação de colunas)
+        return self._remover_sem_codigo(pd.DataFrame({
+            'Codigo_Norm': normalizar_codigos(df_curva[col_codigo_curva]).values,
+            'Loja_Nome': df_curva['Loja_Nome'].values,
+            'Vendas': pd.to_numeric(df_curva[col_qtd_curva], errors='coerce').fillna(0).values,
+        }), "Curva ABC")
+    
+    def _preparar_media(self, df_media):
+        """Média de vendas reduzida a código normalizado, loja e média"""
         info(f"📈 Média de vendas: {len(df_media)} linhas")
-        df_media = df_media.copy()
         
         # Verificar se as colunas necessárias existem
         if 'Código' in df_media.columns:
-            df_media['Codigo_Norm'] = df_media['Código'].apply(self._normalizar_codigo)
+            codigos = normalizar_codigos(df_media['Código']).values
         else:
             warning("⚠️ Coluna 'Código' não encontrada na média de vendas")
-            df_media['Codigo_Norm'] = ""
+            codigos = np.zeros(len(df_media), dtype=np.int64)
         
         if 'Loja' in df_media.columns:
-            df_media['Cadeamento'] = df_media['Codigo_Norm'] + "-" + df_media['Loja'].astype(str)
+            lojas = df_media['Loja'].values
         else:
             warning("⚠️ Coluna 'Loja' não encontrada na média de vendas")
-            df_media['Cadeamento'] = df_media['Codigo_Norm'] + "-"
+            lojas = np.full(len(df_media), "", dtype=object)
         
         if 'Qtd' in df_media.columns:
-            df_media['Media_Vendas'] = pd.to_numeric(df_media['Qtd'], errors='coerce').fillna(0)
+            medias = pd.to_numeric(df_media['Qtd'], errors='coerce').fillna(0).values
         else:
             warning("⚠️ Coluna 'Qtd' não encontrada na média de vendas")
-            df_media['Media_Vendas'] = 0
-        
-        # Agrupar média por cadeamento
-        if len(df_media) > 0 and 'Cadeamento' in df_media.columns:
-            df_media_agg = df_media.groupby('Cadeamento', as_index=False).agg({
-                'Media_Vendas': 'mean',
-                'Codigo_Norm': 'first',
-                'Loja': 'first' if 'Loja' in df_media.columns else None
-            })
-            # Remover colunas None
-            df_media_agg = df_media_agg.dropna(axis=1, how='all')
-            info(f"📊 Média agregada: {len(df_media_agg)} grupos únicos")
-        else:
-            warning("⚠️ Criando DataFrame de média vazio")
-            df_media_agg = pd.DataFrame(columns=['Cadeamento', 'Media_Vendas', 'Codigo_Norm'])
-
-        # === 2. IDENTIFICAR MATRIZ ===
+            medias = np.zeros(len(df_media), dtype=np.int64)
+        
+        return self._remover_sem_codigo(
+            pd.DataFrame({'Codigo_Norm': codigos, 'Loja': lojas, 'Media_Vendas': medias}),
+            "Média de vendas"
+        )
+    
+    def _estoque_matriz(self, df_estoque):
+        """Estoque da matriz por código (None se a matriz não está no arquivo)"""
         info("🏪 Identificando matriz...")
-        nome_matriz = "COMCARNE MATRIZ SAO LUIS"
+        nome_matriz = self.NOME_MATRIZ
         
         if nome_matriz in df_estoque['Loja'].values:
             info(f"✅ Matriz encontrada: {nome_matriz}")
             df_matriz = df_estoque[df_estoque['Loja'] == nome_matriz][['Codigo_Norm', 'Estoque_Loja']].copy()
             df_matriz = df_matriz.rename(columns={'Estoque_Loja': 'Estoque_Matriz'})
-            
+            info(f"   Estoque matriz calculado para {len(df_matriz)} produtos")
+            return df_matriz
+        
+        warning(f"⚠️ Matriz '{nome_matriz}' não encontrada")
+        return None
+    
+    def _estoque_com_chave(self, df_estoque, df_matriz, chaves):
+        """Estoque (base do relatório) com a chave (código, loja) e o estoque da matriz"""
+        df_estoque = df_estoque.copy()
+        df_estoque['Chave'] = chaves.chave(df_estoque['Codigo_Norm'], df_estoque['Loja'])
+        
+        if df_matriz is not None:
             # Adicionar Estoque_Matriz ao DataFrame principal
             df_estoque = df_estoque.merge(df_matriz, on='Codigo_Norm', how='left')
             df_estoque['Estoque_Matriz'] = df_estoque['Estoque_Matriz'].fillna(0)
-            info(f"   Estoque matriz calculado para {len(df_matriz)} produtos")
         else:
-            warning(f"⚠️ Matriz '{nome_matriz}' não encontrada")
             df_estoque['Estoque_Matriz'] = 0
+        return df_estoque
+    
+    def _curva_com_chave(self, df_curva, chaves):
+        """Vendas da Curva ABC por chave (código, loja)"""
+        return pd.DataFrame({
+            'Chave': chaves.chave(df_curva['Codigo_Norm'], df_curva['Loja_Nome']),
+            'Vendas': df_curva['Vendas'].values,
+        })
+    
+    def _media_agregada(self, df_media, chaves):
+        """Média de vendas agrupada por chave (código, loja)"""
+        if len(df_media) == 0:
+            warning("⚠️ Criando DataFrame de média vazio")
+            return pd.DataFrame(columns=['Chave', 'Media_Vendas'])
+        
+        df_media = pd.DataFrame({
+            'Chave': chaves.chave(df_media['Codigo_Norm'], df_media['Loja']),
+            'Media_Vendas': df_media['Media_Vendas'].values,
+        })
+        df_media_agg = df_media.groupby(['Chave'], as_index=False)['Media_Vendas'].mean()
+        info(f"📊 Média agregada: {len(df_media_agg)} grupos únicos")
+        return df_media_agg
+    
+    def processar(self, df_estoque, df_curva, df_media, progresso=None):
+        """
+        Gera o relatório de ruptura completo.
+        
+        Args:
+            df_estoque: DataFrame do estoque
+            df_curva: DataFrame da Curva ABC
+            df_media: DataFrame da média de vendas (pode ser None)
+            progresso: Função opcional chamada com (etapas_concluidas, total, etapa)
+                ao fim de cada etapa de ETAPAS; pode interromper levantando
+                OperacaoCancelada
+        
+        Returns:
+            DataFrame com todas as colunas do relatório
+        """
+        self._progresso = progresso
+        try:
+            return self._gerar(df_estoque, df_curva, df_media)
+        finally:
+            self._progresso = None
+    
+    def _gerar(self, df_estoque, df_curva, df_media):
+        """Corpo de processar (as etapas informam o progresso)"""
+        info("="*60)
+        info("📊 GERANDO RELATÓRIO DE RUPTURA")
+        info("="*60)
+
+        # ===== VERIFICAÇÃO CRÍTICA - df_media =====
+        if df_media is None:
+            warning("⚠️ df_media é None, tentando carregar novamente...")
+            try:
+                from src.config.media_vendas import get_media_vendas
+                df_media = get_media_vendas().get_df()
+                info(f"📊 DataFrame recarregado: {type(df_media)} com {len(df_media) if df_media is not None else 0} linhas")
+            except Exception as e:
+                error(f"❌ Erro ao recarregar média: {e}")
+                df_media = pd.DataFrame()
+        
+        if df_media is None:
+            error("❌ df_media continua None, criando DataFrame vazio")
+            df_media = pd.DataFrame(columns=['Código', 'Loja', 'Qtd'])
+        
+        if len(df_media) == 0:
+            warning("⚠️ df_media está vazio, criando DataFrame vazio")
+            df_media = pd.DataFrame(columns=['Código', 'Loja', 'Qtd'])
+        
+        info(f"📊 df_media final: {len(df_media)} linhas, {len(df_media.columns)} colunas")
+
+        # === 1-3. ESTÁGIOS COM CHAVE (reaproveitados se a entrada não mudou) ===
+        self.estagios_reutilizados = []
+        
+        estoque_norm = self._estagio('estoque_normalizado', (df_estoque,),
+                                     lambda: self._preparar_estoque(df_estoque))
+        curva_norm = self._estagio('curva_normalizada', (df_curva,),
+                                   lambda: self._preparar_curva(df_curva))
+        media_norm = self._estagio('media_normalizada', (df_media,),
+                                   lambda: self._preparar_media(df_media))
+        
+        chaves = self._dicionario_lojas(estoque_norm['Loja'], curva_norm['Loja_Nome'], media_norm['Loja'])
+        chave = ['Chave']
+        
+        df_matriz = self._estagio('estoque_matriz', (df_estoque,),
+                                  lambda: self._estoque_matriz(estoque_norm))
+        df_estoque = self._estagio('estoque_chaves', (df_estoque, chaves),
+                                   lambda: self._estoque_com_chave(estoque_norm, df_matriz, chaves))
+        df_curva_chave = self._estagio('curva_chaves', (df_curva, chaves),
+                                       lambda: self._curva_com_chave(curva_norm, chaves))
+        df_media_agg = self._estagio('media_agregada', (df_media, chaves),
+                                     lambda: self._media_agregada(media_norm, chaves))
+        
+        if self.estagios_reutilizados:
+            info(f"♻️ Estágios reaproveitados: {', '.join(self.estagios_reutilizados)}")
 
         # === 3. JUNTAR DADOS (ESTOQUE COMO BASE) ===
         info("🔄 Juntando dados...")
@@ -282,18 +434,19 @@ class ModeloRuptura(ModeloBase):
         # Join com Curva ABC (vendas)
         df_temp = pd.merge(
             df_estoque,
-            df_curva[['Cadeamento', 'Vendas']],
-            on='Cadeamento',
+            df_curva_chave,
+            on=chave,
             how='left'
         )
         info(f"   Após join com vendas: {len(df_temp)} linhas")
+        self._etapa('join_vendas')
         
         # Join com Média de Vendas
         if len(df_media_agg) > 0:
             df_final = pd.merge(
                 df_temp,
-                df_media_agg[['Cadeamento', 'Media_Vendas']],
-                on='Cadeamento',
+                df_media_agg[chave + ['Media_Vendas']],
+                on=chave,
                 how='left'
             )
         else:
@@ -301,6 +454,7 @@ class ModeloRuptura(ModeloBase):
             df_final['Media_Vendas'] = 0
 
         info(f"📊 Total de linhas após joins: {len(df_final)}")
+        self._etapa('join_media')
 
         # === 4. PREENCHER VALORES NULOS ===
         info("📋 Preparando colunas...")
@@ -315,20 +469,17 @@ class ModeloRuptura(ModeloBase):
         # === 5. ADICIONAR COLUNAS CALCULADAS ===
         info("🧮 Calculando colunas derivadas...")
         
-        # DDE
-        df_final['DDE'] = df_final.apply(self._calcular_dde, axis=1)
-        
-        # Status do Estoque
-        df_final['STATUS DO ESTOQUE'] = df_final.apply(self._status_estoque, axis=1)
-        
-        # VENDA
-        df_final['VENDA'] = df_final.apply(self._status_venda, axis=1)
+        # DDE, Status do Estoque, VENDA e RUPTURA (vetorizado)
+        derivadas = self._calcular_colunas_derivadas(df_final)
+        for coluna in ['DDE', 'STATUS DO ESTOQUE', 'VENDA']:
+            df_final[coluna] = derivadas[coluna]
         
         # COMPRADOR (baseado no grupo)
         if 'Grupo' in df_final.columns:
-            df_final['COMPRADOR'] = df_final['Grupo'].apply(
-                lambda x: get_comprador(x) if pd.notna(x) and x != '' else "NÃO MAPEADO"
-            )
+            # Um lookup por grupo distinto (poucos), não por linha
+            grupos = pd.unique(df_final['Grupo'])
+            compradores = {g: get_comprador(g) if pd.notna(g) and g != '' else "NÃO MAPEADO" for g in grupos}
+            df_final['COMPRADOR'] = df_final['Grupo'].map(compradores).astype(object)
             # Estatísticas de compradores
             compradores_count = df_final['COMPRADOR'].value_counts()
             info(f"   Compradores identificados: {len(compradores_count)}")
@@ -339,11 +490,12 @@ class ModeloRuptura(ModeloBase):
             df_final['COMPRADOR'] = "NÃO MAPEADO"
         
         # RUPTURA
-        df_final['RUPTURA'] = df_final.apply(self._status_ruptura, axis=1)
+        df_final['RUPTURA'] = derivadas['RUPTURA']
         
         # Colunas em branco
         df_final['Valor Estoque'] = ""
         df_final['Preço'] = ""
+        self._etapa('colunas_derivadas')
 
         # === 6. ORGANIZAR COLUNAS NA ORDEM SOLICITADA ===
         info("📋 Organizando colunas...")
@@ -411,9 +563,157 @@ class ModeloRuptura(ModeloBase):
         info(f"⚠️  Produtos em ruptura: {total_ruptura}")
         info(f"📦 Produtos sem estoque: {total_sem_estoque}")
         
+        df_final = self.compactar(df_final)
+        self._etapa('colunas_organizadas')
         self.df_processado = df_final
         return df_final
 
+    def _indice_resultado(self, df):
+        """
+        Chaves (código, loja) do relatório ordenadas, para achar as linhas
+        de um delta por busca binária. Refeito só quando o relatório muda.
+        
+        Returns:
+            tuple: (dicionário de lojas, chaves ordenadas, posições no df)
+        """
+        if self._indice is not None and self._indice[0] is df:
+            return self._indice[1:]
+        
+        chaves = ChavesLojaProduto(df['LOJA'])
+        chave = chaves.chave(df['CÓDIGO'].values, df['LOJA'])
+        ordem = np.argsort(chave, kind='stable')
+        self._indice = (df, chaves, chave[ordem], ordem)
+        return self._indice[1:]
+    
+    @staticmethod
+    def _faixas(ordem, inicio, fim):
+        """
+        Posições no relatório das faixas [inicio, fim) das chaves ordenadas.
+        
+        Returns:
+            tuple: (posições, quantidade de linhas de cada faixa)
+        """
+        quantidades = fim - inicio
+        deslocamento = np.arange(quantidades.sum()) - np.repeat(np.cumsum(quantidades) - quantidades, quantidades)
+        return ordem[np.repeat(inicio, quantidades) + deslocamento], quantidades
+    
+    def _colunas_delta(self, delta):
+        """Colunas de código, loja e estoque do delta (por nome ou pela posição)"""
+        colunas = []
+        for posicao, (campo, nomes) in enumerate(self.COLUNAS_DELTA.items()):
+            encontrada = next((c for c in nomes if c in delta.columns), None)
+            if encontrada is None:
+                if delta.shape[1] < 3:
+                    raise ValueError("Delta de estoque precisa das colunas código, loja e estoque")
+                encontrada = delta.columns[posicao]
+                warning(f"⚠️ Coluna de {campo} do delta não identificada, usando '{encontrada}'")
+            colunas.append(encontrada)
+        return colunas
+    
+    @staticmethod
+    def _atribuir(df, coluna, posicoes, valores):
+        """
+        Grava valores em algumas linhas de uma coluna compactada, ampliando
+        o tipo (categorias novas, float) quando os valores não cabem nele.
+        """
+        serie = df[coluna]
+        valores = np.asarray(valores)
+        
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            novas = pd.Index(pd.unique(valores)).difference(serie.cat.categories)
+            if len(novas):
+                df[coluna] = serie.cat.add_categories(novas)
+        elif pd.api.types.is_numeric_dtype(serie) and pd.api.types.is_numeric_dtype(valores.dtype):
+            if np.array_equal(valores.astype(serie.dtype), valores):
+                valores = valores.astype(serie.dtype)
+            else:
+                tipo = np.result_type(serie.dtype, valores.dtype)
+                df[coluna] = serie.astype(np.float64 if tipo.kind == 'f' else tipo)
+        elif not pd.api.types.is_object_dtype(serie):
+            df[coluna] = serie.astype(object)
+        
+        df.iloc[posicoes, df.columns.get_loc(coluna)] = valores
+    
+    def atualizar_estoque(self, delta, df=None):
+        """
+        Aplica correções de estoque ao relatório já gerado, sem refazer o
+        processar: atualiza ESTQ LOJA (e ESTQ MATRIZ quando a correção é da
+        matriz) e recalcula DDE, STATUS DO ESTOQUE e RUPTURA só nas linhas
+        afetadas. Pares (código, loja) que não estão no relatório são ignorados.
+        
+        Args:
+            delta: DataFrame com código, loja e novo estoque
+            df: Relatório de ruptura (padrão: o último gerado). É alterado no lugar.
+        
+        Returns:
+            DataFrame: O próprio relatório, atualizado
+        """
+        df = self.df_processado if df is None else df
+        if df is None or len(df) == 0:
+            raise ValueError("Nenhum relatório de ruptura para atualizar")
+        if delta is None or len(delta) == 0:
+            return df
+        
+        col_codigo, col_loja, col_estoque = self._colunas_delta(delta)
+        delta = pd.DataFrame({
+            'codigo': normalizar_codigos(delta[col_codigo]).values,
+            'loja': delta[col_loja].values,
+            'estoque': pd.to_numeric(delta[col_estoque], errors='coerce').fillna(0).values,
+        })
+        
+        chaves, ordenadas, ordem = self._indice_resultado(df)
+        delta['chave'] = chaves.chave(delta['codigo'], delta['loja'])
+        # A última correção de cada par vale
+        delta = delta.drop_duplicates('chave', keep='last')
+        
+        # Linhas de cada chave (o estoque pode repetir o par código/loja)
+        inicio = np.searchsorted(ordenadas, delta['chave'].values, side='left')
+        fim = np.searchsorted(ordenadas, delta['chave'].values, side='right')
+        encontradas = fim > inicio
+        if not encontradas.all():
+            warning(f"⚠️ {int((~encontradas).sum())} par(es) código/loja do delta não estão no relatório")
+        
+        posicoes_loja, quantidades = self._faixas(ordem, inicio[encontradas], fim[encontradas])
+        if len(posicoes_loja):
+            self._atribuir(df, 'ESTQ LOJA', posicoes_loja,
+                           np.repeat(delta['estoque'].values[encontradas], quantidades))
+        
+        # Correção da matriz muda o ESTQ MATRIZ do código em todas as lojas
+        afetadas = [posicoes_loja]
+        da_matriz = (delta['loja'].astype(str) == self.NOME_MATRIZ).values & encontradas
+        if da_matriz.any():
+            codigos = delta['codigo'].values[da_matriz]
+            fator = chaves.fator
+            # Todas as lojas de um código ficam na faixa [código * fator, (código + 1) * fator)
+            posicoes_matriz, quantidades = self._faixas(
+                ordem,
+                np.searchsorted(ordenadas, codigos * fator, side='left'),
+                np.searchsorted(ordenadas, codigos * fator + fator, side='left')
+            )
+            self._atribuir(df, 'ESTQ MATRIZ', posicoes_matriz,
+                           np.repeat(delta['estoque'].values[da_matriz], quantidades))
+            afetadas.append(posicoes_matriz)
+        
+        posicoes = np.unique(np.concatenate(afetadas))
+        if len(posicoes) == 0:
+            return df
+        
+        # Mesmo cálculo do processar, só nas linhas afetadas
+        linhas = df.iloc[posicoes]
+        derivadas = self._calcular_colunas_derivadas(pd.DataFrame({
+            'Estoque_Loja': linhas['ESTQ LOJA'].values,
+            'Estoque_Matriz': linhas['ESTQ MATRIZ'].values,
+            'Media_Vendas': linhas['MÉDIA VENDA MENSAL'].values,
+            'Vendas': linhas['VENDAS MÊS ATUAL'].values,
+        }))
+        for coluna in ['DDE', 'STATUS DO ESTOQUE', 'RUPTURA']:
+            self._atribuir(df, coluna, posicoes, derivadas[coluna].values)
+        
+        # Nova versão dos dados: resumos e telas guardados ficam desatualizados
+        marcar_alterado(df)
+        info(f"📦 Estoque atualizado: {len(delta)} correção(ões), {len(posicoes)} linha(s) recalculada(s)")
+        return df
+    
     def get_preview(self, df, linhas=20):
         """Mostra as primeiras linhas formatadas"""
         if df is None or len(df) == 0:
@@ -427,9 +727,7 @@ class ModeloRuptura(ModeloBase):
         
         for col in ['ESTQ LOJA', 'ESTQ MATRIZ', 'VENDAS MÊS ATUAL', 'MÉDIA VENDA MENSAL']:
             if col in df_preview.columns:
-                df_preview[col] = df_preview[col].apply(
-                    lambda x: f"{float(x):,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.') if pd.notna(x) and x != '' else ""
-                )
+                df_preview[col] = formatar_br_serie(df_preview[col], 'decimal_2')
         
         return df_preview.to_string(index=False)
 
@@ -441,6 +739,13 @@ class ModeloRuptura(ModeloBase):
         
         info("📊 Gerando resumo estatístico")
         
+        # Uma agregação só (em cache para este DataFrame) alimenta todas as seções
+        resumo = resumir(
+            df,
+            grupos=('COMPRADOR', 'CATEGORIA', 'LOJA'),
+            condicoes=(('ruptura', 'RUPTURA', '==', 'RUPTURA'), ('sem_estoque', 'ESTQ LOJA', '<=', 0))
+        )
+        
         linhas = []
         linhas.append("=" * 60)
         linhas.append("📊 RESUMO DO RELATÓRIO DE RUPTURA")
@@ -449,26 +754,27 @@ class ModeloRuptura(ModeloBase):
         
         # Produtos em ruptura
         if 'RUPTURA' in df.columns:
-            ruptura = len(df[df['RUPTURA'] == 'RUPTURA'])
+            ruptura = resumo.condicoes['ruptura']
             perc_ruptura = (ruptura/len(df)*100) if len(df) > 0 else 0
             linhas.append(f"⚠️  Produtos em ruptura: {ruptura} ({perc_ruptura:.1f}%)")
         
         # Produtos sem estoque
         if 'ESTQ LOJA' in df.columns:
-            sem_estoque = len(df[df['ESTQ LOJA'] <= 0])
+            sem_estoque = resumo.condicoes['sem_estoque']
             perc_sem_estoque = (sem_estoque/len(df)*100) if len(df) > 0 else 0
             linhas.append(f"📦 Produtos sem estoque: {sem_estoque} ({perc_sem_estoque:.1f}%)")
         
         # Por comprador
         if 'COMPRADOR' in df.columns:
             linhas.append("\n👤 Por Comprador:")
-            for comp, qtd in df['COMPRADOR'].value_counts().head(10).items():
+            compradores = resumo.por('COMPRADOR')['linhas']
+            for comp, qtd in compradores.head(10).items():
                 if comp != "NÃO MAPEADO" and pd.notna(comp):
                     perc = (qtd/len(df)*100)
                     linhas.append(f"   {comp:<20} {qtd:>6} produtos ({perc:.1f}%)")
             
             # Mostrar não mapeados se houver
-            nao_mapeados = len(df[df['COMPRADOR'] == 'NÃO MAPEADO'])
+            nao_mapeados = int(compradores.get("NÃO MAPEADO", 0))
             if nao_mapeados > 0:
                 perc_nao_mapeados = (nao_mapeados/len(df)*100)
                 linhas.append(f"\n⚠️  Grupos não mapeados: {nao_mapeados} produtos ({perc_nao_mapeados:.1f}%)")
@@ -476,7 +782,7 @@ class ModeloRuptura(ModeloBase):
         # Por categoria (top 5)
         if 'CATEGORIA' in df.columns:
             linhas.append("\n📁 Top 5 Categorias:")
-            for cat, qtd in df['CATEGORIA'].value_counts().head(5).items():
+            for cat, qtd in resumo.por('CATEGORIA')['linhas'].head(5).items():
                 if cat and str(cat).strip():
                     perc = (qtd/len(df)*100)
                     linhas.append(f"   {cat[:30]:<30} {qtd:>6} produtos ({perc:.1f}%)")
@@ -484,7 +790,7 @@ class ModeloRuptura(ModeloBase):
         # Por loja (top 5)
         if 'LOJA' in df.columns:
             linhas.append("\n🏪 Top 5 Lojas:")
-            for loja, qtd in df['LOJA'].value_counts().head(5).items():
+            for loja, qtd in resumo.por('LOJA')['linhas'].head(5).items():
                 if loja and str(loja).strip():
                     perc = (qtd/len(df)*100)
                     linhas.append(f"   {loja[:30]:<30} {qtd:>6} produtos ({perc:.1f}%)")
@@ -501,20 +807,8 @@ class ModeloRuptura(ModeloBase):
                 error("❌ Tentativa de exportar DataFrame vazio")
                 return False
             
-            # Criar writer do Excel
-            with pd.ExcelWriter(caminho, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Ruptura', index=False)
-                
-                # Ajustar largura das colunas
-                worksheet = writer.sheets['Ruptura']
-                for i, col in enumerate(df.columns):
-                    # Calcular largura máxima
-                    max_len = max(
-                        df[col].astype(str).map(len).max() if len(df) > 0 else 0,
-                        len(str(col))
-                    ) + 2
-                    # Limitar a 50 caracteres
-                    worksheet.column_dimensions[chr(65 + i)].width = min(max_len, 50)
+            # Gravação em streaming, com largura das colunas por amostra
+            exportar_excel(df, caminho, nome_aba='Ruptura')
             
             info(f"✅ Relatório exportado com sucesso: {caminho}")
             return True
@@ -0,0 +1,107 @@
+# src/models/parser_secoes.py
+"""
+Parser colunar para relatórios do SGE organizados em seções.
+Classifica as linhas com máscaras (cabeçalho de seção, produto, lixo),
+propaga o contexto da seção com forward-fill e extrai o bloco de produtos
+coluna a coluna, sem percorrer o DataFrame linha por linha.
+"""
+import pandas as pd
+
+
+def texto_celulas(serie):
+    """
+    Converte uma coluna para texto como str(valor).strip(), com "" para vazios.
+
+    Args:
+        serie: Series do pandas
+
+    Returns:
+        Series: Textos da coluna
+    """
+    valores = serie.astype(object)
+    return valores.where(serie.notna(), '').astype(str).str.strip()
+
+
+def mascara_secao(coluna, marcador):
+    """
+    Marca as linhas de cabeçalho de seção (ex: "Categoria:", "Loja:").
+
+    Args:
+        coluna: Primeira coluna do relatório
+        marcador: Texto que identifica o cabeçalho
+
+    Returns:
+        Series: Máscara booleana
+    """
+    return texto_celulas(coluna).str.contains(marcador, regex=False)
+
+
+def mascara_produtos(coluna, aceitar_numeros=False, exigir_numerico=False):
+    """
+    Marca as linhas de produto (primeira coluna começando com dígito).
+
+    Args:
+        coluna: Primeira coluna do relatório
+        aceitar_numeros: Se True, qualquer valor numérico (int/float) conta como produto
+        exigir_numerico: Se True, o texto também precisa ser um número
+            (vírgula decimal aceita), descartando linhas como "12abc"
+
+    Returns:
+        Series: Máscara booleana
+    """
+    texto = texto_celulas(coluna)
+    mask = texto.str[:1].str.isdigit().fillna(False).astype(bool)
+    mask &= ~texto.isin(['nan', 'None'])
+
+    if exigir_numerico:
+        mask &= pd.to_numeric(texto.str.replace(',', '.', regex=False), errors='coerce').notna()
+
+    if aceitar_numeros:
+        numeros = coluna.map(lambda v: isinstance(v, (int, float))).astype(bool)
+        mask |= numeros & coluna.notna()
+
+    return mask & coluna.notna()
+
+
+def propagar_secao(coluna, mask_secao, remover_zeros=False):
+    """
+    Propaga o valor das linhas de seção para as linhas seguintes.
+    Linhas anteriores à primeira seção ficam com "".
+
+    Args:
+        coluna: Coluna com o valor da seção (ex: código da categoria)
+        mask_secao: Máscara das linhas de cabeçalho de seção
+        remover_zeros: Remove zeros à esquerda (códigos)
+
+    Returns:
+        Series: Valor da seção vigente em cada linha
+    """
+    valores = coluna[mask_secao]
+    texto = valores.astype(object).astype(str)
+    if remover_zeros:
+        texto = texto.str.lstrip('0')
+    marcadores = texto.where(valores.notna(), '')
+    return marcadores.reindex(coluna.index).ffill().fillna('')
+
+
+def extrair_bloco(df, mask_produtos, num_colunas):
+    """
+    Extrai as linhas de produto como texto, com exatamente num_colunas colunas.
+    Colunas que não existem no relatório são preenchidas com "".
+
+    Args:
+        df: DataFrame bruto do relatório
+        mask_produtos: Máscara das linhas de produto
+        num_colunas: Quantidade de colunas a extrair
+
+    Returns:
+        DataFrame: Bloco de produtos com colunas 0..num_colunas-1
+    """
+    linhas = df[mask_produtos.values]
+    bloco = {}
+    for j in range(num_colunas):
+        if j < df.shape[1]:
+            bloco[j] = texto_celulas(linhas.iloc[:, j]).values
+        else:
+            bloco[j] = [''] * len(linhas)
+    return pd.DataFrame(bloco)
@@ -5,7 +5,10 @@ Módulo com todos os relatórios disponíveis no sistema.
 import pandas as pd
 import numpy as np
 from src.relatorios.base_relatorio import RelatorioBase
-from src.config.media_vendas import media_vendas
+from src.config.media_vendas import get_media_vendas
+from src.utils.codigos import normalizar_codigos, SEM_CODIGO
+from src.utils.chaves import ChavesLojaProduto
+from src.utils.helpers import formatar_br_serie
 
 class RelatorioRaw(RelatorioBase):
     """Relatório com dados brutos combinados"""
@@ -122,9 +125,18 @@ class RelatorioRuptura(RelatorioBase):
             return ""
         return str(texto).strip()
     
+    @staticmethod
+    def _com_indicador(tabela, nome):
+        """Adiciona uma coluna marcadora para saber, após o merge, quais linhas casaram"""
+        tabela = tabela.copy()
+        tabela[nome] = True
+        return tabela
+    
     def gerar(self, df_combinado):
         """
         Gera relatório de ruptura.
+        Os cruzamentos com estoque, matriz, categoria/grupo e média de vendas
+        são feitos por chave (merge), sem percorrer a Curva ABC linha a linha.
         """
         if df_combinado is None or len(df_combinado) == 0:
             return "Nenhum dado para gerar relatório"
@@ -136,7 +148,7 @@ class RelatorioRuptura(RelatorioBase):
         linhas.append("")
         
         # Carregar média de vendas
-        df_media = media_vendas.get_df()
+        df_media = get_media_vendas().get_df()
         if df_media is None or len(df_media) == 0:
             linhas.append("❌ Média de vendas não disponível!")
             linhas.append("   Verifique se o arquivo media_vendas.xlsx está na pasta data/")
@@ -169,72 +181,72 @@ class RelatorioRuptura(RelatorioBase):
         # Identificar a loja MATRIZ
         matriz_nome = "COMCARNE MATRIZ SAO LUIS"
         
-        # Extrair estoque da matriz
-        estoque_matriz = {}
-        for _, row in df_estoque.iterrows():
-            if row['Loja'] == matriz_nome:
-                codigo = str(row['Código'])
-                estoque_matriz[codigo] = row['Estoque_Loja']
+        # Chaves de cruzamento: código normalizado (inteiro)
+        df_curva = df_curva.reset_index(drop=True)
+        df_estoque = df_estoque.reset_index(drop=True)
+        chave_curva = normalizar_codigos(df_curva['Código'])
+        chave_estoque = normalizar_codigos(df_estoque['Código'])
+        
+        # Linhas sem código no estoque não casam com nada
+        df_estoque = df_estoque[(chave_estoque != SEM_CODIGO).values].reset_index(drop=True)
+        chave_estoque = chave_estoque[chave_estoque != SEM_CODIGO].reset_index(drop=True)
+        
+        # Extrair estoque da matriz (último valor de cada código)
+        mask_matriz = df_estoque['Loja'] == matriz_nome
+        estoque_matriz = pd.DataFrame({
+            'chave': chave_estoque[mask_matriz].values,
+            'ESTQ MATRIZ': df_estoque.loc[mask_matriz, 'Estoque_Loja'].values
+        }).drop_duplicates('chave', keep='last')
         
         linhas.append(f"🏢 Matriz identificada: {matriz_nome}")
         linhas.append(f"📦 Produtos com estoque na matriz: {len(estoque_matriz)}")
         linhas.append("")
         
-        # Criar DataFrame de resultados
-        resultados = []
-        
-        # Processar cada produto da Curva ABC
-        for _, venda in df_curva.iterrows():
-            codigo = str(venda['Código'])
-            produto = venda['Produto']
-            loja = venda['Loja']
-            vendas_mes = venda['Vendas_Mes_Atual']
-            
-            # Buscar estoque da loja
-            estoque_loja = 0
-            estoque_loja_row = df_estoque[
-                (df_estoque['Código'].astype(str) == codigo) & 
-                (df_estoque['Loja'] == loja)
-            ]
-            if len(estoque_loja_row) > 0:
-                estoque_loja = estoque_loja_row.iloc[0]['Estoque_Loja']
-            
-            # Buscar estoque da matriz
-            estoque_matriz_val = estoque_matriz.get(codigo, 0)
-            
-            # Buscar categoria e grupo do estoque
-            categoria = ""
-            grupo = ""
-            cat_row = df_estoque[df_estoque['Código'].astype(str) == codigo]
-            if len(cat_row) > 0:
-                if 'Categoria' in cat_row.columns:
-                    categoria = cat_row.iloc[0]['Categoria']
-                if 'Grupo' in cat_row.columns:
-                    grupo = cat_row.iloc[0]['Grupo']
-            
-            # Buscar média de vendas mensal
-            media_vendas_val = media_vendas.get_media_por_produto_loja(codigo, loja)
-            if media_vendas_val == 0:
-                media_vendas_val = media_vendas.get_media_por_produto(codigo)
-            
-            # Criar cadeamento
-            cadeamento = self._criar_cadeamento(codigo, produto, loja)
-            
-            # Adicionar ao resultado
-            resultados.append({
-                'CATEGORIA': categoria,
-                'GRUPO': grupo,
-                'Cadeamento': cadeamento,
-                'CÓDIGO': codigo,
-                'PRODUTO': produto,
-                'ESTQ LOJA': estoque_loja,
-                'ESTQ MATRIZ': estoque_matriz_val,
-                'VENDAS MÊS ATUAL': vendas_mes,
-                'MÉDIA VENDA MENSAL': media_vendas_val
-            })
-        
-        # Criar DataFrame de resultados
-        df_resultado = pd.DataFrame(resultados)
+        # Estoque da loja: primeira linha de cada (código, loja), com chave int64
+        com_loja = df_estoque['Loja'].notna().values
+        chaves = ChavesLojaProduto(df_estoque['Loja'][com_loja], df_curva['Loja'])
+        estoque_loja = pd.DataFrame({
+            'chave_loja': chaves.chave(chave_estoque[com_loja], df_estoque['Loja'][com_loja]),
+            'ESTQ LOJA': df_estoque['Estoque_Loja'].values[com_loja]
+        }).drop_duplicates('chave_loja', keep='first')
+        
+        # Categoria e grupo: primeira linha de cada código
+        categorias = pd.DataFrame({'chave': chave_estoque.values})
+        for origem, destino in (('Categoria', 'CATEGORIA'), ('Grupo', 'GRUPO')):
+            if origem in df_estoque.columns:
+                categorias[destino] = df_estoque[origem].to_numpy(dtype=object)
+        categorias = categorias.drop_duplicates('chave', keep='first')
+        
+        # Cruzamentos por chave (left join preserva a ordem da Curva ABC)
+        base = pd.DataFrame({
+            'chave': chave_curva.values,
+            'chave_loja': chaves.chave(chave_curva, df_curva['Loja'])
+        })
+        base = base.merge(self._com_indicador(estoque_loja, 'tem_loja'), on='chave_loja', how='left')
+        base = base.merge(self._com_indicador(estoque_matriz, 'tem_matriz'), on='chave', how='left')
+        base = base.merge(self._com_indicador(categorias, 'tem_categoria'), on='chave', how='left')
+        
+        # Buscar média de vendas mensal (por loja, senão média do produto)
+        medias = get_media_vendas().get_medias(chave_curva.values, df_curva['Loja'].values)
+        
+        # Criar cadeamento CÓDIGO-PRODUTO-LOJA. O código sai como o texto do valor
+        # original da Curva ABC (ex: "123.0"), como antes; a chave inteira só cruza
+        codigo_texto = df_curva['Código'].astype(object).map(str)
+        cadeamento = (codigo_texto + '-' + df_curva['Produto'].astype(object).map(str) + '-' +
+                      df_curva['Loja'].astype(object).map(str))
+        
+        sem_categoria = pd.Series('', index=base.index, dtype=object)
+        df_resultado = pd.DataFrame({
+            'CATEGORIA': base['CATEGORIA'].where(base['tem_categoria'].notna(), '') if 'CATEGORIA' in base else sem_categoria,
+            'GRUPO': base['GRUPO'].where(base['tem_categoria'].notna(), '') if 'GRUPO' in base else sem_categoria,
+            'Cadeamento': cadeamento.values,
+            'CÓDIGO': codigo_texto.values,
+            'PRODUTO': df_curva['Produto'].to_numpy(dtype=object),
+            'ESTQ LOJA': base['ESTQ LOJA'].where(base['tem_loja'].notna(), 0).values,
+            'ESTQ MATRIZ': base['ESTQ MATRIZ'].where(base['tem_matriz'].notna(), 0).values,
+            'VENDAS MÊS ATUAL': df_curva['Vendas_Mes_Atual'].values,
+            'MÉDIA VENDA MENSAL': medias
+        })
         
         # Ordenar por categoria e grupo
         if len(df_resultado) > 0:
@@ -260,7 +272,7 @@ class RelatorioRuptura(RelatorioBase):
         df_preview = df_resultado.head(20).copy()
         for col in ['ESTQ LOJA', 'ESTQ MATRIZ', 'VENDAS MÊS ATUAL', 'MÉDIA VENDA MENSAL']:
             if col in df_preview.columns:
-                df_preview[col] = df_preview[col].apply(lambda x: f"{x:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'))
+                df_preview[col] = formatar_br_serie(df_preview[col], 'decimal_2')
         
         # Adicionar ao preview
         linhas.append(df_preview.to_string(index=False))
@@ -2,28 +2,30 @@
 """
 Janela de filtro personalizada para relatórios.
 """
-import pandas as pd
 import customtkinter as ctk
 from tkinter import messagebox
+from src.utils.indice_filtro import IndiceFiltro
 from src.utils.tooltip import criar_tooltip
 
 class JanelaFiltroRelatorio:
     """Janela para filtrar relatórios por colunas"""
     
-    def __init__(self, parent, df, colunas_permitidas, callback_aplicar_filtro, cores):
+    def __init__(self, parent, df, colunas_permitidas, callback_aplicar_filtro, cores,
+                 indice=None, filtros_ativos=None):
         """
         Inicializa a janela de filtro.
         
         Args:
             parent: Widget pai
-            df: DataFrame com os dados
+            df: DataFrame com os dados (não é copiado)
             colunas_permitidas: Lista de colunas que podem ser filtradas
             callback_aplicar_filtro: Função chamada ao aplicar o filtro
             cores: Dicionário com as cores do tema
+            indice: IndiceFiltro já montado para o df (opcional)
+            filtros_ativos: Filtros já aplicados, para continuar a partir deles
         """
         self.parent = parent
-        self.df_original = df.copy()  # Guardar original
-        self.df = df.copy()  # DataFrame atual (será filtrado dinamicamente)
+        self.df_original = df
         self.colunas_permitidas = colunas_permitidas
         self.callback = callback_aplicar_filtro
         self.cores = cores
@@ -31,8 +33,13 @@ class JanelaFiltroRelatorio:
         # Filtrar apenas as colunas que existem no DataFrame
         self.colunas = [col for col in colunas_permitidas if col in df.columns]
         
+        # Valores de cada coluna já fatorados: as janelas em cascata só consultam o índice
+        if indice is None or indice.df is not df:
+            indice = IndiceFiltro(df, self.colunas)
+        self.indice = indice
+        
         # Dicionário para armazenar os filtros ativos
-        self.filtros_ativos = {}
+        self.filtros_ativos = dict(filtros_ativos or {})
         
         self._criar_janela()
     
@@ -214,11 +221,9 @@ class JanelaFiltroRelatorio:
     
     def _mostrar_opcoes_filtro(self, coluna, label_filtro):
         """Mostra as opções de filtro para a coluna (respeitando filtros já aplicados)"""
-        # Aplicar filtros atuais no DataFrame para mostrar opções dinâmicas
-        df_filtrado = self.df_original.copy()
-        for c, valores in self.filtros_ativos.items():
-            if c != coluna and valores:  # Ignorar a coluna atual
-                df_filtrado = df_filtrado[df_filtrado[c].isin(valores)]
+        # Valores disponíveis com os filtros das outras colunas (contagens em cache)
+        filtros_outras = {c: v for c, v in self.filtros_ativos.items() if c != coluna}
+        total_disponivel = self.indice.contar(filtros_outras)
         
         # Criar popup
         popup = ctk.CTkToplevel(self.janela)
@@ -238,7 +243,7 @@ class JanelaFiltroRelatorio:
         
         ctk.CTkLabel(
             popup,
-            text=f"Total de registros disponíveis: {len(df_filtrado)}",
+            text=f"Total de registros disponíveis: {total_disponivel}",
             font=("Arial", 11),
             text_color=self.cores['texto_secundario']
         ).pack(pady=(0, 10))
@@ -282,30 +287,21 @@ class JanelaFiltroRelatorio:
         check_vars = {}
         valores_selecionados = self.filtros_ativos.get(coluna, [])
         
-        # Valores únicos do DataFrame filtrado
+        # Valores distintos (já ordenados) com a quantidade de linhas de cada um
         try:
-            valores_unicos = df_filtrado[coluna].dropna().unique()
-            
-            # Ordenar
-            try:
-                valores_unicos = sorted(valores_unicos)
-            except:
-                valores_unicos = sorted(valores_unicos, key=str)
-            
-            for valor in valores_unicos:
-                if pd.notna(valor):
-                    texto_valor = str(valor)
-                    var = ctk.BooleanVar(value=texto_valor in valores_selecionados)
-                    check_vars[texto_valor] = var
-                    
-                    check = ctk.CTkCheckBox(
-                        scrollable_frame,
-                        text=texto_valor[:50] + "..." if len(texto_valor) > 50 else texto_valor,
-                        variable=var,
-                        fg_color=self.cores['destaque'],
-                        text_color=self.cores['texto']
-                    )
-                    check.pack(anchor='w', pady=2, padx=10)
+            for texto_valor, quantidade in self.indice.contagens(coluna, self.filtros_ativos):
+                var = ctk.BooleanVar(value=texto_valor in valores_selecionados)
+                check_vars[texto_valor] = var
+                
+                texto = texto_valor[:50] + "..." if len(texto_valor) > 50 else texto_valor
+                check = ctk.CTkCheckBox(
+                    scrollable_frame,
+                    text=f"{texto} ({quantidade})",
+                    variable=var,
+                    fg_color=self.cores['destaque'],
+                    text_color=self.cores['texto']
+                )
+                check.pack(anchor='w', pady=2, padx=10)
                     
         except Exception as e:
             print(f"Erro ao carregar valores: {e}")
@@ -390,7 +386,6 @@ class JanelaFiltroRelatorio:
     def _limpar_filtros(self):
         """Limpa todos os filtros"""
         self.filtros_ativos = {}
-        self.df = self.df_original.copy()  # Restaurar DataFrame original
         self.janela.destroy()
         self._criar_janela()
         messagebox.showinfo("Filtros", "Todos os filtros foram limpos!")
\ No newline at end of file
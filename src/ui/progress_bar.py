@@ -4,8 +4,14 @@ Widget de barra de progresso personalizado para operações longas
 """
 import customtkinter as ctk
 import tkinter as tk
+import threading
 from threading import Thread
 import time
+from src.utils.cancelamento import TokenCancelamento, OperacaoCancelada
+
+# Intervalo (ms) em que a thread principal aplica o progresso vindo da thread de trabalho
+INTERVALO_ATUALIZACAO_MS = 50
+
 
 class ProgressBar:
     """Barra de progresso flutuante para operações demoradas"""
@@ -17,6 +23,12 @@ class ProgressBar:
         self.progresso = 0
         self.esta_ativo = False
         self.janela = None
+        # Conferido a cada atualização: o trabalho para no próximo ponto seguro
+        self.token = TokenCancelamento()
+        # Último progresso vindo de outra thread e pedido de fechar (ver _aplicar_pendente)
+        self._lock = threading.Lock()
+        self._pendente = None
+        self._fechar_pendente = False
         
     def mostrar(self):
         """Exibe a janela de progresso"""
@@ -30,6 +42,7 @@ class ProgressBar:
         self.janela.transient(self.parent)
         self.janela.grab_set()  # Modal
         self.janela.focus_set()
+        self.janela.protocol("WM_DELETE_WINDOW", self.cancelar)
         
         # Centralizar
         self.janela.update_idletasks()
@@ -104,6 +117,39 @@ class ProgressBar:
         
         # Atualizar a janela
         self.janela.update()
+        self.janela.after(INTERVALO_ATUALIZACAO_MS, self._aplicar_pendente)
+    
+    @staticmethod
+    def _na_thread_principal():
+        return threading.current_thread() is threading.main_thread()
+    
+    def _aplicar_pendente(self):
+        """Na thread principal: aplica o último progresso da thread de trabalho"""
+        if self.janela is None:
+            return
+        
+        with self._lock:
+            pendente, self._pendente = self._pendente, None
+            fechar = self._fechar_pendente
+        
+        if fechar:
+            self.fechar()
+            return
+        if pendente:
+            self._mostrar_progresso(*pendente)
+        self.janela.after(INTERVALO_ATUALIZACAO_MS, self._aplicar_pendente)
+    
+    def _mostrar_progresso(self, progresso, mensagem):
+        """Atualiza os widgets (somente na thread principal)"""
+        # Atualizar barra (CustomTkinter usa 0-1)
+        self.progress_bar.set(progresso / 100)
+        
+        # Atualizar porcentagem
+        self.label_porcentagem.configure(text=f"{progresso}%")
+        
+        # Atualizar mensagem se fornecida
+        if mensagem:
+            self.label_mensagem.configure(text=mensagem)
         
     def atualizar(self, progresso, mensagem=None):
         """
@@ -112,31 +158,61 @@ class ProgressBar:
         Args:
             progresso: Valor entre 0 e 100
             mensagem: Mensagem opcional para atualizar
+        
+        Raises:
+            OperacaoCancelada: Se o usuário cancelou (a thread de trabalho para aqui)
         """
+        self.token.verificar()
+        
         if not self.esta_ativo or self.janela is None:
             return
         
-        # Atualizar barra (CustomTkinter usa 0-1)
-        self.progress_bar.set(progresso / 100)
-        
-        # Atualizar porcentagem
-        self.label_porcentagem.configure(text=f"{progresso}%")
+        if not self._na_thread_principal():
+            # O Tk só pode ser usado na thread principal: guarda o valor
+            # para _aplicar_pendente (mantém a última mensagem informada)
+            with self._lock:
+                if not mensagem and self._pendente:
+                    mensagem = self._pendente[1]
+                self._pendente = (progresso, mensagem)
+            return
         
-        # Atualizar mensagem se fornecida
-        if mensagem:
-            self.label_mensagem.configure(text=mensagem)
+        self._mostrar_progresso(progresso, mensagem)
         
         # Forçar atualização da interface
         self.janela.update()
+    
+    def etapa(self, inicio, fim, mensagem):
+        """
+        Função de progresso para uma etapa que ocupa a faixa [inicio, fim] da barra.
+        
+        Args:
+            inicio: Porcentagem no começo da etapa
+            fim: Porcentagem ao terminar a etapa
+            mensagem: Texto com {feitos}, {total} e {detalhe} (opcionais)
+        
+        Returns:
+            Função (feitos, total, detalhe='') para passar como progresso
+            a exportar, carregar_arquivos, ModeloRuptura.processar...
+        """
+        def progresso(feitos, total, detalhe=''):
+            porcentagem = inicio + (fim - inicio) * feitos // max(total, 1)
+            self.atualizar(porcentagem, mensagem.format(feitos=feitos, total=total, detalhe=detalhe))
+        return progresso
         
     def cancelar(self):
         """Cancela a operação em andamento"""
+        self.token.cancelar()
         self.esta_ativo = False
         self.fechar()
         
     def fechar(self):
         """Fecha a janela de progresso"""
         self.esta_ativo = False
+        if not self._na_thread_principal():
+            # Fechada pela thread principal no próximo _aplicar_pendente
+            with self._lock:
+                self._fechar_pendente = True
+            return
         if self.janela:
             self.janela.grab_release()
             self.janela.destroy()
@@ -157,16 +233,21 @@ class ProgressBarContext:
         self.progress.fechar()
 
 
-def executar_com_progresso(parent, funcao, titulo="Processando...", mensagem="Aguarde...", *args, **kwargs):
+def executar_com_progresso(parent, funcao, titulo="Processando...", mensagem="Aguarde...", *args,
+                           ao_cancelar=None, **kwargs):
     """
     Executa uma função em thread separada com barra de progresso
     
+    A função recebe a barra como primeiro argumento; cada progress.atualizar
+    (e cada progresso criado com progress.etapa) é um ponto de cancelamento.
+    
     Args:
         parent: Widget pai
         funcao: Função a ser executada
         titulo: Título da janela
         mensagem: Mensagem inicial
         *args, **kwargs: Argumentos para a função
+        ao_cancelar: Função opcional chamada na thread principal se o usuário cancelar
     """
     progress = ProgressBar(parent, titulo, mensagem)
     progress.mostrar()
@@ -174,6 +255,11 @@ def executar_com_progresso(parent, funcao, titulo="Processando...", mensagem="Ag
     def worker():
         try:
             funcao(progress, *args, **kwargs)
+        except OperacaoCancelada:
+            from src.utils.logger import info
+            info(f"🛑 Operação cancelada pelo usuário: {titulo}")
+            if ao_cancelar:
+                parent.after(0, ao_cancelar)
         except Exception as e:
             from src.utils.logger import error
             error(f"Erro na execução com progresso: {e}")
@@ -9,11 +9,14 @@ import os
 import pandas as pd
 from datetime import datetime
 
+from src.core.visao import VisaoRelatorio
 from src.utils.tooltip import criar_tooltip
 from src.ui.widgets import BlocoResumo, BlocoPreview
 from src.core.identificador import IdentificadorModelos
+from src.core.carregador_paralelo import carregar_arquivos
 from src.relatorios.relatorios_disponiveis import GerenciadorRelatorios
-from src.utils.helpers import resource_path
+from src.config.media_vendas import get_media_vendas, carregar_em_segundo_plano
+from src.utils.exportador import exportar, tipos_arquivo_exportacao
 from src.utils.logger import info, error, warning, debug
 from src.ui.progress_bar import ProgressBar, executar_com_progresso
 from src.utils.config_manager import config
@@ -21,10 +24,22 @@ from src.utils.config_manager import config
 class TelaCriarRelatorio:
     """Tela para criar relatórios personalizados"""
     
-    def __init__(self, parent, cores):
+    # Colunas oferecidas na janela de filtro (as que existirem no relatório)
+    COLUNAS_FILTRO = [
+        'CATEGORIA',
+        'GRUPO',
+        'Subgrupo',
+        'COMPRADOR',
+        'STATUS DO ESTOQUE',
+        'RUPTURA',
+        'LOJA'
+    ]
+    
+    def __init__(self, parent, cores, identificador=None):
         self.parent = parent
         self.cores = cores
-        self.identificador = IdentificadorModelos()
+        # Reaproveita o identificador da aplicação (os modelos são criados uma vez só)
+        self.identificador = identificador or IdentificadorModelos()
         
         # Configurações
         self.fonte_atual = config.get('tamanho_fonte', 12)
@@ -43,6 +58,8 @@ class TelaCriarRelatorio:
         self.modelos = [None] * 4
         self.tipos_identificados = [None] * 4
         self.arquivos_definidos = [False] * 4
+        # (caminho, mtime, tamanho) de cada arquivo carregado: arquivo igual não é relido
+        self.assinaturas = [None] * 4
         
         # DataFrames para os relatórios
         self.df_curva = None
@@ -52,6 +69,15 @@ class TelaCriarRelatorio:
         self.df_combinado = None
         self.df_filtrado = None
         
+        # Mantido entre gerações: reaproveita os estágios das entradas que não mudaram
+        self.modelo_ruptura = None
+        
+        # Índice de filtro do relatório atual e filtros aplicados com ele
+        self.indice_filtro = None
+        self.filtros_ativos = {}
+        # Resultados de filtro guardados por (versão do relatório, filtros)
+        self.visao = VisaoRelatorio(aplicar_filtro=lambda df, filtros: self._indice_para(df).filtrar(filtros))
+        
         # Relatório selecionado
         self.relatorio_selecionado = None
         self.relatorios_disponiveis = []
@@ -403,9 +429,25 @@ class TelaCriarRelatorio:
             self._carregar_arquivos_thread,
             "📂 Carregando Arquivos",
             "Preparando para carregar os arquivos...",
-            arquivos_validos
+            arquivos_validos,
+            ao_cancelar=self._carregamento_cancelado
         )
     
+    def _carregamento_cancelado(self):
+        """Carga interrompida pelo usuário: só libera os relatórios se há dados"""
+        tem_dados = self.df_curva is not None or self.df_estoque is not None
+        self.btn_relatorio.configure(state="normal" if tem_dados else "disabled")
+        self.status_label.configure(text="⛔ Carregamento cancelado", text_color="#ffff00")
+    
+    @staticmethod
+    def _assinatura_arquivo(caminho):
+        """(caminho, mtime, tamanho) do arquivo, ou None se não der para ler"""
+        try:
+            st = os.stat(caminho)
+        except OSError:
+            return None
+        return (os.path.abspath(caminho), st.st_mtime_ns, st.st_size)
+    
     def _carregar_arquivos_thread(self, progress, arquivos_validos):
         """Versão em thread do carregamento de arquivos"""
         try:
@@ -420,26 +462,51 @@ class TelaCriarRelatorio:
             self.df_filtrado = None
             self.relatorio_selecionado = None
             
-            for idx, i in enumerate(arquivos_validos):
-                progresso_parcial = 10 + (idx * 80 // total_arquivos)
-                progress.atualizar(progresso_parcial, f"Processando arquivo {i+1} de {total_arquivos}...")
-                
-                info(f"\n📄 Carregando arquivo {i+1}: {self.arquivos[i]}")
-                
-                modelo, df = self.identificador.identificar(self.arquivos[i])
+            def progresso_arquivos(concluidos, total, caminho):
+                progress.atualizar(
+                    10 + (concluidos * 80 // total),
+                    f"Arquivo {concluidos} de {total} pronto: {os.path.basename(caminho)}"
+                )
+            
+            # A média de vendas carrega em paralelo com os arquivos
+            media = carregar_em_segundo_plano()
+            
+            # Arquivos que não mudaram desde a última carga mantêm o mesmo DataFrame
+            # (assim o modelo de ruptura reaproveita o que já calculou com eles)
+            assinaturas = {i: self._assinatura_arquivo(self.arquivos[i]) for i in arquivos_validos}
+            inalterados = [i for i in arquivos_validos
+                           if assinaturas[i] is not None and assinaturas[i] == self.assinaturas[i]
+                           and self.dfs_processados[i] is not None and self.modelos[i] is not None]
+            a_carregar = [i for i in arquivos_validos if i not in inalterados]
+            
+            # Identificar e processar cada arquivo em um processo (usa o cache se o arquivo não mudou)
+            progress.atualizar(10, f"Processando {len(a_carregar)} arquivo(s) em paralelo...")
+            resultados = carregar_arquivos(
+                self.identificador,
+                [self.arquivos[i] for i in a_carregar],
+                progresso=progresso_arquivos,
+                token=progress.token
+            ) if a_carregar else {}
+            
+            for i in arquivos_validos:
+                info(f"\n📄 Arquivo {i+1}: {self.arquivos[i]}")
+                if i in inalterados:
+                    modelo, df_limpo = self.modelos[i], self.dfs_processados[i]
+                    info("   ♻️ Arquivo não mudou, mantendo dados carregados")
+                else:
+                    modelo, df_limpo = resultados.get(self.arquivos[i], (None, None))
+                    self.assinaturas[i] = None
                 
                 if modelo is None:
                     mensagens.append(f"❌ Arquivo {i+1}: Tipo não identificado")
                     continue
                 
                 info(f"   Modelo: {modelo.nome}")
-                
-                # Processar o DataFrame com o modelo
-                df_limpo = modelo.processar(df)
-                df_limpo = df_limpo.reset_index(drop=True)
-                
-                self.dfs_processados[i] = df_limpo
-                self.modelos[i] = modelo
+                if i not in inalterados:
+                    df_limpo = df_limpo.reset_index(drop=True)
+                    self.dfs_processados[i] = df_limpo
+                    self.modelos[i] = modelo
+                    self.assinaturas[i] = assinaturas[i]
                 
                 # Separar por tipo
                 if "Curva ABC" in modelo.nome:
@@ -453,10 +520,11 @@ class TelaCriarRelatorio:
             
             progress.atualizar(90, "Carregando média de vendas...")
             
-            # Carregar média de vendas
-            caminho_media = resource_path("data/media_vendas.xlsx")
-            if os.path.exists(caminho_media):
-                self.df_media = pd.read_excel(caminho_media)
+            # Média de vendas: já carregada em segundo plano (só relê se a planilha mudou)
+            media.join()
+            df_media = get_media_vendas().get_df()
+            if len(df_media) > 0:
+                self.df_media = df_media
                 info(f"📈 Média de vendas carregada: {len(self.df_media)} linhas")
             else:
                 self.df_media = None
@@ -570,7 +638,10 @@ class TelaCriarRelatorio:
             self.frame,
             self._processar_relatorio_thread,
             f"📊 Gerando {self.relatorio_selecionado.nome}",
-            "Preparando dados..."
+            "Preparando dados...",
+            ao_cancelar=lambda: self.status_label.configure(
+                text="⛔ Geração do relatório cancelada", text_color="#ffff00"
+            )
         )
     
     def _processar_relatorio_thread(self, progress):
@@ -590,24 +661,25 @@ class TelaCriarRelatorio:
                     return
                 
                 progress.atualizar(30, "Carregando modelo de ruptura...")
-                from src.models.modelo_ruptura import ModeloRuptura
-                modelo_ruptura = ModeloRuptura()
+                if self.modelo_ruptura is None:
+                    from src.models.modelo_ruptura import ModeloRuptura
+                    self.modelo_ruptura = ModeloRuptura()
+                modelo_ruptura = self.modelo_ruptura
                 
                 progress.atualizar(40, "Processando dados de estoque e vendas...")
                 self.df_ruptura = modelo_ruptura.processar(
                     self.df_estoque,
                     self.df_curva,
-                    self.df_media
+                    self.df_media,
+                    progresso=progress.etapa(40, 80, "Ruptura: {detalhe} ({feitos}/{total})")
                 )
                 
                 progress.atualizar(80, "Gerando preview...")
                 if self.df_ruptura is None:
                     raise ValueError("Falha ao gerar relatório de ruptura - retornou None")
                 
-                if hasattr(modelo_ruptura, 'get_preview'):
-                    preview = modelo_ruptura.get_preview(self.df_ruptura, 20)
-                else:
-                    preview = self._gerar_preview_padrao(self.df_ruptura)
+                # O relatório inteiro vai para a tabela virtual (sem texto pré-formatado)
+                preview = None
                 
                 self.df_combinado = self.df_ruptura
                 
@@ -647,27 +719,25 @@ class TelaCriarRelatorio:
     
     def _atualizar_interface_apos_processar(self, preview):
         """Atualiza a interface após o processamento"""
-        self.preview.atualizar_conteudo(preview)
+        if preview is None:
+            self._mostrar_tabela(self.df_combinado)
+        else:
+            self.preview.atualizar_conteudo(preview)
         self.status_label.configure(
             text=f"✅ {self.relatorio_selecionado.nome} gerado! Use o filtro se desejar.",
             text_color="#00ff00"
         )
     
-    def _gerar_preview_padrao(self, df):
-        """Gera preview padrão caso o modelo não tenha método próprio"""
+    def _mostrar_tabela(self, df):
+        """Mostra o relatório (ou o resultado do filtro) na tabela virtual"""
         if df is None or len(df) == 0:
-            return "Nenhum dado para preview"
-        
-        linhas = []
-        linhas.append("=" * 100)
-        linhas.append("📋 PRIMEIRAS 20 LINHAS")
-        linhas.append("=" * 100)
-        linhas.append("")
-        
-        preview_df = df.head(20).copy()
-        linhas.append(preview_df.to_string(index=False))
+            self.preview.atualizar_conteudo("Nenhum dado para preview")
+            return
         
-        return "\n".join(linhas)
+        opcoes = {}
+        if self.df_ruptura is not None and self.modelo_ruptura is not None:
+            opcoes = self.modelo_ruptura.get_opcoes_preview()
+        self.preview.mostrar_tabela(df, **opcoes)
     
     # ===== MÉTODO VARRER CORRIGIDO =====
     def _varrer_dados(self):
@@ -746,8 +816,7 @@ class TelaCriarRelatorio:
             self.df_filtrado = df_limpo.reset_index(drop=True)
             
             # Atualizar preview
-            preview_text = self._gerar_preview_filtrado(self.df_filtrado)
-            self.preview.atualizar_conteudo(preview_text)
+            self._mostrar_tabela(self.df_filtrado)
             
             # Mostrar resultado
             messagebox.showinfo(
@@ -770,6 +839,26 @@ class TelaCriarRelatorio:
             import traceback
             traceback.print_exc()
     
+    def _colunas_filtro(self, df):
+        """Colunas de COLUNAS_FILTRO presentes no relatório"""
+        return [col for col in self.COLUNAS_FILTRO if col in df.columns]
+    
+    def _indice_para(self, df):
+        """
+        Índice de filtro válido para este DataFrame na versão atual.
+        É montado uma vez por versão do relatório e reaproveitado entre
+        aberturas; uma correção de estoque (atualizar_estoque) muda a versão.
+        """
+        colunas = self._colunas_filtro(df)
+        indice = self.indice_filtro
+        if indice is None or not indice.serve_para(df, colunas):
+            from src.utils.indice_filtro import IndiceFiltro
+            # Outro relatório: os filtros anteriores não valem mais
+            if indice is None or indice.df is not df:
+                self.filtros_ativos = {}
+            indice = self.indice_filtro = IndiceFiltro(df, colunas)
+        return indice
+    
     def _abrir_filtro(self):
         """Abre a janela de filtro para o relatório atual"""
         if self.df_ruptura is None and self.df_combinado is None:
@@ -784,19 +873,20 @@ class TelaCriarRelatorio:
         
         from src.ui.filtro_relatorio import JanelaFiltroRelatorio
         
+        colunas_existentes = self._colunas_filtro(df_atual)
+        if not colunas_existentes:
+            messagebox.showwarning("Aviso", "Nenhuma coluna disponível para filtro!")
+            return
+        
+        indice = self._indice_para(df_atual)
+        
         def callback_filtro(filtros):
-            df_filtrado = df_atual.copy()
-            
-            for coluna, valores in filtros.items():
-                if coluna in df_filtrado.columns and valores:
-                    df_filtrado = df_filtrado[df_filtrado[coluna].isin(valores)]
-            
-            df_filtrado = df_filtrado.reset_index(drop=True)
-            
-            if len(df_filtrado) > 0:
+            # Máscaras do índice: uma única seleção de linhas, sem cópias intermediárias
+            if self._indice_para(df_atual).contar(filtros) > 0:
+                df_filtrado = self.visao.dados(df_atual, filtros)
                 self.df_filtrado = df_filtrado
-                preview_text = self._gerar_preview_filtrado(df_filtrado)
-                self.preview.atualizar_conteudo(preview_text)
+                self.filtros_ativos = dict(filtros)
+                self._mostrar_tabela(df_filtrado)
                 
                 self.status_label.configure(
                     text=f"✅ Filtro aplicado: {len(df_filtrado)} de {len(df_atual)} linhas",
@@ -807,50 +897,18 @@ class TelaCriarRelatorio:
             else:
                 messagebox.showwarning("Filtro", "Nenhuma linha encontrada com esses filtros!")
         
-        colunas_permitidas = [
-            'CATEGORIA',
-            'GRUPO',
-            'Subgrupo',
-            'COMPRADOR',
-            'STATUS DO ESTOQUE',
-            'RUPTURA',
-            'LOJA'
-        ]
-        
-        colunas_existentes = [col for col in colunas_permitidas if col in df_atual.columns]
-        
-        if not colunas_existentes:
-            messagebox.showwarning("Aviso", "Nenhuma coluna disponível para filtro!")
-            return
-        
         JanelaFiltroRelatorio(
             self.frame,
             df_atual,
             colunas_existentes,
             callback_filtro,
-            self.cores
+            self.cores,
+            indice=indice,
+            filtros_ativos=self.filtros_ativos
         )
     
-    def _gerar_preview_filtrado(self, df):
-        """Gera preview dos dados filtrados"""
-        if df is None or len(df) == 0:
-            return "Nenhum dado para preview"
-        
-        linhas = []
-        linhas.append("=" * 100)
-        linhas.append("📋 DADOS FILTRADOS - PRIMEIRAS 20 LINHAS")
-        linhas.append("=" * 100)
-        linhas.append("")
-        linhas.append(f"Total de linhas após filtro: {len(df)}")
-        linhas.append("")
-        
-        preview_df = df.head(20).copy()
-        linhas.append(preview_df.to_string(index=False))
-        
-        return "\n".join(linhas)
-    
     def _exportar_excel(self):
-        """Exporta o relatório atual para Excel"""
+        """Exporta o relatório atual (Excel, CSV, Parquet ou Feather)"""
         if hasattr(self, 'df_filtrado') and self.df_filtrado is not None:
             df_exportar = self.df_filtrado
             nome_base = "Filtrado"
@@ -885,35 +943,51 @@ class TelaCriarRelatorio:
         
         path = filedialog.asksaveasfilename(
             defaultextension=".xlsx",
-            filetypes=[("Excel", "*.xlsx"), ("Todos os arquivos", "*.*")],
+            filetypes=tipos_arquivo_exportacao(),
             initialfile=nome
         )
         
         if path:
-            try:
-                self.status_label.configure(
-                    text=f"⏳ Exportando {len(df_exportar)} linhas...",
-                    text_color="#ffff00"
-                )
-                self.parent.update()
-                
-                df_exportar.to_excel(path, index=False)
-                
-                messagebox.showinfo(
-                    "Sucesso",
-                    f"✅ Relatório exportado com sucesso!\n\n"
-                    f"📁 Arquivo: {os.path.basename(path)}\n"
-                    f"📊 Linhas: {len(df_exportar)}"
-                )
-                
-                self.status_label.configure(
-                    text=f"✅ Exportado: {os.path.basename(path)}",
-                    text_color="#00ff00"
+            self.status_label.configure(
+                text=f"⏳ Exportando {len(df_exportar)} linhas...",
+                text_color="#ffff00"
+            )
+            executar_com_progresso(
+                self.frame,
+                self._exportar_thread,
+                "💾 Exportando Relatório",
+                f"Gravando {len(df_exportar)} linhas...",
+                df_exportar, path, nome_base,
+                ao_cancelar=lambda: self.status_label.configure(
+                    text="⛔ Exportação cancelada", text_color="#ffff00"
                 )
-                
-            except Exception as e:
-                messagebox.showerror("Erro", f"Erro ao exportar:\n{str(e)}")
-                self.status_label.configure(text="❌ Erro na exportação", text_color="#ff0000")
+            )
+    
+    def _exportar_thread(self, progress, df_exportar, path, nome_base):
+        """Versão em thread da exportação (progresso por bloco de linhas gravadas)"""
+        try:
+            exportar(df_exportar, path, nome_aba=nome_base,
+                     progresso=progress.etapa(0, 100, "Linhas gravadas: {feitos} de {total}"))
+            self.frame.after(0, lambda: self._exportacao_concluida(path, len(df_exportar)))
+        except Exception as e:
+            error(f"❌ Erro na exportação: {e}")
+            self.frame.after(0, lambda msg=str(e): messagebox.showerror("Erro", f"Erro ao exportar:\n{msg}"))
+            self.frame.after(0, lambda: self.status_label.configure(text="❌ Erro na exportação", text_color="#ff0000"))
+            raise
+    
+    def _exportacao_concluida(self, path, linhas):
+        """Avisa o fim da exportação (na thread principal)"""
+        messagebox.showinfo(
+            "Sucesso",
+            f"✅ Relatório exportado com sucesso!\n\n"
+            f"📁 Arquivo: {os.path.basename(path)}\n"
+            f"📊 Linhas: {linhas}"
+        )
+        
+        self.status_label.configure(
+            text=f"✅ Exportado: {os.path.basename(path)}",
+            text_color="#00ff00"
+        )
     
     def _limpar_tudo(self):
         """Limpa todos os arquivos e dados"""
@@ -923,6 +997,7 @@ class TelaCriarRelatorio:
             self.modelos[i] = None
             self.tipos_identificados[i] = None
             self.arquivos_definidos[i] = False
+            self.assinaturas[i] = None
             self.entries[i].delete(0, "end")
             self.entries[i].configure(border_color=self.cores['destaque'])
             self.status_arquivos[i].configure(text="⭕", text_color=self.cores['texto_secundario'])
@@ -932,8 +1007,11 @@ class TelaCriarRelatorio:
         self.df_estoque = None
         self.df_media = None
         self.df_ruptura = None
+        self.modelo_ruptura = None
         self.df_combinado = None
         self.df_filtrado = None
+        self.indice_filtro = None
+        self.filtros_ativos = {}
         self.relatorio_selecionado = None
         self.relatorios_disponiveis = []
         
@@ -10,10 +10,14 @@ import time
 import pandas as pd
 import customtkinter as ctk
 
+from src.core.visao import VisaoRelatorio
 from src.utils.tooltip import criar_tooltip
 from src.ui.widgets import BlocoResumo, BlocoPreview
 from src.utils.config import LAYOUT
 from src.models.modelo_entradas import ModeloEntradas
+from src.utils.leitor_excel import ler_excel
+from src.utils.cache_arquivos import cache_arquivos
+from src.utils.exportador import exportar, tipos_arquivo_exportacao
 from src.utils.logger import info, error, warning, debug
 from src.ui.progress_bar import ProgressBar, executar_com_progresso
 
@@ -29,6 +33,9 @@ class TelaEntradas:
         self.file_path = None
         self.tempo_processamento = None
         
+        # Resumo guardado por versão dos dados (não refaz ao recriar a tela)
+        self.visao = VisaoRelatorio()
+        
         # Atributos que serão criados no mostrar()
         self.frame = None
         self.entry_path = None
@@ -255,7 +262,10 @@ class TelaEntradas:
             self._process_file_thread,
             "📦 Processando Entradas",
             "Lendo e processando arquivo...",
-            path
+            path,
+            ao_cancelar=lambda: self.status_label.configure(
+                text="⛔ Processamento cancelado", text_color="#ffff00"
+            )
         )
     
     def _process_file_thread(self, progress, path):
@@ -271,13 +281,18 @@ class TelaEntradas:
             
             inicio = time.time()
             
-            # Ler o arquivo
-            df = pd.read_excel(path)
-            progress.atualizar(40, f"Arquivo lido: {len(df)} linhas")
+            # Usar o cache se o arquivo já foi processado
+            df_limpo = cache_arquivos.obter(path, self.modelo)
             
-            # Processar com o modelo
-            progress.atualizar(60, "Processando dados...")
-            df_limpo = self.modelo.processar(df)
+            if df_limpo is None:
+                # Ler o arquivo
+                df = ler_excel(path)
+                progress.atualizar(40, f"Arquivo lido: {len(df)} linhas")
+                
+                # Processar com o modelo
+                progress.atualizar(60, "Processando dados...")
+                df_limpo = self.modelo.processar(df)
+                cache_arquivos.salvar(path, self.modelo, df_limpo)
             
             fim = time.time()
             self.tempo_processamento = fim - inicio
@@ -315,10 +330,10 @@ class TelaEntradas:
             return
         
         if self.resumo and hasattr(self.modelo, 'get_resumo'):
-            self.resumo.atualizar_conteudo(self.modelo.get_resumo(self.df_processed))
+            self.resumo.atualizar_conteudo(self.visao.resumo(self.modelo, self.df_processed))
         
-        if self.preview and hasattr(self.modelo, 'get_preview'):
-            self.preview.atualizar_conteudo(self.modelo.get_preview(self.df_processed, 20))
+        if self.preview and hasattr(self.modelo, 'get_opcoes_preview'):
+            self.preview.mostrar_tabela(self.df_processed, **self.modelo.get_opcoes_preview())
     
     def _limpar_dados(self):
         """Limpa os dados"""
@@ -337,7 +352,7 @@ class TelaEntradas:
         messagebox.showinfo("Limpo", "Dados limpos com sucesso!")
     
     def _export_file(self):
-        """Exporta para Excel"""
+        """Exporta para Excel, CSV, Parquet ou Feather"""
         if self.df_processed is None:
             return
         
@@ -347,15 +362,28 @@ class TelaEntradas:
         
         path = filedialog.asksaveasfilename(
             defaultextension=".xlsx",
-            filetypes=[("Excel", "*.xlsx")],
+            filetypes=tipos_arquivo_exportacao(),
             initialfile=nome
         )
         if path:
-            try:
-                self.df_processed.to_excel(path, index=False)
-                messagebox.showinfo("Sucesso", f"✅ Arquivo salvo em:\n{path}")
-            except Exception as e:
-                messagebox.showerror("Erro", f"Erro ao salvar:\n{e}")
+            executar_com_progresso(
+                self.frame,
+                self._exportar_thread,
+                "💾 Exportando Entradas",
+                f"Gravando {len(self.df_processed)} linhas...",
+                self.df_processed, path
+            )
+    
+    def _exportar_thread(self, progress, df_exportar, path):
+        """Versão em thread da exportação (progresso por bloco de linhas gravadas)"""
+        try:
+            exportar(df_exportar, path, nome_aba='Entradas',
+                     progresso=progress.etapa(0, 100, "Linhas gravadas: {feitos} de {total}"))
+            self.frame.after(0, lambda: messagebox.showinfo("Sucesso", f"✅ Arquivo salvo em:\n{path}"))
+        except Exception as e:
+            error(f"❌ Erro ao salvar: {e}")
+            self.frame.after(0, lambda msg=str(e): messagebox.showerror("Erro", f"Erro ao salvar:\n{msg}"))
+            raise
     
     def atualizar_cores(self, cores):
         """Atualiza as cores quando o tema muda"""
@@ -9,9 +9,12 @@ import os
 import time
 import pandas as pd
 
+from src.core.visao import VisaoRelatorio
 from src.utils.tooltip import criar_tooltip
 from src.ui.widgets import BlocoResumo, BlocoPreview
 from src.utils.config import LAYOUT
+from src.utils.helpers import formatar_br
+from src.utils.exportador import exportar, tipos_arquivo_exportacao
 from src.utils.logger import info, error, warning, debug
 from src.ui.progress_bar import ProgressBar, executar_com_progresso
 
@@ -25,10 +28,14 @@ class TelaResultado:
         
         self.df_processed = None
         self.df_filtrado = None
+        self.filtro_lojas = None
         self.modelo_atual = None
         self.tempo_processamento = None
         self.file_path = None
         
+        # Resumo e dados filtrados guardados por (versão dos dados, filtro)
+        self.visao = VisaoRelatorio(aplicar_filtro=self._filtrar_lojas)
+        
         self.frame = None
         self.btn_filtro = None
         self.btn_export = None
@@ -55,7 +62,7 @@ class TelaResultado:
         
         # Se já tiver dados, mostra eles novamente
         if self.df_processed is not None:
-            self._atualizar_resumo_preview(self.df_filtrado if self.df_filtrado is not None else self.df_processed)
+            self._atualizar_resumo_preview()
             self.btn_filtro.configure(state="normal")
             self.btn_export.configure(state="normal")
             if self.file_path:
@@ -296,7 +303,10 @@ class TelaResultado:
             self._process_file_thread,
             "📊 Processando Arquivo",
             "Identificando e processando dados...",
-            path
+            path,
+            ao_cancelar=lambda: self.status_label.configure(
+                text="⛔ Processamento cancelado", text_color="#ffff00"
+            )
         )
     
     def _process_file_thread(self, progress, path):
@@ -304,8 +314,12 @@ class TelaResultado:
         try:
             progress.atualizar(10, "Identificando modelo...")
             
-            # Identificar o modelo automaticamente
-            modelo, df = self.identificador.identificar(path)
+            # Identificar e processar o modelo automaticamente (usa o cache se o arquivo não mudou)
+            inicio = time.time()
+            modelo, df_limpo = self.identificador.carregar_processado(
+                path, progresso=progress.etapa(10, 80, "{detalhe}")
+            )
+            fim = time.time()
             
             if modelo is None:
                 self.frame.after(0, lambda: messagebox.showerror(
@@ -318,20 +332,13 @@ class TelaResultado:
                 ))
                 return
             
-            progress.atualizar(30, f"Modelo identificado: {modelo.nome}")
-            
-            # Processar com o modelo identificado
-            progress.atualizar(50, "Processando dados...")
-            inicio = time.time()
-            df_limpo = modelo.processar(df)
-            fim = time.time()
-            
             self.tempo_processamento = fim - inicio
             
-            progress.atualizar(80, "Calculando estatísticas...")
+            progress.atualizar(80, f"Modelo identificado: {modelo.nome}")
             
             self.df_processed = df_limpo
             self.df_filtrado = None
+            self.filtro_lojas = None
             self.modelo_atual = modelo
             self.file_path = path
             
@@ -356,7 +363,7 @@ class TelaResultado:
     
     def _atualizar_interface_apos_processar(self):
         """Atualiza a interface após o processamento"""
-        self._atualizar_resumo_preview(self.df_processed)
+        self._atualizar_resumo_preview()
         self.btn_filtro.configure(state="normal")
         self.btn_export.configure(state="normal")
         self.status_label.configure(text="✅ Processamento concluído!", text_color="#00ff00")
@@ -367,24 +374,34 @@ class TelaResultado:
             f"📊 Modelo: {self.modelo_atual.nome}"
         )
     
-    def _atualizar_resumo_preview(self, df_mostrar):
-        """Atualiza o resumo e preview com os dados fornecidos"""
+    def _filtrar_lojas(self, df, lojas):
+        """Linhas das lojas selecionadas"""
+        return df[df['Loja_Nome'].isin(lojas)].copy()
+    
+    def _atualizar_resumo_preview(self):
+        """
+        Atualiza o resumo e preview com os dados processados e o filtro atual.
+        Dados filtrados e texto do resumo vêm da visão: só são recalculados
+        quando os dados ou o filtro mudam.
+        """
+        self.df_filtrado = self.visao.dados(self.df_processed, self.filtro_lojas) if self.filtro_lojas else None
+        df_mostrar = self.df_filtrado if self.df_filtrado is not None else self.df_processed
         
         # Usar o método get_resumo do modelo
         if self.modelo_atual and hasattr(self.modelo_atual, 'get_resumo'):
-            resumo_texto = self.modelo_atual.get_resumo(df_mostrar)
-            self.resumo.atualizar_conteudo(resumo_texto)
+            resumo_texto = self.visao.resumo(self.modelo_atual, self.df_processed, self.filtro_lojas)
         else:
-            self._atualizar_resumo_padrao(df_mostrar)
+            resumo_texto = self.visao.calcular('resumo_padrao', self.df_processed, self.filtro_lojas,
+                                               self._texto_resumo_padrao)
+        self.resumo.atualizar_conteudo(resumo_texto)
         
-        # Usar o método get_preview do modelo
-        if self.modelo_atual and hasattr(self.modelo_atual, 'get_preview'):
-            preview_texto = self.modelo_atual.get_preview(df_mostrar, 20)
-            self.preview.atualizar_conteudo(preview_texto)
+        # Tabela virtual com todas as linhas (só as visíveis são formatadas)
+        if self.modelo_atual and hasattr(self.modelo_atual, 'get_opcoes_preview'):
+            self.preview.mostrar_tabela(df_mostrar, **self.modelo_atual.get_opcoes_preview())
         else:
             self._atualizar_preview_padrao(df_mostrar)
     
-    def _atualizar_resumo_padrao(self, df_mostrar):
+    def _texto_resumo_padrao(self, df_mostrar):
         """Resumo padrão caso o modelo não tenha o seu próprio"""
         resumo_lines = []
         
@@ -393,15 +410,15 @@ class TelaResultado:
         qtd_total = df_mostrar['Qtd'].sum() if 'Qtd' in df_mostrar.columns else 0
         fat_total = df_mostrar['Total R$'].sum() if 'Total R$' in df_mostrar.columns else 0
         
-        resumo_lines.append(f"📦 Total de produtos únicos: {self._formatar_br(num_produtos, 'inteiro')}")
-        resumo_lines.append(f"🏪 Total de lojas: {self._formatar_br(num_lojas, 'inteiro')}")
-        resumo_lines.append(f"📊 Quantidade total: {self._formatar_br(qtd_total, 'decimal_3')}")
-        resumo_lines.append(f"💰 Faturamento total: {self._formatar_br(fat_total, 'moeda')}")
+        resumo_lines.append(f"📦 Total de produtos únicos: {formatar_br(num_produtos, 'inteiro')}")
+        resumo_lines.append(f"🏪 Total de lojas: {formatar_br(num_lojas, 'inteiro')}")
+        resumo_lines.append(f"📊 Quantidade total: {formatar_br(qtd_total, 'decimal_3')}")
+        resumo_lines.append(f"💰 Faturamento total: {formatar_br(fat_total, 'moeda')}")
         
         if self.tempo_processamento:
             resumo_lines.append(f"⏱️ Tempo: {self.tempo_processamento:.2f} segundos")
         
-        self.resumo.atualizar_conteudo("\n".join(resumo_lines))
+        return "\n".join(resumo_lines)
     
     def _atualizar_preview_padrao(self, df_mostrar):
         """Preview padrão"""
@@ -418,40 +435,20 @@ class TelaResultado:
                 colunas.append(col)
         
         if colunas:
-            preview_df = df_mostrar[colunas].head(20).copy()
-            preview_lines.append(preview_df.to_string(index=False))
-        else:
-            preview_lines.append("Nenhuma coluna reconhecida para preview")
+            self.preview.mostrar_tabela(df_mostrar, colunas=colunas)
+            return
         
+        preview_lines.append("Nenhuma coluna reconhecida para preview")
         self.preview.atualizar_conteudo("\n".join(preview_lines))
     
-    def _formatar_br(self, valor, tipo='moeda'):
-        """Formata números no padrão brasileiro"""
-        if pd.isna(valor) or valor == '':
-            return ''
-        
-        try:
-            valor_float = float(valor)
-            
-            if tipo == 'moeda':
-                return f"R$ {valor_float:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-            elif tipo == 'inteiro':
-                return f"{int(valor_float)}"
-            elif tipo == 'decimal_3':
-                return f"{valor_float:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-            elif tipo == 'decimal_2':
-                return f"{valor_float:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-            else:
-                return str(valor_float).replace('.', ',')
-        except:
-            return str(valor)
-    
     def _limpar_dados(self):
         """Limpa todos os dados processados"""
         self.df_processed = None
         self.df_filtrado = None
+        self.filtro_lojas = None
         self.modelo_atual = None
         self.file_path = None
+        self.visao.limpar()
         self.entry_path.delete(0, "end")
         
         self.resumo.limpar()
@@ -471,14 +468,9 @@ class TelaResultado:
         from src.ui.filtro import JanelaFiltro
         
         def callback_filtro(lojas_selecionadas):
-            if lojas_selecionadas:
-                self.df_filtrado = self.df_processed[
-                    self.df_processed['Loja_Nome'].isin(lojas_selecionadas)
-                ].copy()
-                self._atualizar_resumo_preview(self.df_filtrado)
-            else:
-                self.df_filtrado = None
-                self._atualizar_resumo_preview(self.df_processed)
+            # Mesmo filtro de antes: dados e resumo saem do cache da visão
+            self.filtro_lojas = list(lojas_selecionadas) if lojas_selecionadas else None
+            self._atualizar_resumo_preview()
             
             self.btn_export.configure(state="normal")
         
@@ -492,7 +484,7 @@ class TelaResultado:
         )
     
     def _export_file(self):
-        """Exporta os dados para Excel"""
+        """Exporta os dados para Excel, CSV, Parquet ou Feather"""
         if self.df_processed is None:
             return
         
@@ -504,17 +496,30 @@ class TelaResultado:
         
         save_path = filedialog.asksaveasfilename(
             defaultextension=".xlsx",
-            filetypes=[("Excel", "*.xlsx")],
+            filetypes=tipos_arquivo_exportacao(),
             title="Salvar como",
             initialfile=nome_padrao
         )
         
         if save_path:
-            try:
-                df_exportar.to_excel(save_path, index=False)
-                messagebox.showinfo("Sucesso", f"✅ Arquivo salvo em:\n{save_path}")
-            except Exception as e:
-                messagebox.showerror("Erro", f"Erro ao salvar:\n{e}")
+            executar_com_progresso(
+                self.parent,
+                self._exportar_thread,
+                "💾 Exportando Arquivo",
+                f"Gravando {len(df_exportar)} linhas...",
+                df_exportar, save_path
+            )
+    
+    def _exportar_thread(self, progress, df_exportar, save_path):
+        """Versão em thread da exportação (progresso por bloco de linhas gravadas)"""
+        try:
+            exportar(df_exportar, save_path,
+                     progresso=progress.etapa(0, 100, "Linhas gravadas: {feitos} de {total}"))
+            self.frame.after(0, lambda: messagebox.showinfo("Sucesso", f"✅ Arquivo salvo em:\n{save_path}"))
+        except Exception as e:
+            error(f"❌ Erro ao salvar: {e}")
+            self.frame.after(0, lambda msg=str(e): messagebox.showerror("Erro", f"Erro ao salvar:\n{msg}"))
+            raise
     
     def atualizar_cores(self, cores):
         """Atualiza as cores quando o tema muda"""
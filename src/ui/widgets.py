@@ -3,7 +3,13 @@
 Widgets personalizados para a interface.
 """
 import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
 import customtkinter as ctk
+import numpy as np
+import pandas as pd
+from src.core.visao import versao
+from src.utils.helpers import formatar_br, formatar_br_serie
 
 class BlocoResumo:
     """Widget para exibir o resumo dos dados"""
@@ -66,6 +72,10 @@ class BlocoResumo:
             fg_color=self.cores['entrada']
         )
     
+    def atualizar_fonte(self, tamanho):
+        """Atualiza o tamanho da fonte do texto"""
+        self.textbox.configure(font=("Consolas", tamanho))
+    
     def atualizar_conteudo(self, conteudo):
         """Atualiza o texto do resumo"""
         self.textbox.delete('1.0', 'end')
@@ -135,6 +145,10 @@ class BlocoPreview:
         )
         self.scrollbar.pack(side='right', fill='y')
         self.textbox.configure(yscrollcommand=self.scrollbar.set)
+        
+        # Tabela para DataFrames (criada no primeiro uso)
+        self.tabela = None
+        self.tabela_visivel = False
     
     def pack(self, **kwargs):
         """Empacota o frame"""
@@ -152,17 +166,342 @@ class BlocoPreview:
             fg_color=self.cores['scrollbar'],
             button_color=self.cores['destaque']
         )
+        if self.tabela is not None:
+            self.tabela.atualizar_cores(cores)
+    
+    def atualizar_fonte(self, tamanho):
+        """Atualiza o tamanho da fonte do texto e da tabela"""
+        self.textbox.configure(font=("Consolas", tamanho - 1))
+        if self.tabela is not None:
+            self.tabela.atualizar_fonte(tamanho - 1)
+    
+    def _mostrar_texto(self):
+        """Volta a exibir a caixa de texto no lugar da tabela"""
+        if self.tabela_visivel:
+            self.tabela.limpar()
+            self.tabela.pack_forget()
+            self.scrollbar.pack(side='right', fill='y')
+            self.textbox.pack(side='left', fill='both', expand=True)
+            self.tabela_visivel = False
+        self.titulo.configure(text="📋 PRÉ-VISUALIZAÇÃO (20 primeiras linhas)")
     
     def atualizar_conteudo(self, conteudo):
         """Atualiza o texto do preview"""
+        self._mostrar_texto()
         self.textbox.delete('1.0', 'end')
         self.textbox.insert('1.0', conteudo)
     
+    def mostrar_tabela(self, df, colunas=None, formatos=None, titulos=None):
+        """
+        Exibe o DataFrame inteiro numa TabelaVirtual (rolagem e ordenação
+        por coluna), no lugar do texto.
+        
+        Args:
+            df: DataFrame
+            colunas: Colunas exibidas (padrão: todas)
+            formatos: dict coluna -> tipo de formatar_br
+            titulos: dict coluna -> texto do cabeçalho
+        """
+        if self.tabela is None:
+            self.tabela = TabelaVirtual(self.text_frame, self.cores)
+        if not self.tabela_visivel:
+            self.textbox.pack_forget()
+            self.scrollbar.pack_forget()
+            self.tabela.pack(fill='both', expand=True)
+            self.tabela_visivel = True
+        
+        self.tabela.mostrar(df, colunas=colunas, formatos=formatos, titulos=titulos)
+        self.titulo.configure(text=f"📋 PRÉ-VISUALIZAÇÃO ({len(df)} linhas)")
+    
     def limpar(self):
         """Limpa o conteúdo do preview"""
+        self._mostrar_texto()
         self.textbox.delete('1.0', 'end')
 
 
+class TabelaVirtual:
+    """
+    Tabela que mostra só as linhas visíveis de um DataFrame.
+    A Treeview tem apenas as linhas que cabem na tela; ao rolar, os mesmos
+    itens recebem os valores das próximas linhas. Cada célula é formatada
+    só quando aparece, então rolar e ordenar milhões de linhas não gera
+    texto para o que está fora da tela.
+    """
+    
+    # Linhas lidas para estimar a largura das colunas
+    AMOSTRA_LARGURA = 200
+    LARGURA_MAXIMA = 60
+    
+    def __init__(self, parent, cores, fonte=("Consolas", 10)):
+        """
+        Inicializa a tabela.
+        
+        Args:
+            parent: Widget pai
+            cores: Dicionário com as cores do tema
+            fonte: Fonte das células
+        """
+        self.parent = parent
+        self.cores = cores
+        self.fonte = fonte
+        
+        self.df = None
+        self.colunas = []
+        self.formatos = {}
+        self.ordem = None            # posições na ordem exibida (None = ordem original)
+        self.ordenacao = None        # (coluna, crescente)
+        self._ordens = {}            # cache de ordenações por (coluna, crescente)
+        self.inicio = 0              # primeira linha visível
+        self.visiveis = 1            # quantas linhas cabem na tela
+        self._itens = []
+        self._exibido = None         # (versão dos dados, colunas, formatos, títulos)
+        
+        self._criar_widget()
+    
+    def _criar_widget(self):
+        """Cria a Treeview e as barras de rolagem"""
+        self.frame = ctk.CTkFrame(self.parent, fg_color="transparent")
+        
+        self.estilo = ttk.Style(self.frame)
+        self.tree = ttk.Treeview(self.frame, show='headings', style="Virtual.Treeview", selectmode='browse')
+        
+        # Rolagem vertical é virtual: a barra representa o DataFrame inteiro
+        self.scroll_y = ctk.CTkScrollbar(self.frame, orientation='vertical', command=self._rolar_barra)
+        self.scroll_x = ctk.CTkScrollbar(self.frame, orientation='horizontal', command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.scroll_x.set)
+        
+        self.scroll_y.pack(side='right', fill='y')
+        self.scroll_x.pack(side='bottom', fill='x')
+        self.tree.pack(side='left', fill='both', expand=True)
+        
+        self.tree.bind("<Configure>", lambda e: self._ajustar_altura())
+        self.tree.bind("<MouseWheel>", lambda e: self.rolar(-1 * (e.delta // 120 or (1 if e.delta > 0 else -1)) * 3))
+        self.tree.bind("<Button-4>", lambda e: self.rolar(-3))
+        self.tree.bind("<Button-5>", lambda e: self.rolar(3))
+        self.tree.bind("<Prior>", lambda e: self.rolar(-self.visiveis))
+        self.tree.bind("<Next>", lambda e: self.rolar(self.visiveis))
+        self.tree.bind("<Home>", lambda e: self.ir_para(0))
+        self.tree.bind("<End>", lambda e: self.ir_para(self.total))
+        
+        self.atualizar_cores(self.cores)
+    
+    @property
+    def total(self):
+        """Quantidade de linhas do DataFrame exibido"""
+        return 0 if self.df is None else len(self.df)
+    
+    def pack(self, **kwargs):
+        """Empacota o frame"""
+        self.frame.pack(**kwargs)
+    
+    def pack_forget(self):
+        """Esconde a tabela"""
+        self.frame.pack_forget()
+    
+    def atualizar_cores(self, cores):
+        """Atualiza as cores da tabela"""
+        self.cores = cores
+        self.estilo.configure(
+            "Virtual.Treeview",
+            background=cores['entrada'],
+            fieldbackground=cores['entrada'],
+            foreground=cores['texto'],
+            font=self.fonte,
+            rowheight=tkfont.Font(font=self.fonte).metrics('linespace') + 4
+        )
+        self.estilo.configure(
+            "Virtual.Treeview.Heading",
+            background=cores['menu'],
+            foreground=cores['texto'],
+            font=(self.fonte[0], self.fonte[1], "bold")
+        )
+        self.estilo.map("Virtual.Treeview", background=[('selected', cores['destaque'])])
+        for barra in (self.scroll_y, self.scroll_x):
+            barra.configure(fg_color=cores['scrollbar'], button_color=cores['destaque'])
+    
+    def atualizar_fonte(self, tamanho):
+        """Atualiza o tamanho da fonte (e a altura das linhas)"""
+        self.fonte = (self.fonte[0], tamanho)
+        self.atualizar_cores(self.cores)
+        self._ajustar_altura()
+    
+    def mostrar(self, df, colunas=None, formatos=None, titulos=None):
+        """
+        Exibe um DataFrame (sem copiá-lo).
+        
+        Args:
+            df: DataFrame
+            colunas: Colunas exibidas (padrão: todas)
+            formatos: dict coluna -> tipo de formatar_br ('inteiro', 'moeda'...)
+            titulos: dict coluna -> texto do cabeçalho
+        """
+        # Mesmos dados e opções: mantém posição, ordenação e larguras
+        exibido = (versao(df), colunas, formatos, titulos)
+        if self.df is df and exibido == self._exibido:
+            self._desenhar()
+            return
+        self._exibido = exibido
+        
+        self.df = df
+        self.colunas = [c for c in (colunas or list(df.columns)) if c in df.columns]
+        self.formatos = formatos or {}
+        self.titulos = titulos or {}
+        self.ordem = None
+        self.ordenacao = None
+        self._ordens = {}
+        self.inicio = 0
+        
+        ids = [f"c{i}" for i in range(len(self.colunas))]
+        self.tree.configure(columns=ids, displaycolumns=ids)
+        medida = tkfont.Font(font=self.fonte)
+        larguras = self._larguras()
+        for id_coluna, coluna in zip(ids, self.colunas):
+            self.tree.heading(id_coluna, text=self._titulo(coluna), command=lambda c=coluna: self.ordenar(c))
+            self.tree.column(id_coluna, width=medida.measure("0" * larguras[coluna]) + 16,
+                             minwidth=40, stretch=False, anchor='w')
+        
+        self._desenhar()
+    
+    def limpar(self):
+        """Remove os dados da tabela"""
+        self.df = None
+        self._exibido = None
+        self.colunas = []
+        self.ordem = None
+        self._ordens = {}
+        self.tree.delete(*self._itens)
+        self._itens = []
+        self.tree.configure(columns=[])
+        self.scroll_y.set(0, 1)
+    
+    def _titulo(self, coluna):
+        """Cabeçalho da coluna, com a seta da ordenação atual"""
+        texto = str(self.titulos.get(coluna, coluna))
+        if self.ordenacao and self.ordenacao[0] == coluna:
+            texto += " ▲" if self.ordenacao[1] else " ▼"
+        return texto
+    
+    def _larguras(self):
+        """Largura (em caracteres) de cada coluna, pelo cabeçalho e por uma amostra"""
+        amostra = self._linhas(range(min(self.AMOSTRA_LARGURA, self.total)))
+        larguras = {}
+        for j, coluna in enumerate(self.colunas):
+            maior = max((len(linha[j]) for linha in amostra), default=0)
+            larguras[coluna] = min(self.LARGURA_MAXIMA, max(len(self._titulo(coluna)) + 2, maior))
+        return larguras
+    
+    def _formatar(self, valor):
+        """Texto de uma célula sem formato numérico"""
+        if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+            return ""
+        if isinstance(valor, pd.Timestamp):
+            return valor.strftime('%d/%m/%Y')
+        if isinstance(valor, float):
+            return formatar_br(valor, None)
+        return str(valor)
+    
+    def _linhas(self, posicoes):
+        """Textos das linhas pedidas (posições na ordem exibida)"""
+        posicoes = np.asarray(posicoes, dtype=np.int64)
+        if self.ordem is not None:
+            posicoes = self.ordem[posicoes]
+        bloco = self.df.iloc[posicoes]
+        return list(zip(*(self._textos_coluna(bloco[coluna], coluna) for coluna in self.colunas)))
+    
+    def _textos_coluna(self, serie, coluna):
+        """Textos de uma coluna do bloco (numéricas formatadas de uma vez)"""
+        tipo = self.formatos.get(coluna)
+        if tipo or pd.api.types.is_float_dtype(serie):
+            return formatar_br_serie(serie, tipo).tolist()
+        return [self._formatar(v) for v in serie.tolist()]
+    
+    def _desenhar(self):
+        """Preenche os itens da Treeview com as linhas visíveis"""
+        if self.df is None:
+            return
+        
+        self.inicio = max(0, min(self.inicio, self.total - self.visiveis))
+        fim = min(self.total, self.inicio + self.visiveis)
+        linhas = self._linhas(range(self.inicio, fim))
+        
+        # Reaproveita os itens existentes; cria ou remove só a diferença
+        while len(self._itens) < len(linhas):
+            self._itens.append(self.tree.insert('', 'end'))
+        if len(self._itens) > len(linhas):
+            self.tree.delete(*self._itens[len(linhas):])
+            del self._itens[len(linhas):]
+        for item, valores in zip(self._itens, linhas):
+            self.tree.item(item, values=valores)
+        
+        if self.total:
+            self.scroll_y.set(self.inicio / self.total, fim / self.total)
+        else:
+            self.scroll_y.set(0, 1)
+    
+    def _ajustar_altura(self):
+        """Recalcula quantas linhas cabem na área visível"""
+        altura_linha = tkfont.Font(font=self.fonte).metrics('linespace') + 4
+        # Desconta o cabeçalho (aproximadamente uma linha e meia)
+        visiveis = max(1, int(self.tree.winfo_height() / altura_linha - 1.5))
+        if visiveis != self.visiveis:
+            self.visiveis = visiveis
+            self._desenhar()
+    
+    def rolar(self, linhas):
+        """Rola a tabela algumas linhas (negativo = para cima)"""
+        self.ir_para(self.inicio + linhas)
+        return "break"
+    
+    def ir_para(self, linha):
+        """Mostra a partir da linha informada"""
+        if self.df is None:
+            return "break"
+        inicio = max(0, min(int(linha), self.total - self.visiveis))
+        if inicio != self.inicio:
+            self.inicio = inicio
+            self._desenhar()
+        return "break"
+    
+    def _rolar_barra(self, acao, quantidade, unidade=None):
+        """Comando da barra de rolagem vertical (moveto/scroll)"""
+        if acao == 'moveto':
+            self.ir_para(float(quantidade) * self.total)
+        elif acao == 'scroll':
+            passo = self.visiveis if unidade == 'pages' else 1
+            self.rolar(int(quantidade) * passo)
+    
+    def _ordem_coluna(self, coluna, crescente):
+        """Posições do DataFrame ordenadas pela coluna (vazios no fim), em cache"""
+        chave = (coluna, crescente)
+        if chave not in self._ordens:
+            serie = pd.Series(self.df[coluna].values)
+            try:
+                ordenada = serie.sort_values(ascending=crescente, kind='stable', na_position='last')
+            except TypeError:
+                # Tipos misturados: ordena pelo texto
+                ordenada = serie.astype(str).where(serie.notna()).sort_values(
+                    ascending=crescente, kind='stable', na_position='last')
+            self._ordens[chave] = ordenada.index.to_numpy()
+        return self._ordens[chave]
+    
+    def ordenar(self, coluna, crescente=None):
+        """
+        Ordena a exibição pela coluna (o DataFrame não é alterado).
+        Sem informar a direção, alterna entre crescente e decrescente.
+        """
+        if self.df is None or coluna not in self.colunas:
+            return
+        if crescente is None:
+            crescente = not (self.ordenacao and self.ordenacao[0] == coluna and self.ordenacao[1])
+        
+        self.ordem = self._ordem_coluna(coluna, crescente)
+        self.ordenacao = (coluna, crescente)
+        for j, c in enumerate(self.colunas):
+            self.tree.heading(f"c{j}", text=self._titulo(c))
+        self.inicio = 0
+        self._desenhar()
+
+
 class BarraStatus:
     """Widget para barra de status inferior"""
     
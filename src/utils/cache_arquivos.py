@@ -0,0 +1,207 @@
+# src/utils/cache_arquivos.py
+"""
+Cache em disco dos DataFrames já processados.
+Chave: hash do conteúdo do arquivo + nome do modelo + versão do parser.
+Os dados ficam em ~/.kpy_automate/cache/arquivos em Parquet e os arquivos
+menos usados recentemente (só os desta pasta) são removidos ao passar do
+limite. Sem o pyarrow o
+cache fica desligado (os arquivos são sempre processados).
+"""
+import importlib.util
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import pandas as pd
+from src.utils.logger import info, warning, debug
+
+LIMITE_PADRAO_MB = 1024
+
+# Quantos hashes de arquivo ficam em memória (um por arquivo/mtime/tamanho)
+LIMITE_HASHES = 256
+
+# Nomes dos arquivos do cache: <hash>_<modelo>_v<versão>.parquet (e .<pid>.tmp ao salvar)
+_NOME_ENTRADA = re.compile(r'^[0-9a-f]{32}_\w+_v\d+(\.parquet|\.\d+\.tmp)$')
+
+
+class CacheArquivos:
+    """Gerencia o cache de arquivos processados (singleton)"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._inicializar()
+        return cls._instance
+
+    def _inicializar(self):
+        """Define a pasta do cache e o limite de tamanho"""
+        # Subpasta própria: a pasta cache também guarda outros arquivos
+        # (ex: snapshot da média de vendas) que o LRU não pode apagar
+        self.pasta = Path.home() / ".kpy_automate" / "cache" / "arquivos"
+        self._hashes = OrderedDict()
+        self._lock = threading.Lock()
+        self._lock_hashes = threading.Lock()
+
+        try:
+            from src.utils.config_manager import config
+            self.limite_bytes = int(config.get('cache_limite_mb', LIMITE_PADRAO_MB)) * 1024 * 1024
+            self.ativo = bool(config.get('cache_ativo', True))
+        except Exception:
+            self.limite_bytes = LIMITE_PADRAO_MB * 1024 * 1024
+            self.ativo = True
+
+        if self.ativo and importlib.util.find_spec('pyarrow') is None:
+            debug("Cache de arquivos desligado: pyarrow não instalado (sem Parquet)")
+            self.ativo = False
+
+    def hash_arquivo(self, caminho):
+        """
+        Calcula o hash do conteúdo do arquivo.
+        O resultado fica em memória enquanto o arquivo não mudar (mtime/tamanho),
+        guardando só os LIMITE_HASHES usados mais recentemente.
+        """
+        stat = os.stat(caminho)
+        chave_memoria = (os.path.abspath(caminho), stat.st_mtime_ns, stat.st_size)
+
+        with self._lock_hashes:
+            resultado = self._hashes.get(chave_memoria)
+            if resultado is not None:
+                self._hashes.move_to_end(chave_memoria)
+                return resultado
+
+        h = hashlib.blake2b(digest_size=16)
+        with open(caminho, 'rb') as f:
+            for bloco in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(bloco)
+        resultado = h.hexdigest()
+
+        with self._lock_hashes:
+            self._hashes[chave_memoria] = resultado
+            self._hashes.move_to_end(chave_memoria)
+            while len(self._hashes) > LIMITE_HASHES:
+                self._hashes.popitem(last=False)
+        return resultado
+
+    def _chave(self, caminho, modelo):
+        """Monta a chave do cache para o arquivo e o modelo"""
+        nome_modelo = re.sub(r'[^A-Za-z0-9]+', '_', modelo.nome).strip('_').lower()
+        versao = getattr(modelo, 'versao_parser', 1)
+        return f"{self.hash_arquivo(caminho)}_{nome_modelo}_v{versao}"
+
+    def _arquivo_da_chave(self, chave):
+        """Caminho do Parquet da chave"""
+        return self.pasta / f"{chave}.parquet"
+
+    def obter(self, caminho, modelo):
+        """
+        Retorna o DataFrame processado do cache ou None se não existir.
+
+        Args:
+            caminho: Caminho do arquivo original
+            modelo: Modelo que processa o arquivo
+
+        Returns:
+            DataFrame or None
+        """
+        if not self.ativo:
+            return None
+
+        try:
+            inicio = time.perf_counter()
+            arquivo = self._arquivo_da_chave(self._chave(caminho, modelo))
+
+            if arquivo.exists():
+                df = pd.read_parquet(arquivo)
+
+                # Marca como usado recentemente (LRU)
+                os.utime(arquivo, None)
+
+                ms = (time.perf_counter() - inicio) * 1000
+                info(f"⚡ Cache: {os.path.basename(caminho)} ({modelo.nome}) em {ms:.0f} ms")
+                return df
+
+            debug(f"Cache sem entrada para {caminho} ({modelo.nome})")
+            return None
+
+        except Exception as e:
+            warning(f"⚠️ Erro ao ler cache de {caminho}: {e}")
+            return None
+
+    def salvar(self, caminho, modelo, df):
+        """
+        Salva o DataFrame processado no cache.
+
+        Args:
+            caminho: Caminho do arquivo original
+            modelo: Modelo que processou o arquivo
+            df: DataFrame processado
+
+        Returns:
+            bool: True se salvou
+        """
+        if not self.ativo or df is None or len(df) == 0:
+            return False
+
+        try:
+            self.pasta.mkdir(parents=True, exist_ok=True)
+            chave = self._chave(caminho, modelo)
+            destino = self._arquivo_da_chave(chave)
+
+            with self._lock:
+                temporario = self.pasta / f"{chave}.{os.getpid()}.tmp"
+                try:
+                    df.to_parquet(temporario, index=False)
+                except Exception:
+                    # Tabela que o Parquet não aceita: fica sem cache
+                    temporario.unlink(missing_ok=True)
+                    raise
+
+                os.replace(temporario, destino)
+                info(f"💾 Cache salvo: {destino.name}")
+                self._remover_excedente()
+            return True
+
+        except Exception as e:
+            warning(f"⚠️ Erro ao salvar cache de {caminho}: {e}")
+            return False
+
+    def _entradas(self, sufixos):
+        """Arquivos da pasta que são entradas deste cache, com os sufixos pedidos"""
+        return [a for a in self.pasta.iterdir()
+                if a.suffix in sufixos and _NOME_ENTRADA.match(a.name)]
+
+    def _remover_excedente(self):
+        """Remove as entradas menos usadas até caber no limite (LRU)"""
+        arquivos = self._entradas(('.parquet',))
+        stats = {a: a.stat() for a in arquivos}
+        total = sum(s.st_size for s in stats.values())
+
+        for arquivo in sorted(arquivos, key=lambda a: stats[a].st_mtime):
+            if total <= self.limite_bytes:
+                break
+            try:
+                arquivo.unlink()
+                total -= stats[arquivo].st_size
+                info(f"🗑️ Cache removido (LRU): {arquivo.name}")
+            except OSError:
+                pass
+
+    def limpar(self):
+        """Remove todas as entradas do cache"""
+        if not self.pasta.exists():
+            return
+        for arquivo in self._entradas(('.parquet', '.tmp')):
+            try:
+                arquivo.unlink()
+            except OSError:
+                pass
+        with self._lock_hashes:
+            self._hashes.clear()
+
+# Singleton
+cache_arquivos = CacheArquivos()
@@ -0,0 +1,38 @@
+# src/utils/cancelamento.py
+"""
+Cancelamento cooperativo de operações longas (carga, processamento,
+exportação). A interface marca o token; o trabalho em andamento confere o
+token nos pontos seguros (entre estágios, entre blocos de linhas) e para
+com OperacaoCancelada, sem deixar estado pela metade.
+"""
+import threading
+
+
+class OperacaoCancelada(BaseException):
+    """
+    Operação interrompida pelo usuário.
+
+    Herda de BaseException (como KeyboardInterrupt) para não ser engolida
+    pelos "except Exception" que tratam erros de leitura e processamento.
+    """
+
+
+class TokenCancelamento:
+    """Sinal de cancelamento compartilhado entre a interface e a thread de trabalho"""
+
+    def __init__(self):
+        self._evento = threading.Event()
+
+    def cancelar(self):
+        """Pede o cancelamento (pode ser chamado de qualquer thread)"""
+        self._evento.set()
+
+    @property
+    def cancelado(self):
+        """True se o cancelamento foi pedido"""
+        return self._evento.is_set()
+
+    def verificar(self):
+        """Interrompe com OperacaoCancelada se o cancelamento foi pedido"""
+        if self._evento.is_set():
+            raise OperacaoCancelada()
@@ -0,0 +1,78 @@
+# src/utils/chaves.py
+"""
+Chaves compostas (código, loja) para cruzar relatórios sem montar strings.
+Os nomes de loja de todos os DataFrames envolvidos são fatorados uma única
+vez num dicionário compartilhado e cada par vira um único int64:
+    chave = código * (nº de lojas + 1) + id da loja
+"""
+import numpy as np
+import pandas as pd
+
+
+def _texto_lojas(lojas):
+    """Nome da loja como texto (vazio/NaN viram "nan", como str(valor))"""
+    lojas = pd.Series(lojas).astype(object)
+    return lojas.where(lojas.notna(), 'nan').astype(str)
+
+
+class ChavesLojaProduto:
+    """Dicionário de lojas compartilhado e geração de chaves (código, loja)"""
+
+    def __init__(self, *colunas_lojas):
+        """
+        Args:
+            *colunas_lojas: Colunas com nomes de loja de cada DataFrame
+                (None é ignorado)
+        """
+        nomes = [_texto_lojas(c) for c in colunas_lojas if c is not None]
+        todas = pd.concat(nomes, ignore_index=True) if nomes else pd.Series([], dtype=str)
+        _, self.lojas = pd.factorize(todas)
+        self.lojas = pd.Index(self.lojas)
+        # id 0 fica reservado para loja desconhecida
+        self.fator = len(self.lojas) + 1
+
+    def contem(self, *colunas_lojas):
+        """
+        Verifica se todas as lojas das colunas já estão no dicionário.
+
+        Args:
+            *colunas_lojas: Colunas com nomes de loja (None é ignorado)
+
+        Returns:
+            bool: True se nenhuma loja é nova
+        """
+        for coluna in colunas_lojas:
+            if coluna is None:
+                continue
+            unicas = _texto_lojas(pd.unique(pd.Series(coluna).astype(object)))
+            if (self.lojas.get_indexer(unicas) < 0).any():
+                return False
+        return True
+
+    def ids(self, lojas):
+        """
+        Retorna o id (1..n) de cada loja, 0 se não estiver no dicionário.
+
+        Args:
+            lojas: Coluna com nomes de loja
+
+        Returns:
+            np.ndarray: ids int64
+        """
+        return self.lojas.get_indexer(_texto_lojas(lojas)).astype(np.int64) + 1
+
+    def chave(self, codigos, lojas):
+        """
+        Monta a chave int64 de cada par (código, loja).
+
+        Args:
+            codigos: Códigos já normalizados (inteiros)
+            lojas: Coluna com nomes de loja
+
+        Returns:
+            np.ndarray: Chaves int64
+        """
+        codigos = np.asarray(codigos, dtype=np.int64)
+        if len(codigos) and np.abs(codigos).max() >= np.iinfo(np.int64).max // self.fator:
+            raise ValueError("Código de produto grande demais para a chave (código, loja)")
+        return codigos * self.fator + self.ids(lojas)
@@ -0,0 +1,79 @@
+# src/utils/codigos.py
+"""
+Normalização de códigos de produto para todos os modelos.
+Trabalha sobre a coluna inteira (sem percorrer linha a linha) e devolve
+uma chave inteira compacta, usada nos cruzamentos entre relatórios:
+  - "00123", "123", 123, 123.0, "123.45" e "123,45" -> 123
+  - vazio, NaN, zero ou texto que não é número -> 0 (sem código)
+"""
+import numpy as np
+import pandas as pd
+
+SEM_CODIGO = 0
+
+# Maior valor que cabe em int64 sem perda
+_LIMITE_INT64 = 2 ** 63 - 1024
+
+
+def _inteiros(valores):
+    """Trunca floats para int64 (NaN, infinito e fora da faixa viram SEM_CODIGO)"""
+    valores = np.asarray(valores, dtype=float)
+    validos = np.isfinite(valores) & (np.abs(valores) < _LIMITE_INT64)
+    return np.where(validos, np.trunc(np.where(validos, valores, 0)), SEM_CODIGO).astype(np.int64)
+
+
+def normalizar_codigos(serie):
+    """
+    Normaliza uma coluna de códigos: remove a parte decimal e os zeros
+    à esquerda e converte para inteiro.
+
+    Args:
+        serie: Series (ou sequência) com os códigos
+
+    Returns:
+        Series: Códigos como int64 (0 quando não há código válido)
+    """
+    if not isinstance(serie, pd.Series):
+        serie = pd.Series(serie)
+
+    if pd.api.types.is_bool_dtype(serie):
+        serie = serie.astype(float)
+
+    if pd.api.types.is_integer_dtype(serie):
+        valores = serie.fillna(SEM_CODIGO).astype(np.int64).values
+    elif pd.api.types.is_numeric_dtype(serie):
+        valores = _inteiros(serie.astype(float).values)
+    else:
+        # Caminho rápido: o que já é número (inclusive "00123" e "123.0")
+        numeros = pd.to_numeric(serie, errors='coerce')
+        falhou = (numeros.isna() & serie.notna()).values
+
+        # O restante passa pelo tratamento de texto (espaços e sufixo decimal com "." ou ",")
+        if falhou.any():
+            texto = serie[falhou].astype(str).str.strip().str.replace(',', '.', regex=False)
+            texto = texto.str.split('.', n=1).str[0]
+            numeros = numeros.astype(float)
+            numeros[falhou] = pd.to_numeric(texto, errors='coerce').astype(float).values
+
+        valores = _inteiros(numeros.astype(float).values)
+
+    return pd.Series(valores, index=serie.index, name=serie.name)
+
+
+def normalizar_codigo(codigo):
+    """
+    Normaliza um único código (mesmas regras de normalizar_codigos).
+
+    Args:
+        codigo: Código do produto
+
+    Returns:
+        int: Código normalizado (0 quando não há código válido)
+    """
+    # Caminho rápido para números (o caso comum nas buscas individuais)
+    if isinstance(codigo, (int, np.integer)) and not isinstance(codigo, (bool, np.bool_)):
+        return int(codigo)
+    if isinstance(codigo, (float, np.floating)):
+        return int(_inteiros([codigo])[0])
+
+    return int(normalizar_codigos(pd.Series([codigo], dtype=object)).iloc[0])
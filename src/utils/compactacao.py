@@ -0,0 +1,108 @@
+# src/utils/compactacao.py
+"""
+Compactação de tipos dos DataFrames processados.
+  - Texto com poucos valores distintos (loja, categoria, status...) -> category
+  - Inteiros (códigos) -> int32 quando cabem
+  - Floats (estoque, quantidade) -> float32 somente quando a conversão não
+    altera nenhum valor, para não mudar cálculos nem a formatação
+"""
+import numpy as np
+import pandas as pd
+
+# Texto vira category quando tem no máximo essa fração de valores distintos
+FRACAO_CATEGORIA = 0.5
+
+# Acima dessa quantidade de linhas, o tamanho das strings é estimado por amostra
+LINHAS_AMOSTRA_MEMORIA = 100_000
+
+
+def _eh_coluna_texto(serie):
+    """Colunas object/str (as únicas em que medir o conteúdo é caro)"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return False
+    return pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)
+
+
+def memoria_mb(df, amostra=LINHAS_AMOSTRA_MEMORIA):
+    """
+    Memória ocupada pelo DataFrame (incluindo o conteúdo das strings).
+    Em DataFrames grandes, o conteúdo das colunas de texto é estimado por
+    uma amostra de linhas espaçadas (medir string por string leva segundos
+    a cada milhão de linhas); as demais colunas são medidas exatamente.
+
+    Args:
+        df: DataFrame
+        amostra: Linhas da amostra (None mede tudo)
+
+    Returns:
+        float: Tamanho em MB
+    """
+    if df is None:
+        return 0.0
+    if not amostra or len(df) <= amostra:
+        return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+    linhas = df.iloc[::-(-len(df) // amostra)]
+    escala = len(df) / len(linhas)
+    total = df.index.memory_usage(deep=True)
+    for i in range(df.shape[1]):
+        serie = df.iloc[:, i]
+        if _eh_coluna_texto(serie):
+            total += linhas.iloc[:, i].memory_usage(deep=True, index=False) * escala
+        else:
+            total += serie.memory_usage(deep=True, index=False)
+    return total / (1024 * 1024)
+
+
+def _eh_texto(serie):
+    """Verifica se a coluna só tem strings (além de nulos)"""
+    if not (pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)):
+        return False
+    return pd.api.types.infer_dtype(serie, skipna=True) in ('string', 'empty')
+
+
+def _float32_sem_perda(serie):
+    """Verifica se todos os valores se mantêm iguais em float32"""
+    valores = serie.values
+    convertidos = valores.astype(np.float32).astype(np.float64)
+    return bool(np.array_equal(valores, convertidos, equal_nan=True))
+
+
+def compactar_tipos(df):
+    """
+    Converte as colunas para os tipos mais compactos sem perder informação.
+
+    Args:
+        df: DataFrame processado
+
+    Returns:
+        DataFrame: DataFrame com os tipos compactados
+    """
+    if df is None or len(df) == 0:
+        return df
+
+    df = df.copy(deep=False)
+    limite_categorias = max(1, int(len(df) * FRACAO_CATEGORIA))
+    info32 = np.iinfo(np.int32)
+
+    # Acesso por posição: planilhas podem trazer colunas com nomes repetidos
+    for i in range(df.shape[1]):
+        serie = df.iloc[:, i]
+
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            continue
+
+        if _eh_texto(serie):
+            if serie.nunique(dropna=True) <= limite_categorias:
+                df.isetitem(i, serie.astype('category'))
+
+        elif pd.api.types.is_integer_dtype(serie) and serie.dtype.itemsize > 4 \
+                and not pd.api.types.is_extension_array_dtype(serie):
+            if serie.min() >= info32.min and serie.max() <= info32.max:
+                df.isetitem(i, serie.astype(np.int32))
+
+        elif pd.api.types.is_float_dtype(serie) and serie.dtype == np.float64:
+            if _float32_sem_perda(serie):
+                df.isetitem(i, serie.astype(np.float32))
+
+    return df
@@ -0,0 +1,374 @@
+# src/utils/exportador.py
+"""
+Exportação de DataFrames em streaming (memória constante).
+Excel: xlsxwriter no modo constant_memory (cada linha vai para o disco assim
+que é escrita); as colunas são convertidas em blocos de linhas, uma vez por
+coluna, e a largura das colunas é calculada a partir de uma amostra.
+Formatos rápidos para BI/scripts: CSV em blocos (padrão brasileiro, ";"),
+Parquet e Feather (esses dois dependem do pyarrow).
+"""
+import importlib.util
+import os
+import contextlib
+import re
+import time
+import uuid
+import numpy as np
+import pandas as pd
+import xlsxwriter
+from src.utils.cancelamento import OperacaoCancelada
+from src.utils.logger import info
+
+# Linhas convertidas por vez
+TAMANHO_BLOCO = 50_000
+
+# Limites de uma planilha do Excel
+LIMITE_LINHAS_EXCEL = 1_048_576
+LIMITE_COLUNAS_EXCEL = 16_384
+
+# Linhas de dados por aba (o cabeçalho ocupa uma linha de cada aba)
+LINHAS_POR_ABA = LIMITE_LINHAS_EXCEL - 1
+
+# Linhas usadas para estimar a largura das colunas
+LINHAS_AMOSTRA = 1000
+
+LARGURA_MINIMA = 8
+LARGURA_MAXIMA = 50
+
+# Formatos das células de data (padrão brasileiro)
+_FORMATO_DATA = 'dd/mm/yyyy'
+_FORMATO_DATA_HORA = 'dd/mm/yyyy hh:mm:ss'
+
+
+def calcular_larguras(df, linhas_amostra=LINHAS_AMOSTRA):
+    """
+    Calcula a largura de cada coluna a partir do cabeçalho e de uma amostra.
+
+    Args:
+        df: DataFrame
+        linhas_amostra: Quantidade de linhas da amostra
+
+    Returns:
+        list: Largura de cada coluna
+    """
+    amostra = df.head(linhas_amostra)
+    larguras = []
+    for i, coluna in enumerate(df.columns):
+        maior = amostra.iloc[:, i].astype(object).astype(str).str.len().max() if len(amostra) else 0
+        maior = 0 if pd.isna(maior) else int(maior)
+        largura = max(maior, len(str(coluna))) + 2
+        larguras.append(min(max(largura, LARGURA_MINIMA), LARGURA_MAXIMA))
+    return larguras
+
+
+def _eh_numero(valor):
+    """Número solto (int/float, mas não bool) em uma coluna de texto"""
+    return isinstance(valor, (int, float, np.integer, np.floating)) and not isinstance(valor, (bool, np.bool_))
+
+
+def _numeros(valores):
+    """Lista de floats/ints com None no lugar de NaN e infinito (célula vazia)"""
+    valores = np.asarray(valores)
+    if valores.dtype.kind == 'f':
+        lista = valores.tolist()
+        return [v if v - v == 0 else None for v in lista]
+    return valores.tolist()
+
+
+def _escrever_misto(planilha):
+    """Escritor de colunas de texto: números soltos continuam como número"""
+    def escrever(linha, coluna, valor):
+        if isinstance(valor, str):
+            planilha.write_string(linha, coluna, valor)
+        else:
+            planilha.write_number(linha, coluna, valor)
+    return escrever
+
+
+def _coluna_para_escrita(serie, planilha, formatos):
+    """
+    Converte uma coluna (bloco de linhas) para a escrita célula a célula.
+
+    Args:
+        serie: Coluna do bloco
+        planilha: Worksheet do xlsxwriter
+        formatos: dict com os formatos 'data' e 'data_hora'
+
+    Returns:
+        tuple: (valores com None nas células vazias, função escrever(linha, coluna, valor))
+    """
+    nulos = serie.isna().values
+
+    if pd.api.types.is_bool_dtype(serie):
+        valores = serie.astype(object).tolist()
+        escrever = planilha.write_boolean
+
+    elif pd.api.types.is_numeric_dtype(serie) and not isinstance(serie.dtype, pd.CategoricalDtype):
+        if serie.dtype == np.float32:
+            # Sai com as casas que aparecem no float32 (sem dígitos espúrios)
+            numeros = serie.to_numpy().astype(str).astype(np.float64)
+        elif serie.hasnans:
+            numeros = serie.to_numpy(dtype=float, na_value=np.nan)
+        else:
+            numeros = serie.to_numpy()
+        valores = _numeros(numeros)
+        escrever = planilha.write_number
+
+    elif pd.api.types.is_datetime64_any_dtype(serie):
+        datas = serie.dt.tz_localize(None) if getattr(serie.dt, 'tz', None) is not None else serie
+        validas = datas.dropna()
+        com_hora = bool((validas != validas.dt.normalize()).any())
+        formato = formatos['data_hora' if com_hora else 'data']
+        valores = list(datas.dt.to_pydatetime())
+        escrever = lambda linha, coluna, valor: planilha.write_datetime(linha, coluna, valor, formato)
+
+    else:
+        # Cada valor distinto é convertido uma única vez (lojas, categorias, produtos...)
+        codigos, distintos = pd.factorize(serie, use_na_sentinel=True)
+        convertidos = [v if _eh_numero(v) else str(v) for v in np.asarray(distintos, dtype=object)]
+        convertidos = [None if isinstance(v, float) and v - v != 0 else v for v in convertidos]
+        convertidos.append(None)
+        valores = [convertidos[i] for i in codigos.tolist()]
+        escrever = _escrever_misto(planilha)
+
+    if nulos.any():
+        valores = [None if nulo else v for v, nulo in zip(valores, nulos.tolist())]
+    return valores, escrever
+
+
+def _escrever_bloco(bloco, planilha, linha_inicial, formatos):
+    """Escreve um bloco de linhas em ordem (exigência do constant_memory)"""
+    colunas = [_coluna_para_escrita(bloco.iloc[:, i], planilha, formatos) for i in range(bloco.shape[1])]
+    for deslocamento in range(len(bloco)):
+        linha = linha_inicial + deslocamento
+        for coluna, (valores, escrever) in enumerate(colunas):
+            valor = valores[deslocamento]
+            if valor is not None:
+                escrever(linha, coluna, valor)
+
+
+@contextlib.contextmanager
+def _arquivo_temporario(caminho):
+    """
+    Caminho temporário na mesma pasta do destino. Se a gravação termina
+    sem erro, o temporário substitui o destino (os.replace); com erro ou
+    cancelamento ele é apagado e o arquivo que já existia fica intacto.
+    """
+    pasta, nome = os.path.split(os.path.abspath(str(caminho)))
+    temporario = os.path.join(pasta, f".~{uuid.uuid4().hex[:8]}_{nome}")
+    try:
+        yield temporario
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def _nome_aba(nome, sufixo=''):
+    """Nome de aba válido no Excel (até 31 caracteres com o sufixo, sem []:*?/\\)"""
+    return re.sub(r'[\[\]:*?/\\]', '_', str(nome or 'Dados'))[:31 - len(sufixo)] + sufixo
+
+
+def exportar_excel(df, caminho, nome_aba='Dados', progresso=None):
+    """
+    Exporta o DataFrame para .xlsx sem montar a planilha inteira em memória.
+    O cabeçalho fica em negrito e congelado e as larguras vêm de uma amostra.
+    Acima do limite do Excel (LINHAS_POR_ABA linhas de dados por aba) as
+    linhas continuam em novas abas: "Dados", "Dados (2)", ...
+
+    Args:
+        df: DataFrame a exportar (o índice não é gravado)
+        caminho: Caminho do arquivo .xlsx
+        nome_aba: Nome da aba
+        progresso: Função opcional chamada com (linhas_gravadas, total)
+
+    Returns:
+        int: Quantidade de linhas exportadas
+
+    Raises:
+        ValueError: Se o DataFrame tem mais colunas do que o Excel aceita
+    """
+    if len(df.columns) > LIMITE_COLUNAS_EXCEL:
+        raise ValueError(
+            f"O Excel aceita até {LIMITE_COLUNAS_EXCEL} colunas e o relatório tem {len(df.columns)}. "
+            "Exporte em CSV, Parquet ou Feather."
+        )
+
+    inicio = time.perf_counter()
+    total = len(df)
+    num_abas = max(1, -(-total // LINHAS_POR_ABA))
+    larguras = calcular_larguras(df)
+
+    with _arquivo_temporario(caminho) as temporario:
+        livro = xlsxwriter.Workbook(temporario, {'constant_memory': True})
+        # Arquivos grandes passam de 4 GB descompactados
+        livro.use_zip64()
+        negrito = livro.add_format({'bold': True})
+        formatos = {
+            'data': livro.add_format({'num_format': _FORMATO_DATA}),
+            'data_hora': livro.add_format({'num_format': _FORMATO_DATA_HORA}),
+        }
+
+        for aba in range(num_abas):
+            planilha = livro.add_worksheet(_nome_aba(nome_aba, '' if aba == 0 else f' ({aba + 1})'))
+            for i, largura in enumerate(larguras):
+                planilha.set_column(i, i, largura)
+            planilha.freeze_panes(1, 0)
+            for i, coluna in enumerate(df.columns):
+                planilha.write_string(0, i, str(coluna), negrito)
+
+            inicio_aba = aba * LINHAS_POR_ABA
+            fim_aba = min(total, inicio_aba + LINHAS_POR_ABA)
+            for bloco_inicio in range(inicio_aba, fim_aba, TAMANHO_BLOCO):
+                bloco = df.iloc[bloco_inicio:min(bloco_inicio + TAMANHO_BLOCO, fim_aba)]
+                _escrever_bloco(bloco, planilha, bloco_inicio - inicio_aba + 1, formatos)
+                if progresso:
+                    progresso(bloco_inicio + len(bloco), total)
+
+        livro.close()
+
+    segundos = time.perf_counter() - inicio
+    info(f"💾 {os.path.basename(str(caminho))}: {total} linhas, {num_abas} aba(s), {segundos:.1f} s")
+    return total
+
+
+# Formatos de exportação: extensão -> descrição no diálogo de salvar
+FORMATOS_EXPORTACAO = {
+    '.xlsx': 'Excel',
+    '.csv': 'CSV (;)',
+    '.parquet': 'Parquet',
+    '.feather': 'Feather',
+}
+
+# Formatos que precisam do pyarrow
+_FORMATOS_ARROW = ('.parquet', '.feather')
+
+
+def formatos_disponiveis():
+    """
+    Extensões que podem ser exportadas neste ambiente.
+
+    Returns:
+        list: Extensões disponíveis (Excel e CSV sempre)
+    """
+    tem_arrow = importlib.util.find_spec('pyarrow') is not None
+    return [ext for ext in FORMATOS_EXPORTACAO if tem_arrow or ext not in _FORMATOS_ARROW]
+
+
+def tipos_arquivo_exportacao():
+    """
+    Lista de tipos para o filedialog (Excel primeiro).
+
+    Returns:
+        list: [(descrição, padrão), ...]
+    """
+    return [(FORMATOS_EXPORTACAO[ext], f"*{ext}") for ext in formatos_disponiveis()]
+
+
+def exportar_csv(df, caminho, progresso=None):
+    """
+    Exporta para CSV no padrão brasileiro (";" e vírgula decimal), em blocos.
+    Usa UTF-8 com BOM para o Excel reconhecer os acentos.
+
+    Args:
+        df: DataFrame a exportar (o índice não é gravado)
+        caminho: Caminho do arquivo .csv
+        progresso: Função opcional chamada com (linhas_gravadas, total)
+
+    Returns:
+        int: Quantidade de linhas exportadas
+    """
+    inicio = time.perf_counter()
+    total = len(df)
+
+    with _arquivo_temporario(caminho) as temporario, \
+            open(temporario, 'w', encoding='utf-8-sig', newline='') as arquivo:
+        df.head(0).to_csv(arquivo, sep=';', decimal=',', index=False)
+        for bloco_inicio in range(0, total, TAMANHO_BLOCO):
+            bloco = df.iloc[bloco_inicio:bloco_inicio + TAMANHO_BLOCO]
+            bloco.to_csv(arquivo, sep=';', decimal=',', index=False, header=False)
+            if progresso:
+                progresso(bloco_inicio + len(bloco), total)
+
+    segundos = time.perf_counter() - inicio
+    info(f"💾 {os.path.basename(str(caminho))}: {total} linhas, {segundos:.1f} s")
+    return total
+
+
+def _preparar_arrow(df):
+    """
+    Ajusta o DataFrame para o pyarrow: nomes de coluna em texto, índice
+    padrão e colunas de texto com valores misturados convertidas para str.
+    """
+    df = df.reset_index(drop=True)
+    df.columns = [str(c) for c in df.columns]
+    for coluna in df.columns:
+        serie = df[coluna]
+        if pd.api.types.is_object_dtype(serie) and \
+                pd.api.types.infer_dtype(serie, skipna=True) not in ('string', 'empty'):
+            df[coluna] = serie.where(serie.isna(), serie.astype(str))
+    return df
+
+
+def exportar_arrow(df, caminho, formato, progresso=None):
+    """
+    Exporta para Parquet ou Feather (colunar, tipos preservados).
+    A gravação é uma chamada só: o progresso é informado antes e depois.
+
+    Args:
+        df: DataFrame a exportar
+        caminho: Caminho do arquivo
+        formato: '.parquet' ou '.feather'
+        progresso: Função opcional chamada com (linhas_gravadas, total)
+
+    Returns:
+        int: Quantidade de linhas exportadas
+    """
+    if importlib.util.find_spec('pyarrow') is None:
+        raise RuntimeError(f"Exportar {FORMATOS_EXPORTACAO[formato]} requer o pacote pyarrow")
+
+    inicio = time.perf_counter()
+    df = _preparar_arrow(df)
+    with _arquivo_temporario(caminho) as temporario:
+        if progresso:
+            progresso(0, len(df))
+        if formato == '.parquet':
+            df.to_parquet(temporario, index=False)
+        else:
+            df.to_feather(temporario)
+        if progresso:
+            progresso(len(df), len(df))
+
+    segundos = time.perf_counter() - inicio
+    info(f"💾 {os.path.basename(str(caminho))}: {len(df)} linhas, {segundos:.1f} s")
+    return len(df)
+
+
+def exportar(df, caminho, nome_aba='Dados', progresso=None):
+    """
+    Exporta no formato indicado pela extensão do arquivo
+    (.xlsx, .csv, .parquet ou .feather; sem extensão conhecida vira Excel).
+
+    Args:
+        df: DataFrame a exportar
+        caminho: Caminho do arquivo
+        nome_aba: Nome da aba (somente Excel)
+        progresso: Função opcional chamada com (linhas_gravadas, total);
+            pode interromper a gravação levantando OperacaoCancelada (o
+            arquivo de destino só é substituído se a gravação termina)
+
+    Returns:
+        int: Quantidade de linhas exportadas
+    """
+    formato = os.path.splitext(str(caminho))[1].lower()
+    try:
+        if formato == '.csv':
+            return exportar_csv(df, caminho, progresso)
+        if formato in _FORMATOS_ARROW:
+            return exportar_arrow(df, caminho, formato, progresso)
+        return exportar_excel(df, caminho, nome_aba, progresso)
+    except OperacaoCancelada:
+        # O temporário já foi apagado; o arquivo de destino não foi tocado
+        info(f"🛑 Exportação cancelada: {os.path.basename(str(caminho))}")
+        raise
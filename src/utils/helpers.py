@@ -3,43 +3,118 @@
 Funções auxiliares para formatação e utilitários.
 Versão 2.1.0 - Com centralização melhorada
 """
-import pandas as pd
 import os
 import sys
-import tkinter as tk
 
-def formatar_br(valor, tipo='moeda'):
+# Troca "," por "." e "." por "," numa passada só (1,234.56 -> 1.234,56)
+_TROCA_BR = str.maketrans(',.', '.,')
+
+_FORMATOS_BR = {
+    'moeda': 'R$ {:,.2f}',
+    'decimal_3': '{:,.3f}',
+    'decimal_2': '{:,.2f}',
+    'decimal_1': '{:,.1f}',
+}
+
+
+def _formatar_numero(valor_float, tipo):
+    """Texto pt-BR de um float (sem tratar vazios)"""
+    formato = _FORMATOS_BR.get(tipo)
+    if formato is not None:
+        return formato.format(valor_float).translate(_TROCA_BR)
+    if tipo == 'inteiro':
+        return str(int(valor_float))
+    return str(valor_float).translate(_TROCA_BR)
+
+
+def _formatar_numeros(numeros, tipo):
+    """Textos pt-BR de uma lista de floats (uma troca de separadores para todos)"""
+    formato = _FORMATOS_BR.get(tipo)
+    try:
+        if formato is not None:
+            textos = map(formato.format, numeros)
+        elif tipo == 'inteiro':
+            textos = map(str, map(int, numeros))
+        else:
+            textos = map(str, numeros)
+        return '\n'.join(textos).translate(_TROCA_BR).split('\n')
+    except (OverflowError, ValueError):
+        # inf em 'inteiro': valor a valor, como formatar_br
+        textos = []
+        for numero in numeros:
+            try:
+                textos.append(_formatar_numero(numero, tipo))
+            except (OverflowError, ValueError):
+                textos.append(str(numero))
+        return textos
+
+
+def formatar_br(valor, tipo='moeda', vazio=''):
     """
     Formata números no padrão brasileiro.
     
     Args:
         valor: Número a ser formatado
         tipo: 'moeda', 'inteiro', 'decimal_3', 'decimal_2', 'decimal_1'
+        vazio: Texto para valores vazios (NaN, None, '')
     
     Returns:
         str: Número formatado
     """
+    import pandas as pd  # importado só aqui: helpers faz parte da inicialização da janela
+    
     if pd.isna(valor) or valor == '':
-        return ''
+        return vazio
     
     try:
-        valor_float = float(valor)
-        
-        if tipo == 'moeda':
-            return f"R$ {valor_float:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-        elif tipo == 'inteiro':
-            return f"{int(valor_float)}"
-        elif tipo == 'decimal_3':
-            return f"{valor_float:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-        elif tipo == 'decimal_2':
-            return f"{valor_float:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-        elif tipo == 'decimal_1':
-            return f"{valor_float:,.1f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-        else:
-            return str(valor_float).replace('.', ',')
+        return _formatar_numero(float(valor), tipo)
     except:
         return str(valor)
 
+
+def formatar_br_serie(valores, tipo='moeda', vazio=''):
+    """
+    Formata uma coluna inteira no padrão brasileiro (mesmo texto que
+    formatar_br, valor a valor). Cada valor distinto é formatado uma vez só
+    e o resultado é espalhado pelas linhas; vazios e textos que não são
+    número são resolvidos por máscara.
+    
+    Args:
+        valores: Series, array ou lista
+        tipo: 'moeda', 'inteiro', 'decimal_3', 'decimal_2', 'decimal_1'
+        vazio: Texto para valores vazios (NaN, None, '')
+    
+    Returns:
+        pd.Series: Textos formatados (mesmo índice se recebeu uma Series)
+    """
+    import numpy as np
+    import pandas as pd
+    
+    serie = valores if isinstance(valores, pd.Series) else pd.Series(valores)
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype(object)
+    
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        numeros = serie.to_numpy(dtype=float, na_value=np.nan)
+        nulos = np.isnan(numeros)
+    else:
+        nulos = (serie.isna() | serie.eq('')).to_numpy(dtype=bool)
+        numeros = pd.to_numeric(serie.where(~nulos), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    
+    textos = np.full(len(serie), vazio, dtype=object)
+    validos = ~np.isnan(numeros)
+    if validos.any():
+        codigos, unicos = pd.factorize(numeros[validos])
+        formatados = _formatar_numeros(unicos.tolist(), tipo)
+        textos[validos] = np.array(formatados, dtype=object)[codigos]
+    
+    # Textos que não são número ficam como estão (igual a formatar_br)
+    outros = ~validos & ~nulos
+    if outros.any():
+        textos[outros] = [str(v) for v in serie.to_numpy(dtype=object)[outros]]
+    
+    return pd.Series(textos, index=serie.index, dtype=object)
+
 def get_resource_path(relative_path):
     """
     Retorna o caminho correto para arquivos, tanto em desenvolvimento quanto no executável.
@@ -0,0 +1,181 @@
+# src/utils/indice_filtro.py
+"""
+Índice para filtrar relatórios por várias colunas sem copiar o DataFrame.
+Cada coluna filtrável é fatorada uma única vez em códigos inteiros (um por
+valor distinto, comparado como texto, igual à janela de filtro). Filtrar
+vira consultar uma tabela de valores marcados por código e juntar as
+máscaras das colunas com "e"; as máscaras e as contagens de valores das
+janelas em cascata ficam guardadas (as mais recentes) para a mesma
+combinação de filtros. O índice vale para uma versão dos dados: depois de
+uma alteração no lugar (marcar_alterado) ele precisa ser refeito.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from src.core.visao import versao
+
+# Quantas máscaras/contagens cada cache mantém (uma máscara = 1 byte por linha)
+LIMITE_CACHE = 16
+
+
+def _chave_filtros(filtros, ignorar=None):
+    """Forma imutável dos filtros ativos (para usar como chave do cache)"""
+    return frozenset(
+        (coluna, frozenset(str(v) for v in valores))
+        for coluna, valores in filtros.items()
+        if valores and coluna != ignorar
+    )
+
+
+def _guardar(cache, chave, valor):
+    """Guarda no cache descartando o item usado há mais tempo"""
+    cache[chave] = valor
+    cache.move_to_end(chave)
+    while len(cache) > LIMITE_CACHE:
+        cache.popitem(last=False)
+    return valor
+
+
+def _obter(cache, chave):
+    """Valor em cache (marcado como usado agora) ou None"""
+    valor = cache.get(chave)
+    if valor is not None:
+        cache.move_to_end(chave)
+    return valor
+
+
+class IndiceFiltro:
+    """Códigos por coluna, máscaras e contagens de valores em cache"""
+
+    def __init__(self, df, colunas):
+        """
+        Args:
+            df: DataFrame do relatório (não é copiado nem alterado)
+            colunas: Colunas que podem ser filtradas
+        """
+        self.df = df
+        self.versao = versao(df)
+        self.total = len(df)
+        self.colunas = [c for c in colunas if c in df.columns]
+        self._codigos = {}
+        self._textos = {}
+        self._ordem = {}
+        self._mascaras_coluna = OrderedDict()
+        self._mascaras = OrderedDict()
+        self._contagens = OrderedDict()
+
+        for coluna in self.colunas:
+            self._indexar(coluna)
+
+    def serve_para(self, df, colunas=None):
+        """
+        True se o índice foi montado para este DataFrame na versão atual
+        (e, se informado, com as mesmas colunas).
+        """
+        if df is not self.df or versao(df) != self.versao:
+            return False
+        return colunas is None or [c for c in colunas if c in df.columns] == self.colunas
+    
+    def _indexar(self, coluna):
+        """Fatora a coluna: código por linha (-1 = vazio) e texto de cada código"""
+        serie = self.df[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            codigos, valores = serie.cat.codes.values, serie.cat.categories
+        else:
+            codigos, valores = pd.factorize(serie)
+
+        # Valores diferentes com o mesmo texto (1 e "1") viram um só
+        textos = [str(v) for v in valores]
+        por_texto, textos_unicos = pd.factorize(pd.Series(textos, dtype=object))
+        por_texto = np.append(por_texto, -1).astype(np.int32)
+        self._codigos[coluna] = por_texto[codigos]
+        self._textos[coluna] = list(textos_unicos)
+
+        # Ordem de exibição: pelo valor original, ou pelo texto se não der para comparar
+        primeiro = dict(zip(por_texto[:-1].tolist(), valores))
+        originais = [primeiro[i] for i in range(len(textos_unicos))]
+        try:
+            self._ordem[coluna] = sorted(range(len(originais)), key=lambda i: originais[i])
+        except TypeError:
+            self._ordem[coluna] = sorted(range(len(originais)), key=lambda i: textos_unicos[i])
+
+    def _mascara_coluna(self, coluna, valores):
+        """Máscara das linhas cuja coluna está entre os valores selecionados"""
+        selecao = frozenset(str(v) for v in valores)
+        chave = (coluna, selecao)
+        mascara = _obter(self._mascaras_coluna, chave)
+        if mascara is None:
+            textos = self._textos[coluna]
+            # Uma posição extra para o código -1 (vazio nunca é selecionado)
+            marcados = np.zeros(len(textos) + 1, dtype=bool)
+            marcados[:-1] = [t in selecao for t in textos]
+            mascara = _guardar(self._mascaras_coluna, chave, marcados[self._codigos[coluna]])
+        return mascara
+
+    def mascara(self, filtros, ignorar=None):
+        """
+        Linhas que atendem a todos os filtros.
+
+        Args:
+            filtros: dict coluna -> lista de valores selecionados
+            ignorar: Coluna cujo filtro não entra (janelas em cascata)
+
+        Returns:
+            np.ndarray: Máscara booleana, ou None se nenhum filtro se aplica
+        """
+        chave = _chave_filtros(
+            {c: v for c, v in filtros.items() if c in self._codigos}, ignorar
+        )
+        if not chave:
+            return None
+        mascara = _obter(self._mascaras, chave)
+        if mascara is None:
+            for coluna, selecao in chave:
+                atual = self._mascara_coluna(coluna, selecao)
+                mascara = atual if mascara is None else mascara & atual
+            _guardar(self._mascaras, chave, mascara)
+        return mascara
+
+    def posicoes(self, filtros):
+        """Posições (iloc) das linhas filtradas, ou None se não há filtro"""
+        mascara = self.mascara(filtros)
+        return None if mascara is None else np.flatnonzero(mascara)
+
+    def contar(self, filtros):
+        """Quantidade de linhas que atendem aos filtros"""
+        mascara = self.mascara(filtros)
+        return self.total if mascara is None else int(np.count_nonzero(mascara))
+
+    def contagens(self, coluna, filtros):
+        """
+        Valores da coluna e quantas linhas têm cada um, considerando os
+        filtros das outras colunas (como na janela de filtro em cascata).
+
+        Returns:
+            list: [(texto, quantidade), ...] na ordem de exibição, sem zeros
+        """
+        chave = (coluna, _chave_filtros(filtros, ignorar=coluna))
+        contagens = _obter(self._contagens, chave)
+        if contagens is None:
+            codigos = self._codigos[coluna]
+            mascara = self.mascara(filtros, ignorar=coluna)
+            if mascara is not None:
+                codigos = codigos[mascara]
+            textos = self._textos[coluna]
+            quantidades = np.bincount(codigos[codigos >= 0], minlength=len(textos))
+            contagens = _guardar(self._contagens, chave, [
+                (textos[i], int(quantidades[i])) for i in self._ordem[coluna] if quantidades[i]
+            ])
+        return contagens
+
+    def filtrar(self, filtros):
+        """
+        DataFrame só com as linhas filtradas (índice 0..n-1).
+        Sem filtro devolve o próprio DataFrame, sem cópia.
+        """
+        posicoes = self.posicoes(filtros)
+        if posicoes is None:
+            return self.df
+        return self.df.take(posicoes).reset_index(drop=True)
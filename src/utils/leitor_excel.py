@@ -0,0 +1,120 @@
+# src/utils/leitor_excel.py
+"""
+Leitor de Excel único para todo o sistema.
+Escolhe o engine mais rápido disponível e volta para o próximo se falhar:
+  1. calamine  - leitor em Rust (pacote python-calamine, pandas >= 2.2)
+  2. openpyxl  - em modo read_only/data_only (streaming das linhas)
+  3. padrão do pandas (ex: xlrd para .xls)
+Registra qual engine foi usado e quanto tempo levou.
+"""
+import os
+import time
+import importlib.util
+import pandas as pd
+from src.utils.logger import info, warning
+
+# Informações da última leitura (engine, tempo, arquivo)
+_ultima_leitura = {'arquivo': None, 'engine': None, 'ms': 0.0}
+
+
+def _modulo_disponivel(nome):
+    """Verifica se um módulo pode ser importado sem importá-lo"""
+    try:
+        return importlib.util.find_spec(nome) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def engines_disponiveis(caminho=None):
+    """
+    Retorna os engines a tentar, do mais rápido para o mais lento.
+
+    Args:
+        caminho: Caminho do arquivo (a extensão define os engines possíveis)
+
+    Returns:
+        list: Nomes dos engines (None = escolha padrão do pandas)
+    """
+    extensao = os.path.splitext(str(caminho or ''))[1].lower()
+    engines = []
+
+    if _modulo_disponivel('python_calamine'):
+        engines.append('calamine')
+
+    if extensao in ('', '.xlsx', '.xlsm') and _modulo_disponivel('openpyxl'):
+        engines.append('openpyxl')
+
+    engines.append(None)
+    return engines
+
+
+def _registrar(caminho, engine, inicio):
+    """Guarda e exibe o engine usado e o tempo gasto"""
+    _ultima_leitura['arquivo'] = caminho
+    _ultima_leitura['engine'] = engine or 'padrão'
+    _ultima_leitura['ms'] = (time.perf_counter() - inicio) * 1000
+    print(f"📖 Leitor Excel: {_ultima_leitura['engine']} em {_ultima_leitura['ms']:.0f} ms")
+    info(f"📖 {os.path.basename(str(caminho))}: engine={_ultima_leitura['engine']}, {_ultima_leitura['ms']:.0f} ms")
+
+
+def abrir_excel(caminho):
+    """
+    Abre o arquivo Excel com o engine mais rápido disponível.
+    Use com 'with' para ler várias vezes do mesmo handle (arquivo.parse()).
+
+    Args:
+        caminho: Caminho do arquivo
+
+    Returns:
+        pd.ExcelFile: Arquivo aberto
+    """
+    ultimo_erro = None
+    for engine in engines_disponiveis(caminho):
+        inicio = time.perf_counter()
+        try:
+            arquivo = pd.ExcelFile(caminho, engine=engine)
+            _registrar(caminho, engine, inicio)
+            return arquivo
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            warning(f"⚠️ Engine {engine or 'padrão'} falhou ao abrir {caminho}: {e}")
+            ultimo_erro = e
+    raise ultimo_erro
+
+
+def ler_excel(caminho, **kwargs):
+    """
+    Lê um arquivo Excel com o engine mais rápido disponível.
+    Aceita os mesmos argumentos de pd.read_excel (exceto engine).
+
+    Args:
+        caminho: Caminho do arquivo
+        **kwargs: Argumentos repassados para pd.read_excel
+
+    Returns:
+        DataFrame: Dados da planilha
+    """
+    ultimo_erro = None
+    for engine in engines_disponiveis(caminho):
+        inicio = time.perf_counter()
+        try:
+            df = pd.read_excel(caminho, engine=engine, **kwargs)
+            _registrar(caminho, engine, inicio)
+            return df
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            warning(f"⚠️ Engine {engine or 'padrão'} falhou ao ler {caminho}: {e}")
+            ultimo_erro = e
+    raise ultimo_erro
+
+
+def get_ultima_leitura():
+    """
+    Retorna informações da última leitura.
+
+    Returns:
+        dict: {'arquivo': str, 'engine': str, 'ms': float}
+    """
+    return dict(_ultima_leitura)
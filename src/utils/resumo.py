@@ -0,0 +1,149 @@
+# src/utils/resumo.py
+"""
+Resumos (contagens e somas por categoria, grupo, comprador, loja...) em uma
+única passada sobre o DataFrame. Todas as colunas de agrupamento entram num
+só groupby; o resultado é uma tabela pequena (uma linha por combinação de
+valores) da qual saem os totais de cada coluna sem reler os dados.
+O resumo fica em cache para o mesmo DataFrame (mesmo objeto), então
+redesenhar a tela, mudar a fonte ou o tema não refaz a agregação.
+"""
+import operator
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+# Quantos DataFrames diferentes ficam com resumo em cache
+LIMITE_CACHE = 8
+
+_OPERADORES = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+class Resumo:
+    """Resultado da agregação: totais gerais e tabela por combinação de grupos"""
+
+    def __init__(self, total, grupos, tabela, somas, condicoes, unicos):
+        """
+        Args:
+            total: Quantidade de linhas do DataFrame
+            grupos: Colunas de agrupamento presentes no DataFrame
+            tabela: DataFrame com as colunas de grupo, 'linhas', somas e condições
+            somas: dict coluna -> soma geral
+            condicoes: dict nome -> linhas que atendem à condição
+            unicos: dict coluna -> quantidade de valores distintos
+        """
+        self.total = total
+        self.grupos = grupos
+        self.tabela = tabela
+        self.somas = somas
+        self.condicoes = condicoes
+        self.unicos = unicos
+
+    def por(self, coluna, onde=None, ordenar='linhas'):
+        """
+        Totais por valor de uma coluna de grupo.
+
+        Args:
+            coluna: Coluna de agrupamento
+            onde: dict coluna -> valor para restringir as combinações
+                (ex: {'Comprador': 'NÃO MAPEADO'})
+            ordenar: Coluna do resultado para ordenar de forma decrescente
+                (padrão: 'linhas', como value_counts; None = ordem de aparição)
+
+        Returns:
+            DataFrame: Índice = valores da coluna; colunas 'linhas', somas e condições
+        """
+        tabela = self.tabela
+        for c, valor in (onde or {}).items():
+            tabela = tabela[tabela[c] == valor]
+
+        valores = [c for c in tabela.columns if c not in self.grupos]
+        resultado = tabela.groupby(coluna, sort=False, observed=True)[valores].sum()
+        resultado = resultado[resultado['linhas'] > 0]
+        if ordenar is None:
+            return resultado
+        return resultado.sort_values(ordenar, ascending=False, kind='stable')
+
+
+def _agregar(df, grupos, somas, condicoes, unicos):
+    """Faz a agregação (uma passada com todas as colunas de grupo)"""
+    grupos = [c for c in grupos if c in df.columns]
+    somas = [c for c in somas if c in df.columns]
+    condicoes = [(nome, c, op, valor) for nome, c, op, valor in condicoes if c in df.columns]
+
+    dados = {c: df[c] for c in grupos}
+    for c in somas:
+        dados[c] = df[c]
+    for nome, c, op, valor in condicoes:
+        dados[nome] = _OPERADORES[op](df[c], valor)
+    base = pd.DataFrame(dados)
+    base['linhas'] = 1
+
+    valores = somas + [nome for nome, *_ in condicoes] + ['linhas']
+    if grupos:
+        tabela = base.groupby(grupos, sort=False, observed=True, dropna=False)[valores].sum().reset_index()
+    else:
+        tabela = base[valores].sum().to_frame().T
+
+    return Resumo(
+        total=len(df),
+        grupos=grupos,
+        tabela=tabela,
+        somas={c: tabela[c].sum() for c in somas},
+        condicoes={nome: int(tabela[nome].sum()) for nome, *_ in condicoes},
+        unicos={c: df[c].nunique() for c in unicos if c in df.columns},
+    )
+
+
+def resumir(df, grupos=(), somas=(), condicoes=(), unicos=()):
+    """
+    Agrega o DataFrame uma única vez (com cache pelo objeto DataFrame).
+
+    Args:
+        df: DataFrame
+        grupos: Colunas de agrupamento (ex: categoria, grupo, comprador, loja)
+        somas: Colunas numéricas somadas por grupo
+        condicoes: Tuplas (nome, coluna, operador, valor) contadas por grupo,
+            ex: ('ruptura', 'RUPTURA', '==', 'RUPTURA')
+        unicos: Colunas cuja quantidade de valores distintos é contada
+
+    Returns:
+        Resumo
+    """
+    espec = (tuple(grupos), tuple(somas), tuple(condicoes), tuple(unicos))
+
+    with _lock:
+        entrada = _cache.get(id(df))
+        if entrada is not None and entrada[0]() is df and espec in entrada[1]:
+            _cache.move_to_end(id(df))
+            return entrada[1][espec]
+
+    resumo = _agregar(df, grupos, somas, condicoes, unicos)
+
+    with _lock:
+        entrada = _cache.get(id(df))
+        if entrada is None or entrada[0]() is not df:
+            entrada = (weakref.ref(df), {})
+            _cache[id(df)] = entrada
+        entrada[1][espec] = resumo
+        _cache.move_to_end(id(df))
+        while len(_cache) > LIMITE_CACHE:
+            _cache.popitem(last=False)
+    return resumo
+
+
+def invalidar(df):
+    """Descarta os resumos do DataFrame (chamar depois de alterá-lo no lugar)"""
+    with _lock:
+        _cache.pop(id(df), None)
@@ -0,0 +1,11 @@
+# tests/conftest.py
+"""
+Configuração dos testes: coloca a raiz do projeto no caminho de importação
+para que "from src..." funcione ao rodar "pytest" de qualquer pasta.
+"""
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
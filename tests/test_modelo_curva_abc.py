@@ -0,0 +1,139 @@
+# tests/test_modelo_curva_abc.py
+"""
+Regressão do processamento da Curva ABC por Loja: o caminho vetorizado
+(máscaras + forward-fill) precisa gerar o mesmo resultado que o laço linha
+a linha original com a conversão original (pd.to_numeric em todas as
+colunas), num relatório sintético de 20 mil linhas. A única diferença
+esperada é o 'Código', que agora é a chave inteira de normalizar_codigos.
+"""
+import numpy as np
+import pandas as pd
+
+from src.models.modelo_curva_abc import ModeloCurvaABC
+
+LINHAS = 20_000
+LOJAS = 40
+
+
+def _relatorio_sintetico(linhas=LINHAS, lojas=LOJAS, semente=0):
+    """
+    Monta um relatório bruto como o do SGE: 4 linhas de título, cabeçalho,
+    e blocos "Loja:" seguidos dos produtos. Inclui os casos difíceis:
+    loja sem nome, loja sem código, códigos como texto com zeros à esquerda,
+    vírgula decimal, linhas de total, linhas vazias e lixo ("12abc").
+    """
+    rng = np.random.default_rng(semente)
+    registros = [["Relatório Curva ABC", None, None, None, None, None] for _ in range(4)]
+    registros.append(["Código", "Produto", "Unid", "Qtd", "Total R$", "Perc"])
+
+    por_loja = linhas // lojas
+    for loja in range(lojas):
+        nome = None if loja == 3 else f"LOJA {loja}"
+        codigo = None if loja == 5 else (loja + 1 if loja % 2 else float(loja + 1))
+        registros.append(["Loja:", codigo, nome, None, None, None])
+
+        codigos = rng.integers(1, 99999, por_loja)
+        quantidades = rng.random(por_loja) * 100
+        totais = rng.random(por_loja) * 1000
+        for k in range(por_loja):
+            c = int(codigos[k])
+            tipo = k % 50
+            if tipo == 0:
+                primeira = "Total da loja"
+            elif tipo == 1:
+                primeira = None
+            elif tipo == 2:
+                primeira = f"{c},5"
+            elif tipo == 3:
+                primeira = "12abc"
+            elif tipo == 4:
+                primeira = str(c).zfill(7)
+            else:
+                primeira = c
+            qtd = f"{quantidades[k]:.3f}".replace('.', ',')
+            registros.append([primeira, f"PROD {c}", "UN", qtd, totais[k], None])
+
+    return pd.DataFrame(registros, columns=["Unnamed: 0", "a", "b", "c", "d", "e"])
+
+
+def _produto_valido(x):
+    """Regra original (_is_valid_product) aplicada célula a célula"""
+    try:
+        val = str(x).strip()
+        if val == '' or val == 'nan' or pd.isna(x) or val == 'None':
+            return False
+        if not val[0].isdigit():
+            return False
+        float(val.replace(',', '.'))
+        return True
+    except Exception:
+        return False
+
+
+def _processar_linha_a_linha(df):
+    """
+    Caminho de referência: o laço original que percorre o relatório linha a
+    linha guardando a loja vigente, com a conversão original do PASSO 6
+    (vírgula -> ponto e pd.to_numeric, inclusive no 'Código') e sem compactar.
+    """
+    df_dados = df.iloc[4:].copy()
+    df_dados.columns = df_dados.iloc[0]
+    df_dados = df_dados.iloc[1:].reset_index(drop=True)
+
+    lojas_codigo, lojas_nome, manter = [], [], []
+    loja_atual_codigo = ''
+    loja_atual_nome = ''
+    for primeira, codigo_loja, nome_loja in zip(df_dados.iloc[:, 0], df_dados.iloc[:, 1], df_dados.iloc[:, 2]):
+        if 'Loja:' in str(primeira):
+            loja_atual_codigo = str(codigo_loja) if pd.notna(codigo_loja) else ''
+            loja_atual_nome = str(nome_loja) if pd.notna(nome_loja) else ''
+            manter.append(False)
+        else:
+            manter.append(_produto_valido(primeira))
+        lojas_codigo.append(loja_atual_codigo)
+        lojas_nome.append(loja_atual_nome)
+
+    df_dados['Loja_Codigo'] = lojas_codigo
+    df_dados['Loja_Nome'] = lojas_nome
+    df_limpo = df_dados[manter].reset_index(drop=True)
+
+    for coluna in ['Código', 'Qtd', 'Total R$', 'Loja_Codigo']:
+        df_limpo[coluna] = pd.to_numeric(df_limpo[coluna].astype(str).str.replace(',', '.'), errors='coerce')
+
+    return df_limpo
+
+
+def test_processar_igual_ao_laco_linha_a_linha():
+    df = _relatorio_sintetico()
+
+    vetorizado = ModeloCurvaABC().processar(df.copy())
+    referencia = _processar_linha_a_linha(df.copy())
+
+    assert len(vetorizado) > 0.9 * LINHAS
+
+    # Demais colunas: mesmos valores (a compactação só muda o tipo, sem perda)
+    outras = referencia.drop(columns='Código')
+    pd.testing.assert_frame_equal(
+        vetorizado.drop(columns='Código').astype(outras.dtypes.to_dict()), outras
+    )
+
+    # 'Código': antes float ("123,5" -> 123.5), agora inteiro truncado (123)
+    codigos_antes = referencia['Código'].to_numpy()
+    assert not np.isnan(codigos_antes).any()
+    assert (codigos_antes % 1 != 0).sum() == (df.iloc[:, 0].astype(str).str.endswith(',5')).sum()
+    assert pd.api.types.is_integer_dtype(vetorizado['Código'])
+    np.testing.assert_array_equal(vetorizado['Código'].to_numpy(np.int64),
+                                  np.trunc(codigos_antes).astype(np.int64))
+
+
+def test_processar_loja_sem_nome_e_sem_codigo():
+    df = _relatorio_sintetico(linhas=600, lojas=6)
+    resultado = ModeloCurvaABC().processar(df)
+
+    lojas = resultado.drop_duplicates('Loja_Nome').set_index('Loja_Nome')['Loja_Codigo']
+    assert lojas['LOJA 0'] == 1
+    assert '' in lojas.index
+    assert lojas[''] == 4
+    assert pd.isna(lojas['LOJA 5'])
+    # Por loja: 100 linhas, menos total, vazia e "12abc" a cada 50
+    assert len(resultado) == 6 * 94
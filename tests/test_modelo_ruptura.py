@@ -0,0 +1,61 @@
+# tests/test_modelo_ruptura.py
+"""
+Cruzamentos do ModeloRuptura: códigos que não são numéricos (texto, vazio)
+não podem casar entre si nos merges por código.
+"""
+import pandas as pd
+
+from src.models.modelo_ruptura import ModeloRuptura
+
+MATRIZ = ModeloRuptura.NOME_MATRIZ
+
+
+def _entradas():
+    """Estoque, Curva ABC e média com dois códigos alfanuméricos diferentes"""
+    df_estoque = pd.DataFrame({
+        'Codigo': [1, 'ABC', 'XYZ', 2, 'ABC', None],
+        'Descricao': ['um', 'abc', 'xyz', 'dois', 'abc matriz', 'vazio'],
+        'Estoque_Loja': [5.0, 7.0, 11.0, 3.0, 13.0, 17.0],
+        'Estoque_Geral': 1.0,
+        'Categoria': 'A',
+        'Grupo': 'G',
+        'Loja': ['LOJA 1', 'LOJA 1', 'LOJA 1', 'LOJA 1', MATRIZ, 'LOJA 1'],
+    })
+    df_curva = pd.DataFrame({
+        'Código': [1.0, 'ABC', 'XYZ'],
+        'Produto': 'p',
+        'Qtd': [2.0, 100.0, 200.0],
+        'Total R$': 1.0,
+        'Loja_Codigo': 1.0,
+        'Loja_Nome': 'LOJA 1',
+    })
+    df_media = pd.DataFrame({
+        'Código': [1, 'ABC', 'XYZ'],
+        'Loja': 'LOJA 1',
+        'Qtd': [4.0, 50.0, 60.0],
+    })
+    return df_estoque, df_curva, df_media
+
+
+def test_codigos_alfanumericos_nao_cruzam_entre_si():
+    resultado = ModeloRuptura().processar(*_entradas())
+
+    # Sem o filtro, ABC/XYZ/vazio viravam o mesmo código e se multiplicavam
+    assert len(resultado) == 2
+    assert sorted(resultado['CÓDIGO'].tolist()) == [1, 2]
+
+    linha = resultado.set_index('CÓDIGO').loc[1]
+    assert linha['VENDAS MÊS ATUAL'] == 2.0
+    assert linha['MÉDIA VENDA MENSAL'] == 4.0
+    assert linha['ESTQ MATRIZ'] == 0
+
+
+def test_codigos_validos_nao_mudam():
+    df_estoque, df_curva, df_media = _entradas()
+    validos = ModeloRuptura().processar(
+        df_estoque[df_estoque['Codigo'].isin([1, 2])].reset_index(drop=True),
+        df_curva[df_curva['Código'].isin([1.0])].reset_index(drop=True),
+        df_media[df_media['Código'].isin([1])].reset_index(drop=True),
+    )
+    completo = ModeloRuptura().processar(df_estoque, df_curva, df_media)
+    pd.testing.assert_frame_equal(completo, validos)
@@ -0,0 +1,126 @@
+# tests/test_relatorio_ruptura.py
+"""
+Regressão do RelatorioRuptura.gerar: os cruzamentos por chave (merge)
+precisam gerar o mesmo DataFrame que o laço original com iterrows,
+inclusive o texto de 'CÓDIGO' e do 'Cadeamento'.
+"""
+import pandas as pd
+import pytest
+
+from src.config.media_vendas import get_media_vendas
+from src.relatorios.relatorios_disponiveis import RelatorioRuptura
+
+MATRIZ = "COMCARNE MATRIZ SAO LUIS"
+
+
+def _combinado():
+    """Curva ABC + Estoque como chegam dos modelos (concatenados) e a média de vendas"""
+    curva = pd.DataFrame({
+        'Código': [10, 20, 30, 10, 40, 50],
+        'Produto': ['CARNE L1', 'FRANGO L1', 'PEIXE L1', 'CARNE L2', 'OVO L2', 'SAL L1'],
+        'Qtd': [5.0, 1.0, 2.5, 3.0, 0.0, 7.0],
+        'Total R$': 1.0,
+        'Loja_Codigo': 1.0,
+        'Loja_Nome': ['LOJA 1', 'LOJA 1', 'LOJA 1', 'LOJA 2', 'LOJA 2', 'LOJA 1'],
+    })
+    estoque = pd.DataFrame({
+        # 10 repetido na LOJA 1 (vale o primeiro) e na matriz (vale o último)
+        'Codigo': [10, 10, 20, 10, 10, 30, 40],
+        'Descricao': 'x',
+        'Estoque_Loja': [4.0, 9.0, 0.0, 6.0, 8.0, 12.0, 1.0],
+        'Estoque_Geral': 1.0,
+        'Categoria': ['BOVINO', 'OUTRA', 'AVES', 'BOVINO', 'BOVINO', None, 'OVOS'],
+        'Grupo': ['AÇOUGUE', 'G', 'AÇOUGUE', 'AÇOUGUE', 'AÇOUGUE', 'PEIXARIA', 'MERCEARIA'],
+        'Loja': ['LOJA 1', 'LOJA 1', 'LOJA 1', MATRIZ, MATRIZ, MATRIZ, 'LOJA 2'],
+    })
+    media = pd.DataFrame({
+        # 20 só na LOJA 2: na LOJA 1 usa a média do produto
+        'Código': [10, 10, 20, 40],
+        'Loja': ['LOJA 1', 'LOJA 2', 'LOJA 2', 'LOJA 2'],
+        'Qtd': [2.0, 3.0, 8.0, 0.5],
+    })
+    return pd.concat([curva, estoque], ignore_index=True), media
+
+
+def _gerar_com_iterrows(df_combinado):
+    """Caminho de referência: o laço original do RelatorioRuptura.gerar"""
+    media_vendas = get_media_vendas()
+    df_curva = df_combinado[['Código', 'Produto', 'Qtd', 'Total R$', 'Loja_Nome']].copy()
+    df_curva.rename(columns={'Loja_Nome': 'Loja', 'Qtd': 'Vendas_Mes_Atual'}, inplace=True)
+    cols_estoque = ['Codigo', 'Descricao', 'Estoque_Loja', 'Estoque_Geral', 'Categoria', 'Grupo', 'Loja']
+    df_estoque = df_combinado[cols_estoque].copy()
+    df_estoque.rename(columns={'Codigo': 'Código', 'Descricao': 'Produto'}, inplace=True)
+
+    estoque_matriz = {}
+    for _, row in df_estoque.iterrows():
+        if row['Loja'] == MATRIZ:
+            estoque_matriz[str(row['Código'])] = row['Estoque_Loja']
+
+    resultados = []
+    for _, venda in df_curva.iterrows():
+        codigo = str(venda['Código'])
+        loja = venda['Loja']
+
+        estoque_loja = 0
+        estoque_loja_row = df_estoque[(df_estoque['Código'].astype(str) == codigo) & (df_estoque['Loja'] == loja)]
+        if len(estoque_loja_row) > 0:
+            estoque_loja = estoque_loja_row.iloc[0]['Estoque_Loja']
+
+        categoria = ""
+        grupo = ""
+        cat_row = df_estoque[df_estoque['Código'].astype(str) == codigo]
+        if len(cat_row) > 0:
+            categoria = cat_row.iloc[0]['Categoria']
+            grupo = cat_row.iloc[0]['Grupo']
+
+        media = media_vendas.get_media_por_produto_loja(codigo, loja)
+        if media == 0:
+            media = media_vendas.get_media_por_produto(codigo)
+
+        resultados.append({
+            'CATEGORIA': categoria,
+            'GRUPO': grupo,
+            'Cadeamento': f"{codigo}-{venda['Produto']}-{loja}",
+            'CÓDIGO': codigo,
+            'PRODUTO': venda['Produto'],
+            'ESTQ LOJA': estoque_loja,
+            'ESTQ MATRIZ': estoque_matriz.get(codigo, 0),
+            'VENDAS MÊS ATUAL': venda['Vendas_Mes_Atual'],
+            'MÉDIA VENDA MENSAL': media,
+        })
+
+    return pd.DataFrame(resultados).sort_values(['CATEGORIA', 'GRUPO', 'PRODUTO'])
+
+
+@pytest.fixture
+def df_combinado(monkeypatch):
+    """DataFrame combinado com a média de vendas trocada em memória (sem ler a planilha)"""
+    df, df_media = _combinado()
+    media_vendas = get_media_vendas()
+    monkeypatch.setattr(media_vendas, 'atualizar', lambda: False)
+    for atributo in ('_df', '_indice_loja', '_indice_produto'):
+        monkeypatch.setattr(media_vendas, atributo, getattr(media_vendas, atributo))
+    media_vendas._df = df_media
+    media_vendas._construir_indices()
+    return df
+
+
+def test_gerar_igual_ao_laco_iterrows(df_combinado):
+    relatorio = RelatorioRuptura()
+    relatorio.gerar(df_combinado)
+    referencia = _gerar_com_iterrows(df_combinado)
+
+    pd.testing.assert_frame_equal(relatorio.get_df_resultado(), referencia, check_dtype=False)
+
+
+def test_codigo_e_cadeamento_como_texto(df_combinado):
+    relatorio = RelatorioRuptura()
+    relatorio.gerar(df_combinado)
+    resultado = relatorio.get_df_resultado().set_index('PRODUTO')
+
+    # O 'Código' da Curva ABC vem como float no combinado (concat com o estoque)
+    assert resultado.loc['CARNE L1', 'CÓDIGO'] == '10.0'
+    assert resultado.loc['CARNE L1', 'Cadeamento'] == '10.0-CARNE L1-LOJA 1'
+    assert resultado.loc['CARNE L1', 'ESTQ LOJA'] == 4.0
+    assert resultado.loc['CARNE L1', 'ESTQ MATRIZ'] == 8.0
+    assert resultado.loc['FRANGO L1', 'MÉDIA VENDA MENSAL'] == 8.0